@@ -11,10 +11,28 @@ import json
 import shutil
 import threading
 from werkzeug.utils import secure_filename
-from flask import Flask, render_template, request, jsonify, send_file, redirect, url_for, abort
-from utils import process_zip_file, cleanup_old_files
-from models import db, ProcessingJob, UsageStat, Config
-from datetime import datetime
+from flask import Flask, Response, render_template, request, jsonify, send_file, redirect, url_for, abort, session
+from utils import run_stored_job, abandon_stored_job, stored_job_size, finish_cancelled_job, save_status, cleanup_old_files, ensure_pdf, CANCEL_MARKER
+from cancellation import write_cancel_marker
+from jobs import JobScheduler, QueueFullError
+from worker import WorkerClient, WorkerUnavailableError
+from job_store import get_job_store
+from job_limits import run_stored_job_with_limits
+from job_outputs import OUTPUT_PDF, parse_outputs, parse_intermediates
+from deadline import parse_deadline
+from eta import load_throughput_model, prediction_error_stats, ETA_HISTORY_JOBS, STAGE_TOTAL
+from status_events import is_final_status
+from status_backends import get_status_backend
+from job_registry import JobRegistry
+from converters import get_registry
+from converter_stats import load_converter_stats
+from models import db, ProcessingJob, UsageStat, UsageRollup, Config, StageTiming
+from database import engine_options, set_db_app
+from usage_stats import ensure_usage_indexes
+from job_stats import ensure_job_stats, dashboard_stats, status_counts, list_jobs, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from config_cache import ensure_settings, parse_setting, get_config_cache
+from job_retention import run_retention
+from datetime import datetime, timedelta
 
 # Configuration de l'application
 app = Flask(__name__)
@@ -24,13 +42,31 @@ app.config['UPLOAD_FOLDER'] = os.path.join(os.getcwd(), 'uploads')
 app.config['OUTPUT_FOLDER'] = os.path.join(os.getcwd(), 'outputs')
 app.config['STATUS_FOLDER'] = os.path.join(os.getcwd(), 'status')
 app.config['ALLOWED_EXTENSIONS'] = {'zip'}
+# Nombre de traitements simultanés et taille de la file d'attente
+app.config['MAX_CONCURRENT_JOBS'] = int(os.environ.get('MAX_CONCURRENT_JOBS', 2))
+app.config['MAX_QUEUED_JOBS'] = int(os.environ.get('MAX_QUEUED_JOBS', 20))
+# Adresse du service de traitement (worker.py) ; vide : traitement dans ce processus
+app.config['WORKER_ADDRESS'] = os.environ.get('WORKER_ADDRESS', '')
+# Générer le PDF seulement au premier téléchargement (/download/pdf)
+app.config['PDF_ON_DEMAND'] = os.environ.get('PDF_ON_DEMAND', '0').lower() in ('1', 'true', 'yes')
+# Conservation des fichiers extraits et convertis en fin de traitement (keep, delete, on_error)
+app.config['INTERMEDIATES_RETENTION'] = parse_intermediates(os.environ.get('INTERMEDIATES_RETENTION'))
+# Durée maximale d'un flux de statut SSE (secondes) : le navigateur se reconnecte
+# ensuite de lui-même (EventSource). Chaque flux occupe un thread du worker qui
+# le sert : gunicorn est lancé avec des workers gthread (--worker-class gthread
+# --threads), et la durée reste sous le délai d'arrêt des workers (--timeout, 30 s
+# par défaut), qui interromprait un flux plus long servi par un worker sync
+app.config['STATUS_STREAM_TIMEOUT'] = int(os.environ.get('STATUS_STREAM_TIMEOUT', 25))
 
 # Configuration de la base de données
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
 
-# Initialiser la base de données
+# Initialiser la base de données ; les traitements exécutés dans ce
+# processus partagent le moteur de l'application
 db.init_app(app)
+set_db_app(app)
 
 # Créer les dossiers nécessaires s'ils n'existent pas
 for folder in [app.config['UPLOAD_FOLDER'], app.config['OUTPUT_FOLDER'], app.config['STATUS_FOLDER']]:
@@ -39,6 +75,55 @@ for folder in [app.config['UPLOAD_FOLDER'], app.config['OUTPUT_FOLDER'], app.con
 # Création des tables de la base de données si elles n'existent pas
 with app.app_context():
     db.create_all()
+    ensure_usage_indexes(db.session)
+    ensure_job_stats(db.session)
+    ensure_settings(db.session)
+
+# Détection des convertisseurs disponibles, une seule fois par worker
+get_registry()
+
+# Ordonnanceur des traitements : service de traitement séparé si configuré,
+# sinon pool de workers et file d'attente bornée dans ce processus
+if app.config['WORKER_ADDRESS']:
+    scheduler = WorkerClient(app.config['WORKER_ADDRESS'])
+else:
+    scheduler = JobScheduler(workers=app.config['MAX_CONCURRENT_JOBS'],
+                             max_queue=app.config['MAX_QUEUED_JOBS'])
+
+def mark_job_started(job_id):
+    """Passer le job à l'état 'processing' quand un worker le prend en charge"""
+    with app.app_context():
+        job = ProcessingJob.query.filter_by(job_id=job_id).first()
+        if job:
+            job.status = 'processing'
+            db.session.commit()
+
+def submit_stored_job(job_id):
+    """
+    Confier au pool de workers un job enregistré dans la file durable. La
+    taille de l'archive (documents, octets décompressés) détermine son ordre
+    de prise en charge : les petits jobs passent devant les gros.
+    """
+    size = stored_job_size(job_store.get(job_id))
+    # Le service de traitement applique lui-même les limites de ressources
+    func = run_stored_job if app.config['WORKER_ADDRESS'] else run_stored_job_with_limits
+    return scheduler.submit(job_id, func, args=(job_id,), on_start=mark_job_started, size=size)
+
+# File d'attente durable : les jobs interrompus par un redémarrage sont repris
+# depuis leur dernier point de reprise (par le service de traitement s'il est utilisé)
+job_store = get_job_store()
+if not app.config['WORKER_ADDRESS']:
+    job_store.start_monitor(lambda stored_job: submit_stored_job(stored_job.job_id),
+                            give_up=abandon_stored_job)
+
+def load_job(job_id):
+    """Chercher un job en base pour le registre : (trouvé, nom du fichier d'origine)"""
+    job = ProcessingJob.query.filter_by(job_id=job_id).first()
+    return job is not None, (job.original_filename if job else None)
+
+# Registre des jobs : dossiers d'un job retrouvés par son identifiant, sans
+# parcourir les dossiers de statut ou de sortie
+job_registry = JobRegistry(app.config['OUTPUT_FOLDER'], app.config['STATUS_FOLDER'], loader=load_job)
 
 # Vérification des extensions de fichiers autorisées
 def allowed_file(filename):
@@ -60,6 +145,11 @@ def index():
     cleanup_thread.daemon = True
     cleanup_thread.start()
     
+    # Supprimer les anciens jobs de la base (au plus une passe par heure)
+    retention_thread = threading.Thread(target=run_retention)
+    retention_thread.daemon = True
+    retention_thread.start()
+    
     return render_template('index.html')
 
 # Route pour le téléversement du fichier
@@ -96,16 +186,14 @@ def upload_file():
         file.save(zip_path)
         
         # Initialiser le statut
-        status_file = os.path.join(status_folder, 'status.json')
-        with open(status_file, 'w') as f:
-            json.dump({
-                'percent': 0,
-                'status_text': 'Fichier téléversé avec succès.',
-                'current_step': 'extract',
-                'complete': False,
-                'error': None,
-                'start_time': timestamp
-            }, f)
+        save_status(status_folder, {
+            'percent': 0,
+            'status_text': 'Fichier téléversé avec succès.',
+            'current_step': 'extract',
+            'complete': False,
+            'error': None,
+            'start_time': timestamp
+        })
         
         # Estimer le nombre de fichiers (pour l'interface utilisateur)
         file_count = 20  # Valeur par défaut
@@ -121,8 +209,13 @@ def upload_file():
             db.session.add(job)
             db.session.commit()
         
+        # Dernier job de ce navigateur (routes /status et /download sans identifiant)
+        job_registry.register(unique_id, filename)
+        session['job_id'] = unique_id
+        
         return jsonify({
             'success': True,
+            'job_id': unique_id,
             'zip_path': zip_path,
             'output_dir': output_folder,
             'status_dir': status_folder,
@@ -145,40 +238,96 @@ def process_file():
     if not os.path.exists(zip_path):
         return jsonify({'success': False, 'error': 'Le fichier ZIP n\'existe pas.'}), 404
     
+    # Sorties à produire (docx, pdf), conservation des fichiers intermédiaires
+    # et délai éventuel (secondes) au-delà duquel le job passe en mode dégradé
+    try:
+        outputs = parse_outputs(data.get('outputs'))
+        intermediates = parse_intermediates(data.get('intermediates'), app.config['INTERMEDIATES_RETENTION'])
+        deadline_seconds = parse_deadline(data.get('deadline'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
     # Obtenir le dossier unique
     unique_id = os.path.dirname(zip_path).split(os.path.sep)[-1]
     output_folder = os.path.join(app.config['OUTPUT_FOLDER'], unique_id)
     status_folder = os.path.join(app.config['STATUS_FOLDER'], unique_id)
     
     try:
+        # PDF généré au premier téléchargement si demandé
+        pdf_on_demand = bool(data.get('pdf_on_demand', app.config['PDF_ON_DEMAND']))
+        
         # Mettre à jour l'état du job dans la base de données
         job = ProcessingJob.query.filter_by(job_id=unique_id).first()
         if job:
-            job.status = 'processing'
+            job.status = 'queued'
             db.session.commit()
         
-        # Lancer le traitement dans un thread séparé
-        process_thread = threading.Thread(
-            target=process_zip_file,
+        # Effacer une demande d'annulation laissée par un traitement précédent
+        cancel_marker = os.path.join(status_folder, CANCEL_MARKER)
+        if os.path.exists(cancel_marker):
+            os.remove(cancel_marker)
+        
+        # Enregistrer le job dans la file durable puis le confier au pool de workers
+        job_store.enqueue(
+            unique_id,
+            'run_processing',
             args=(zip_path, output_folder),
-            kwargs={'status_dir': status_folder, 'job_id': unique_id}
+            kwargs={'status_dir': status_folder, 'pdf_on_demand': pdf_on_demand,
+                    'outputs': outputs, 'intermediates': intermediates,
+                    # Échéance absolue : le temps d'attente dans la file compte
+                    'deadline': time.time() + deadline_seconds if deadline_seconds else None},
+            claim=not app.config['WORKER_ADDRESS']
         )
-        process_thread.daemon = True
-        process_thread.start()
+        try:
+            position = submit_stored_job(unique_id)
+        except QueueFullError as e:
+            # Le job pourra être soumis à nouveau plus tard
+            job_store.discard(unique_id)
+            if job:
+                job.status = 'uploaded'
+                db.session.commit()
+            
+            response = jsonify({
+                'success': False,
+                'error': f'Le serveur est occupé. Réessayez dans {e.retry_after} secondes.',
+                'queue_position': e.position,
+                'retry_after': e.retry_after
+            })
+            response.headers['Retry-After'] = str(e.retry_after)
+            return response, 429
+        except WorkerUnavailableError as e:
+            # Service de traitement arrêté : le job pourra être soumis à nouveau
+            print(str(e))
+            job_store.discard(unique_id)
+            if job:
+                job.status = 'uploaded'
+                db.session.commit()
+            return jsonify({
+                'success': False,
+                'error': 'Le service de traitement est indisponible. Réessayez plus tard.'
+            }), 503
+        
+        if position > 0:
+            save_status(status_folder, {
+                'percent': 0,
+                'status_text': f'En attente de traitement (position {position})...',
+                'current_step': 'queued',
+                'complete': False,
+                'queue_position': position,
+                'start_time': int(time.time())
+            })
         
-        return jsonify({'success': True})
+        return jsonify({'success': True, 'job_id': unique_id, 'queue_position': position})
         
     except Exception as e:
         # Enregistrer l'erreur dans le fichier de statut
-        status_file = os.path.join(status_folder, 'status.json')
-        with open(status_file, 'w') as f:
-            json.dump({
-                'percent': 0,
-                'status_text': 'Une erreur s\'est produite.',
-                'current_step': 'error',
-                'complete': False,
-                'error': str(e)
-            }, f)
+        save_status(status_folder, {
+            'percent': 0,
+            'status_text': 'Une erreur s\'est produite.',
+            'current_step': 'error',
+            'complete': False,
+            'error': str(e)
+        })
         
         # Mettre à jour le statut d'erreur dans la base de données
         try:
@@ -192,62 +341,182 @@ def process_file():
         return jsonify({'success': False, 'error': str(e)}), 500
 
 # Route pour télécharger les fichiers traités
+@app.route('/download/<job_id>/<file_type>')
+def download_job_file(job_id, file_type):
+    record = job_registry.get(job_id)
+    if record is None:
+        abort(404)
+    return send_job_file(record, file_type)
+
+# Fichiers du dernier job téléversé depuis ce navigateur
 @app.route('/download/<file_type>')
 def download_file(file_type):
-    # Trouver le dossier de sortie le plus récent
-    output_folders = [os.path.join(app.config['OUTPUT_FOLDER'], f) for f in os.listdir(app.config['OUTPUT_FOLDER'])]
-    if not output_folders:
+    record = job_registry.get(session['job_id']) if 'job_id' in session else None
+    if record is None:
+        abort(404)
+    return send_job_file(record, file_type)
+
+def send_job_file(record, file_type):
+    if file_type not in ('docx', 'pdf'):
         abort(404)
     
-    latest_folder = max(output_folders, key=os.path.getmtime)
+    # Sorties servies une fois le job terminé : pendant le traitement, elles
+    # sont incomplètes, et le PDF est peut-être en cours de rendu par le job
+    status_data = get_status_backend().latest(record.job_id, record.status_file)
+    if status_data is None or not is_final_status(status_data):
+        return render_template('error.html', error_code=409,
+                               error_message="Le traitement n'est pas encore terminé."), 409
+    if not status_data.get('complete'):
+        abort(404)
     
     if file_type == 'docx':
-        file_path = os.path.join(latest_folder, 'merged.docx')
+        file_path = os.path.join(record.output_dir, 'merged.docx')
         filename = 'documents_fusionnes.docx'
-    elif file_type == 'pdf':
-        file_path = os.path.join(latest_folder, 'merged.pdf')
+    elif status_data.get('pdf_on_demand') or 'outputs' not in status_data:
+        # PDF différé (ou job antérieur au choix des sorties) : généré au
+        # premier téléchargement s'il n'existe pas encore
+        file_path = ensure_pdf(record.output_dir)
+        filename = 'documents_fusionnes.pdf'
+        if not file_path and os.path.exists(os.path.join(record.output_dir, 'merged.docx')):
+            # Échec de la conversion : nouvelle tentative au prochain téléchargement
+            return render_template('error.html', error_code=500,
+                                   error_message="La conversion en PDF a échoué. "
+                                                 "Veuillez télécharger le fichier DOCX."), 500
+    elif OUTPUT_PDF in status_data['outputs'] and status_data.get('output_pdf'):
+        file_path = os.path.join(record.output_dir, 'merged.pdf')
         filename = 'documents_fusionnes.pdf'
     else:
+        # PDF non demandé, ou abandonné par le job (délai) : l'étape n'est pas
+        # exécutée ici à sa place
         abort(404)
     
-    if not os.path.exists(file_path):
+    if not file_path or not os.path.exists(file_path):
         abort(404)
     
     return send_file(file_path, as_attachment=True, download_name=filename)
 
 # Route pour vérifier le statut du traitement
+@app.route('/cancel/<job_id>', methods=['POST'])
+def cancel_processing(job_id):
+    # L'identifiant du job est aussi un nom de dossier
+    if secure_filename(job_id) != job_id:
+        return jsonify({'success': False, 'error': 'Identifiant de traitement invalide.'}), 400
+
+    output_folder = os.path.join(app.config['OUTPUT_FOLDER'], job_id)
+    status_folder = os.path.join(app.config['STATUS_FOLDER'], job_id)
+
+    job = ProcessingJob.query.filter_by(job_id=job_id).first()
+    if not job and not os.path.isdir(status_folder):
+        return jsonify({'success': False, 'error': 'Traitement introuvable.'}), 404
+    stored_job = job_store.get(job_id)
+    if stored_job and stored_job.state == 'cancelled':
+        return jsonify({'success': False, 'error': 'Le traitement est déjà annulé.', 'status': 'cancelled'}), 409
+    if job and job.status in ('completed', 'error', 'cancelled'):
+        return jsonify({'success': False, 'error': 'Le traitement est déjà terminé.', 'status': job.status}), 409
+
+    # Le marqueur arrête aussi un traitement exécuté par un autre processus
+    # (autre worker gunicorn ou service de traitement)
+    write_cancel_marker(os.path.join(status_folder, CANCEL_MARKER))
+    job_store.cancel(job_id)
+
+    try:
+        outcome = scheduler.cancel(job_id)
+    except WorkerUnavailableError as e:
+        print(str(e))
+        outcome = None
+
+    # Job en cours ici : il supprime lui-même ses sorties partielles en s'arrêtant.
+    # Sinon (en attente, ou exécuté ailleurs) : le marquer annulé tout de suite
+    if outcome != 'running':
+        finish_cancelled_job(output_folder, status_folder, job_id)
+
+    return jsonify({'success': True, 'job_id': job_id, 'was': outcome or 'unknown'})
+
+@app.route('/status/<job_id>')
+def job_status(job_id):
+    record = job_registry.get(job_id)
+    if record is None:
+        return jsonify({'error': 'Traitement introuvable.'}), 404
+    return job_status_response(record)
+
+# Statut du dernier job téléversé depuis ce navigateur
 @app.route('/status')
 def processing_status():
-    # Trouver le dossier de statut le plus récent
-    status_folders = [os.path.join(app.config['STATUS_FOLDER'], f) for f in os.listdir(app.config['STATUS_FOLDER'])]
-    if not status_folders:
+    record = job_registry.get(session['job_id']) if 'job_id' in session else None
+    if record is None:
         return jsonify({'error': 'Aucun traitement en cours.'})
+    return job_status_response(record)
+
+def job_status_response(record):
+    # Dernier statut du job dans le stockage partagé des statuts (STATUS_BACKEND)
+    try:
+        status_data = get_status_backend().latest(record.job_id, record.status_file)
+    except Exception as e:
+        return jsonify({'error': f'Erreur lors de la lecture du statut: {str(e)}'})
     
-    latest_folder = max(status_folders, key=os.path.getmtime)
-    status_file = os.path.join(latest_folder, 'status.json')
-    
-    if not os.path.exists(status_file):
+    if status_data is None:
         return jsonify({'error': 'Fichier de statut introuvable.'})
     
-    try:
-        with open(status_file, 'r') as f:
-            status_data = json.load(f)
-        
-        # Ajouter des statistiques si le traitement est terminé
-        if status_data.get('complete', False):
-            start_time = status_data.get('start_time', 0)
-            end_time = status_data.get('end_time', int(time.time()))
-            processing_time = end_time - start_time
-            
-            status_data['stats'] = {
-                'processing_time': processing_time,
-                'file_count': status_data.get('file_count', 0)
-            }
+    return jsonify(with_stats(status_data))
+
+def with_stats(status_data):
+    """Ajouter des statistiques au statut si le traitement est terminé"""
+    if status_data.get('complete', False):
+        start_time = status_data.get('start_time', 0)
+        end_time = status_data.get('end_time', int(time.time()))
+        processing_time = end_time - start_time
         
-        return jsonify(status_data)
+        status_data = dict(status_data, stats={
+            'processing_time': processing_time,
+            'file_count': status_data.get('file_count', 0)
+        })
+    return status_data
+
+# Attente maximale d'un nouveau statut entre deux vérifications de la durée
+# du flux, et intervalle d'envoi d'un commentaire qui maintient la connexion (secondes)
+STATUS_STREAM_POLL = 1.0
+STATUS_STREAM_KEEPALIVE = 15
+
+@app.route('/status/<job_id>/stream')
+def processing_status_stream(job_id):
+    """
+    Flux SSE (text/event-stream) des statuts d'un job : chaque statut publié
+    est envoyé dès son écriture, quel que soit le worker ou la machine qui
+    exécute le job (stockage partagé des statuts, STATUS_BACKEND). Le flux
+    se termine avec le statut final du job.
+    """
+    record = job_registry.get(job_id)
+    if record is None:
+        return jsonify({'success': False, 'error': 'Traitement introuvable.'}), 404
+    
+    timeout = app.config['STATUS_STREAM_TIMEOUT']
+    
+    def generate():
+        cursor = get_status_backend().cursor(job_id, record.status_file)
+        last_sent = None
+        last_write = time.time()
+        started = last_write
         
-    except Exception as e:
-        return jsonify({'error': f'Erreur lors de la lecture du statut: {str(e)}'})
+        # Délai de reconnexion du navigateur (millisecondes)
+        yield 'retry: 2000\n\n'
+        while time.time() - started < timeout:
+            status_data = cursor.next(timeout=STATUS_STREAM_POLL)
+            
+            if status_data is not None and status_data != last_sent:
+                last_sent = status_data
+                last_write = time.time()
+                yield f"data: {json.dumps(with_stats(status_data))}\n\n"
+                if is_final_status(status_data):
+                    return
+            elif time.time() - last_write >= STATUS_STREAM_KEEPALIVE:
+                last_write = time.time()
+                yield ': keepalive\n\n'
+    
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        # Pas de mise en tampon par un proxy nginx
+        'X-Accel-Buffering': 'no'
+    })
 
 # Afficher le README
 @app.route('/readme')
@@ -263,17 +532,8 @@ def show_readme():
 @app.route('/admin')
 def admin_dashboard():
     """Page d'administration avec statistiques et configuration"""
-    # Récupérer les statistiques globales
-    total_jobs = ProcessingJob.query.count()
-    total_files = db.session.query(db.func.sum(ProcessingJob.file_count)).scalar() or 0
-    avg_time = db.session.query(db.func.avg(ProcessingJob.processing_time)).scalar() or 0
-    
-    # Préparer les statistiques pour le template
-    stats = {
-        'total_jobs': total_jobs,
-        'total_files': total_files,
-        'avg_time': int(avg_time)
-    }
+    # Statistiques globales, lues dans les agrégats (sans parcourir processing_jobs)
+    stats = dashboard_stats()
     
     # Récupérer les jobs récents
     recent_jobs = ProcessingJob.query.order_by(ProcessingJob.created_at.desc()).limit(10).all()
@@ -281,26 +541,76 @@ def admin_dashboard():
     # Récupérer les statistiques par jour
     daily_stats = UsageStat.query.order_by(UsageStat.date.desc()).limit(7).all()
     
+    # Statistiques par heure des dernières 24 heures
+    hourly_stats = (UsageRollup.query.filter(UsageRollup.hour >= datetime.now() - timedelta(hours=24))
+                    .order_by(UsageRollup.hour.desc()).all())
+    
     # Récupérer les configurations
     configs = Config.query.all()
     
+    # État des convertisseurs détectés au démarrage
+    converters = load_converter_stats(get_registry()).snapshot()
+    
+    # Modèles de débit des étapes et erreur de prédiction des derniers jobs
+    recent_totals = (StageTiming.query.filter_by(stage=STAGE_TOTAL)
+                     .order_by(StageTiming.id.desc()).limit(ETA_HISTORY_JOBS).all())
+    eta = dict(load_throughput_model().to_dict(), error=prediction_error_stats(recent_totals))
+    
     return render_template('admin.html', 
                           stats=stats, 
                           recent_jobs=recent_jobs, 
                           daily_stats=daily_stats,
-                          configs=configs)
+                          hourly_stats=hourly_stats,
+                          configs=configs,
+                          converters=converters,
+                          eta=eta)
+
+# Liste paginée des jobs (JSON)
+@app.route('/admin/jobs')
+def admin_jobs():
+    """
+    Jobs du plus récent au plus ancien, par pages : ?limit=N (50 par défaut),
+    ?status=<état> et ?before=<id> (valeur next de la page précédente)
+    """
+    try:
+        limit = min(max(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+        before = request.args.get('before')
+        before = int(before) if before else None
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Paramètres de pagination invalides.'}), 400
+    
+    status = request.args.get('status') or None
+    jobs, next_before = list_jobs(status, before, limit)
+    counts = status_counts()
+    
+    return jsonify({
+        'success': True,
+        'jobs': [job.to_dict() for job in jobs],
+        'next': next_before,
+        # Total lu dans les agrégats : pas de COUNT(*) sur la table
+        'total': counts.get(status, 0) if status else sum(counts.values()),
+        'status_counts': counts
+    })
 
 # Mise à jour de la configuration
 @app.route('/admin/config', methods=['POST'])
 def update_config():
     """Mettre à jour les paramètres de configuration"""
+    values = dict(request.form.items())
     try:
-        for key, value in request.form.items():
-            config = Config.query.filter_by(key=key).first()
-            if config:
-                config.value = value
-                db.session.commit()
+        for key, value in values.items():
+            parse_setting(key, value)
+    except ValueError as e:
+        return render_template('error.html', error_code=400, error_message=str(e)), 400
+    
+    try:
+        configs = Config.query.filter(Config.key.in_(values)).all()
+        for config in configs:
+            config.value = values[config.key]
+        db.session.commit()
         
+        # Relire la configuration ici et dans les autres workers
+        get_config_cache().invalidate()
         return redirect(url_for('admin_dashboard'))
     except Exception as e:
         return render_template('error.html', error_code=500, 
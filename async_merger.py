@@ -0,0 +1,281 @@
+"""
+DocxFilesMerger - Application de traitement et fusion de documents.
+Développé par MOA Digital Agency LLC (https://myoneart.com)
+Email: moa@myoneart.com
+Copyright © 2025 MOA Digital Agency LLC. Tous droits réservés.
+
+Interface asyncio du traitement d'une archive (équivalent de
+docx_files_merger.process_zip_file pour un service asyncio).
+Les étapes bloquantes (extraction, python-docx, rendu PDF) s'exécutent dans
+des exécuteurs gérés par le traitement, LibreOffice est attendu via
+asyncio.create_subprocess_exec, et l'avancement est publié sous forme
+d'événements par un itérateur asynchrone, à fermer avec contextlib.aclosing :
+
+    async with aclosing(process_zip_events(zip_path, output_dir)) as events:
+        async for event in events:
+            print(event.step, event.percent, event.message)
+
+L'annulation de la tâche qui consomme les événements (task.cancel(), ou
+sortie anticipée de la boucle) arrête le traitement : les processus
+LibreOffice sont tués, les étapes bloquantes en cours s'arrêtent au point de
+contrôle suivant et les fichiers partiels sont supprimés. Sans aclosing,
+un itérateur abandonné n'est fermé qu'à sa finalisation par le ramasse-miettes,
+et ce nettoyage est différé d'autant.
+"""
+
+import os
+import asyncio
+from contextlib import aclosing
+from concurrent.futures import ThreadPoolExecutor
+
+from cancellation import CancelToken, cancel_scope
+from converters import convert_async, render_pdf_parallel, TASK_DOC_TO_DOCX, TASK_DOCX_TO_PDF
+from pipeline import PipelineError, PIPELINE_WORKERS, PIPELINE_QUEUE_SIZE
+from docx_files_merger import (list_doc_files, iter_doc_files, new_merged_document, append_document,
+                               save_merged_document, write_placeholder_docx, remove_partial_outputs)
+
+# Étapes publiées dans les événements
+STEP_START = 'start'
+STEP_MERGE = 'merge'
+STEP_PDF = 'pdf'
+STEP_COMPLETE = 'complete'
+STEP_ERROR = 'error'
+
+# Part de l'avancement attribuée à l'extraction, la conversion et la fusion
+MERGE_PERCENT = 80
+
+
+class ProgressEvent:
+    """Événement d'avancement d'un traitement"""
+
+    def __init__(self, step, percent, message, current=None, total=None,
+                 docx_path=None, pdf_path=None):
+        self.step = step
+        self.percent = percent
+        self.message = message
+        self.current = current
+        self.total = total
+        self.docx_path = docx_path
+        self.pdf_path = pdf_path
+
+    def to_dict(self):
+        """Convertir l'objet en dictionnaire pour JSON"""
+        return {
+            'step': self.step,
+            'percent': self.percent,
+            'message': self.message,
+            'current': self.current,
+            'total': self.total,
+            'docx_path': self.docx_path,
+            'pdf_path': self.pdf_path
+        }
+
+    def __repr__(self):
+        return f"<ProgressEvent {self.step} {self.percent:.1f}% {self.message!r}>"
+
+
+class _BlockingStages:
+    """
+    Exécuteurs d'un traitement : un pool pour l'extraction et la conversion,
+    un thread unique pour le document fusionné (python-docx n'est pas
+    thread-safe). Chaque appel s'exécute avec le jeton d'annulation du
+    traitement.
+    """
+
+    def __init__(self, workers):
+        self.token = CancelToken()
+        self.executor = ThreadPoolExecutor(max_workers=workers,
+                                           thread_name_prefix='async-merger')
+        self.merge_executor = ThreadPoolExecutor(max_workers=1,
+                                                 thread_name_prefix='async-merger-merge')
+        # Conversions simultanées (LibreOffice compris) limitées au nombre de workers
+        self.slots = asyncio.Semaphore(workers)
+        self.tasks = set()
+        self._futures = set()
+
+    def _call(self, func, args):
+        with cancel_scope(self.token):
+            return func(*args)
+
+    async def run(self, func, *args):
+        """Exécuter func(*args) dans le pool sans bloquer la boucle"""
+        return await self._submit(self.executor, func, args)
+
+    async def run_merge(self, func, *args):
+        """Exécuter func(*args) dans le thread du document fusionné"""
+        return await self._submit(self.merge_executor, func, args)
+
+    async def _submit(self, executor, func, args):
+        future = executor.submit(self._call, func, args)
+        self._futures.add(future)
+        future.add_done_callback(self._futures.discard)
+        return await asyncio.wrap_future(future)
+
+    def spawn(self, coroutine):
+        """Lancer une tâche annulée avec le traitement"""
+        task = asyncio.ensure_future(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def cancel(self):
+        """Arrêter les tâches et attendre la fin des étapes bloquantes en cours"""
+        self.token.cancel()
+        for task in list(self.tasks):
+            task.cancel()
+        waiting = list(self.tasks) + [asyncio.wrap_future(future) for future in list(self._futures)]
+        if waiting:
+            await asyncio.gather(*waiting, return_exceptions=True)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+        self.merge_executor.shutdown(wait=False)
+
+
+async def _convert_document(stages, file_path, extract_dir):
+    """Convertir un document extrait en .docx, ou None en cas d'échec"""
+    if file_path.lower().endswith('.docx'):
+        return file_path
+
+    docx_path = os.path.join(extract_dir, os.path.basename(file_path).rsplit('.', 1)[0] + '.docx')
+    try:
+        async with stages.slots:
+            result, _ = await convert_async(TASK_DOC_TO_DOCX, file_path, docx_path, stages.run)
+            if result:
+                return result
+            print(f"Avertissement: Impossible de convertir {file_path}, document basique créé à la place.")
+            return await stages.run(write_placeholder_docx, file_path, docx_path)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        print(f"Erreur lors de la conversion de {file_path}: {str(e)}")
+        return None
+
+
+async def _produce(stages, zip_path, extract_dir, ready):
+    """Extraire les documents un par un et lancer leur conversion dès l'extraction"""
+    files = iter_doc_files(zip_path, extract_dir)
+    try:
+        while True:
+            file_path = await stages.run(next, files, None)
+            if file_path is None:
+                break
+            conversion = stages.spawn(_convert_document(stages, file_path, extract_dir))
+            # File bornée : l'extraction attend que la fusion rattrape son retard
+            await ready.put((file_path, conversion))
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        print(f"Erreur lors de l'extraction des fichiers: {str(e)}")
+        await ready.put(e)
+        return
+    await ready.put(None)
+
+
+async def _convert_pdf(stages, merged_docx, pdf_path, docx_files):
+    # Rendu parallèle des documents sources, sinon conversion du document fusionné
+    if len(docx_files) > 1 and await stages.run(render_pdf_parallel, docx_files, pdf_path):
+        return pdf_path
+    async with stages.slots:
+        result, _ = await convert_async(TASK_DOCX_TO_PDF, merged_docx, pdf_path, stages.run)
+    return result
+
+
+async def process_zip_events(zip_path, output_dir, workers=None, queue_size=None):
+    """
+    Traiter une archive comme docx_files_merger.process_zip_file en publiant
+    l'avancement : itérateur asynchrone de ProgressEvent. Le dernier
+    événement est à l'étape 'complete' (chemins des fichiers produits dans
+    docx_path et pdf_path) ou 'error'. L'appelant ferme l'itérateur avec
+    contextlib.aclosing, pour que l'arrêt du traitement et la suppression
+    des fichiers partiels aient lieu dès la sortie de sa boucle.
+    """
+    workers = max(1, workers or PIPELINE_WORKERS)
+    queue_size = max(1, queue_size or PIPELINE_QUEUE_SIZE)
+    stages = _BlockingStages(workers)
+    extract_dir = os.path.join(output_dir, "extracted")
+    docx_output = os.path.join(output_dir, "merged.docx")
+    pdf_output = os.path.join(output_dir, "merged.pdf")
+    cancelled = False
+
+    try:
+        os.makedirs(extract_dir, exist_ok=True)
+        file_names = await stages.run(list_doc_files, zip_path)
+        if not file_names:
+            yield ProgressEvent(STEP_ERROR, 0, "Aucun fichier DOC/DOCX trouvé dans l'archive.")
+            return
+
+        total_files = len(file_names)
+        yield ProgressEvent(STEP_START, 0, f"Traitement de {total_files} documents...", 0, total_files)
+
+        # Documents convertis depuis .doc fusionnés sous leur nom .docx
+        merged_doc = await stages.run_merge(
+            new_merged_document, [os.path.splitext(name)[0] + '.docx' for name in file_names])
+        docx_files = []
+
+        ready = asyncio.Queue(maxsize=queue_size)
+        stages.spawn(_produce(stages, zip_path, extract_dir, ready))
+
+        # Fusionner dans l'ordre d'origine dès que chaque document est converti
+        index = 0
+        while True:
+            item = await ready.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise PipelineError(str(item)) from item
+
+            file_path, conversion = item
+            docx_path = await conversion
+            if docx_path:
+                await stages.run_merge(append_document, merged_doc, docx_path, index, total_files)
+                docx_files.append(docx_path)
+            index += 1
+            yield ProgressEvent(STEP_MERGE, MERGE_PERCENT * index / total_files,
+                                f"Traitement du document {index}/{total_files}...",
+                                index, total_files)
+
+        merged_docx = None
+        if docx_files:
+            merged_docx = await stages.run_merge(save_merged_document, merged_doc, docx_output)
+        if not merged_docx:
+            yield ProgressEvent(STEP_ERROR, MERGE_PERCENT, "Erreur lors de la fusion des documents.",
+                                index, total_files)
+            return
+
+        yield ProgressEvent(STEP_PDF, MERGE_PERCENT, "Conversion en PDF...", index, total_files,
+                            docx_path=merged_docx)
+        pdf_path = await _convert_pdf(stages, merged_docx, pdf_output, docx_files)
+
+        message = "Traitement terminé." if pdf_path else "Traitement terminé, échec de la conversion en PDF."
+        yield ProgressEvent(STEP_COMPLETE, 100, message, len(docx_files), total_files,
+                            docx_path=merged_docx, pdf_path=pdf_path)
+
+    except (asyncio.CancelledError, GeneratorExit):
+        cancelled = True
+        raise
+
+    finally:
+        # Arrêter ce qui tourne encore (LibreOffice compris) et attendre la
+        # fin des étapes bloquantes avant de supprimer les fichiers partiels
+        await stages.cancel()
+        stages.shutdown()
+        if cancelled:
+            remove_partial_outputs(output_dir)
+
+
+async def process_zip_file_async(zip_path, output_dir, on_progress=None, workers=None):
+    """
+    Traiter une archive et retourner (docx_path, pdf_path), comme
+    docx_files_merger.process_zip_file. on_progress(event) est appelé pour
+    chaque ProgressEvent.
+    """
+    docx_path = pdf_path = None
+    # Fermeture immédiate du traitement si on_progress lève une exception
+    async with aclosing(process_zip_events(zip_path, output_dir, workers=workers)) as events:
+        async for event in events:
+            if on_progress:
+                on_progress(event)
+            if event.step == STEP_COMPLETE:
+                docx_path, pdf_path = event.docx_path, event.pdf_path
+    return docx_path, pdf_path
@@ -0,0 +1,184 @@
+"""
+DocxFilesMerger - Application de traitement et fusion de documents.
+Développé par MOA Digital Agency LLC (https://myoneart.com)
+Email: moa@myoneart.com
+Copyright © 2025 MOA Digital Agency LLC. Tous droits réservés.
+
+Annulation coopérative des traitements.
+Un CancelToken est associé au traitement en cours (variable de contexte,
+propagée aux threads du pipeline et du rendu PDF). Le traitement vérifie le
+jeton entre deux documents ; les processus externes (LibreOffice, pandoc)
+lancés via run_command sont tués dès l'annulation. Un fichier marqueur
+permet d'annuler un traitement exécuté dans un autre processus (service de
+traitement).
+"""
+
+import os
+import signal
+import threading
+import subprocess
+import contextvars
+from contextlib import contextmanager
+
+# Intervalle de vérification de l'annulation pendant l'attente d'un processus (secondes)
+POLL_INTERVAL = 0.5
+
+_current_token = contextvars.ContextVar('cancel_token', default=None)
+
+
+class JobCancelled(Exception):
+    """Le traitement a été annulé"""
+
+
+class CancelToken:
+    """Demande d'annulation d'un traitement"""
+
+    def __init__(self, marker_path=None):
+        self.marker_path = marker_path
+        self._event = threading.Event()
+        self._processes = set()
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        if self._event.is_set():
+            return True
+        if self.marker_path and os.path.exists(self.marker_path):
+            self._event.set()
+            return True
+        return False
+
+    def cancel(self):
+        """Annuler le traitement et tuer immédiatement ses processus externes"""
+        self._event.set()
+        if self.marker_path:
+            write_cancel_marker(self.marker_path)
+        with self._lock:
+            processes = list(self._processes)
+        for process in processes:
+            kill_process(process)
+
+    def check(self):
+        """Lever JobCancelled si le traitement a été annulé"""
+        if self.cancelled:
+            raise JobCancelled("Traitement annulé")
+
+    def register_process(self, process):
+        with self._lock:
+            self._processes.add(process)
+        # Annulation arrivée pendant le lancement du processus
+        if self._event.is_set():
+            kill_process(process)
+
+    def unregister_process(self, process):
+        with self._lock:
+            self._processes.discard(process)
+
+
+def write_cancel_marker(marker_path):
+    """Créer le fichier marqueur qui annule un traitement d'un autre processus"""
+    try:
+        os.makedirs(os.path.dirname(marker_path), exist_ok=True)
+        with open(marker_path, 'w') as f:
+            f.write('cancel')
+    except OSError as e:
+        print(f"Erreur lors de l'écriture du marqueur d'annulation: {str(e)}")
+
+
+def current_cancel_token():
+    """Jeton d'annulation du traitement en cours, ou None"""
+    return _current_token.get()
+
+
+@contextmanager
+def cancel_scope(token):
+    """Rendre token courant pour le bloc (et les threads lancés avec son contexte)"""
+    reset = _current_token.set(token)
+    try:
+        yield token
+    finally:
+        _current_token.reset(reset)
+
+
+def check_cancelled():
+    """Lever JobCancelled si le traitement en cours a été annulé"""
+    token = _current_token.get()
+    if token is not None:
+        token.check()
+
+
+def is_cancelled():
+    token = _current_token.get()
+    return token is not None and token.cancelled
+
+
+def kill_process(process):
+    """Tuer un processus lancé dans sa propre session, avec ses enfants"""
+    if process.poll() is not None:
+        return
+    kill_process_group(process.pid)
+
+
+def kill_process_group(pid):
+    """Tuer le groupe de processus de pid (LibreOffice lance lui-même soffice.bin)"""
+    try:
+        if hasattr(os, 'killpg'):
+            os.killpg(pid, signal.SIGKILL)
+        else:
+            os.kill(pid, signal.SIGTERM)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def run_command(cmd, timeout=None, **kwargs):
+    """
+    Équivalent de subprocess.run(cmd, check=True) qui tue le processus (et
+    ses enfants) dès que le traitement en cours est annulé.
+    """
+    token = _current_token.get()
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               start_new_session=True, **kwargs)
+    if token is not None:
+        token.register_process(process)
+
+    try:
+        waited = 0.0
+        while True:
+            try:
+                stdout, stderr = process.communicate(timeout=POLL_INTERVAL)
+                break
+            except subprocess.TimeoutExpired:
+                waited += POLL_INTERVAL
+                if token is not None and token.cancelled:
+                    kill_process(process)
+                    process.communicate()
+                    raise JobCancelled("Traitement annulé")
+                if timeout is not None and waited >= timeout:
+                    kill_process(process)
+                    process.communicate()
+                    raise subprocess.TimeoutExpired(cmd, timeout)
+    finally:
+        if token is not None:
+            token.unregister_process(process)
+
+    if token is not None and token.cancelled:
+        raise JobCancelled("Traitement annulé")
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, cmd, stdout, stderr)
+    return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+
+
+def install_signal_handlers(token):
+    """
+    Annuler token à la réception de SIGINT ou SIGTERM (ligne de commande).
+    Un second Ctrl+C interrompt immédiatement le programme.
+    """
+    def handler(signum, frame):
+        if token.cancelled and signum == signal.SIGINT:
+            raise KeyboardInterrupt
+        print("\nAnnulation du traitement en cours...")
+        token.cancel()
+
+    signal.signal(signal.SIGINT, handler)
+    if hasattr(signal, 'SIGTERM'):
+        signal.signal(signal.SIGTERM, handler)
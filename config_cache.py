@@ -0,0 +1,160 @@
+"""
+DocxFilesMerger - Application de traitement et fusion de documents.
+Développé par MOA Digital Agency LLC (https://myoneart.com)
+Email: moa@myoneart.com
+Copyright © 2025 MOA Digital Agency LLC. Tous droits réservés.
+
+Cache de la configuration (table config).
+Toute la table est lue en une requête, chaque réglage est converti selon
+son type (SETTINGS) et le résultat est gardé en mémoire CONFIG_CACHE_TTL
+secondes : le traitement lit ses réglages à chaque job (conversions et
+rendus PDF parallèles, file du pipeline, limites des jobs) sans requête.
+Une modification depuis l'administration vide le cache du processus et
+touche le fichier de version (CONFIG_VERSION_PATH) : les autres workers de
+la machine, qui surveillent sa date de modification, relisent la table à
+leur lecture suivante ; sur les autres machines, le cache expire au bout
+du TTL. Un réglage vide garde la valeur par défaut (variable d'environnement).
+"""
+
+import os
+import time
+import threading
+
+from database import get_db_app, db_session
+from models import Config
+
+# Durée de validité de la configuration chargée (secondes)
+CONFIG_CACHE_TTL = float(os.environ.get('CONFIG_CACHE_TTL', '30'))
+# Fichier touché à chaque modification, partagé par les workers de la machine
+CONFIG_VERSION_PATH = os.environ.get('CONFIG_VERSION_PATH', os.path.join(os.getcwd(), 'config.version'))
+# Intervalle de vérification du fichier de version (secondes)
+CONFIG_CHECK_INTERVAL = 1.0
+
+# Réglages modifiables depuis l'administration : type et description
+SETTINGS = {
+    'pipeline_workers': (int, "Conversions menées en parallèle dans un job (vide : PIPELINE_WORKERS)"),
+    'pipeline_queue_size': (int, "Documents extraits en attente de conversion dans un job (vide : PIPELINE_QUEUE_SIZE)"),
+    'pdf_render_workers': (int, "Rendus PDF partiels menés en parallèle (vide : PDF_RENDER_WORKERS)"),
+    'job_memory_limit_mb': (int, "Mémoire maximale d'un job, en Mo, 0 sans limite (vide : JOB_MEMORY_LIMIT_MB)"),
+    'job_cpu_limit_seconds': (int, "Temps de calcul maximal d'un job, en secondes, 0 sans limite "
+                                   "(vide : JOB_CPU_LIMIT_SECONDS)"),
+    'job_disk_quota_mb': (int, "Espace disque maximal d'un job, en Mo, 0 sans limite (vide : JOB_DISK_QUOTA_MB)"),
+    'job_retention_days': (int, "Durée de conservation des jobs en base, en jours, 0 sans limite "
+                                "(vide : JOB_RETENTION_DAYS)"),
+}
+
+
+def parse_setting(key, value):
+    """
+    Valeur typée d'un réglage (None pour une valeur vide, texte pour une clé
+    hors de SETTINGS). Lève ValueError pour une valeur invalide.
+    """
+    if value is None or not str(value).strip():
+        return None
+    if key not in SETTINGS:
+        return value
+    kind = SETTINGS[key][0]
+    try:
+        parsed = kind(str(value).strip())
+    except ValueError:
+        raise ValueError(f"Valeur invalide pour {key}: {value}")
+    if parsed < 0:
+        raise ValueError(f"La valeur de {key} doit être positive: {value}")
+    return parsed
+
+
+def ensure_settings(session):
+    """Créer les lignes (vides) des réglages de SETTINGS absents de la table config"""
+    existing = {key for key, in session.query(Config.key).filter(Config.key.in_(SETTINGS))}
+    for key, (_, description) in SETTINGS.items():
+        if key not in existing:
+            session.add(Config(key=key, value='', description=description))
+    try:
+        session.commit()
+    except Exception as e:
+        # Réglages créés au même moment par un autre worker
+        session.rollback()
+        print(f"Réglages non initialisés: {str(e)}")
+
+
+class ConfigCache:
+    """Réglages typés de la table config, gardés en mémoire ttl secondes"""
+
+    def __init__(self, ttl=CONFIG_CACHE_TTL, version_path=CONFIG_VERSION_PATH):
+        self.ttl = ttl
+        self.version_path = version_path
+        self._values = None
+        self._version = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _read_version(self):
+        try:
+            return os.stat(self.version_path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _stale(self, now):
+        if self._values is None or now - self._loaded_at >= self.ttl:
+            return True
+        if now - self._checked_at < CONFIG_CHECK_INTERVAL:
+            return False
+        self._checked_at = now
+        return self._read_version() != self._version
+
+    def _load(self, now):
+        # Version lue avant la table : une modification pendant la lecture provoque un rechargement
+        self._version = self._read_version()
+        self._loaded_at = self._checked_at = now
+        self._values = {}
+        if get_db_app() is None:
+            return
+        try:
+            with db_session():
+                rows = [(row.key, row.value) for row in Config.query.all()]
+        except Exception as e:
+            print(f"Erreur lors du chargement de la configuration: {str(e)}")
+            return
+
+        for key, value in rows:
+            try:
+                parsed = parse_setting(key, value)
+            except ValueError as e:
+                print(f"Réglage ignoré: {str(e)}")
+                continue
+            if parsed is not None:
+                self._values[key] = parsed
+
+    def get(self, key, default=None):
+        """Valeur typée du réglage key, ou default s'il est absent ou vide"""
+        now = time.monotonic()
+        with self._lock:
+            if self._stale(now):
+                self._load(now)
+            return self._values.get(key, default)
+
+    def invalidate(self, broadcast=True):
+        """Relire la table à la prochaine lecture, dans ce processus et (broadcast) les autres workers"""
+        with self._lock:
+            self._values = None
+        if not broadcast:
+            return
+        try:
+            with open(self.version_path, 'a'):
+                os.utime(self.version_path, None)
+        except OSError as e:
+            print(f"Erreur lors de la diffusion de la configuration: {str(e)}")
+
+
+# Cache du processus
+_config_cache = ConfigCache()
+
+
+def get_config_cache():
+    return _config_cache
+
+
+def get_setting(key, default=None):
+    """Valeur typée d'un réglage (cache du processus), ou default"""
+    return get_config_cache().get(key, default)
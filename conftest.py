@@ -0,0 +1,40 @@
+"""
+Fixtures partagées des tests (pytest).
+
+Développé par MOA Digital Agency LLC (https://myoneart.com)
+Email: moa@myoneart.com
+Copyright © 2025 MOA Digital Agency LLC. Tous droits réservés.
+"""
+
+import pytest
+from flask import Flask
+
+from models import db
+from database import set_db_app, get_db_writer, engine_options
+from usage_stats import ensure_usage_indexes
+from job_stats import ensure_job_stats
+
+
+@pytest.fixture
+def database(tmp_path):
+    """Base SQLite temporaire, utilisée par db_session() et la file d'écriture différée"""
+    database_uri = f"sqlite:///{tmp_path / 'app.db'}"
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(database_uri)
+    db.init_app(app)
+    set_db_app(app)
+
+    with app.app_context():
+        db.create_all()
+        ensure_usage_indexes(db.session)
+        ensure_job_stats(db.session)
+
+    yield app
+
+    get_db_writer().flush(timeout=10)
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    set_db_app(None)
@@ -0,0 +1,134 @@
+"""
+DocxFilesMerger - Application de traitement et fusion de documents.
+Développé par MOA Digital Agency LLC (https://myoneart.com)
+Email: moa@myoneart.com
+Copyright © 2025 MOA Digital Agency LLC. Tous droits réservés.
+
+Mesures des convertisseurs partagées par les processus (table converter_stats).
+Les conversions ont lieu dans le processus de chaque job (job_limits), dont
+le registre disparaît avec lui : ses mesures (durée, succès) sont renvoyées
+au processus parent, qui les ajoute à son registre puis à la table par la
+file d'écriture différée. La moyenne mobile de chaque convertisseur et
+classe de document y est mise à jour par une seule requête atomique, quel
+que soit le nombre de processus qui écrivent. Chaque processus relit la
+table au plus toutes les CONVERTER_STATS_TTL secondes : le tableau de bord
+et les nouveaux jobs partent des mesures de tous les workers.
+"""
+
+import time
+import threading
+from datetime import datetime
+
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from converters import BackendStats
+from database import get_db_app, get_db_writer, db_session
+from models import ConverterStat
+
+# Durée de validité des mesures relues en base (secondes)
+CONVERTER_STATS_TTL = 60
+# Attente des écritures en cours avant de relire la table (secondes)
+CONVERTER_STATS_FLUSH_TIMEOUT = 5
+
+
+def ema_coefficients(durations, alpha=BackendStats.ALPHA):
+    """
+    Effet de durations, appliquées dans l'ordre à une moyenne mobile
+    (BackendStats.record) : (c, d) tels que la nouvelle latence vaut latence * c + d
+    """
+    c, d = 1.0, 0.0
+    for seconds in durations:
+        c *= 1 - alpha
+        d = (1 - alpha) * d + alpha * seconds
+    return c, d
+
+
+def add_samples(session, key, prior_latency, durations, failures):
+    """Ajouter des mesures à la ligne key (convertisseur, classe), créée au besoin"""
+    table = ConverterStat.__table__
+    backend, input_class = key
+    c, d = ema_coefficients(durations)
+    now = datetime.utcnow()
+    dialect = session.get_bind().dialect.name
+
+    if dialect in ('postgresql', 'sqlite'):
+        insert = postgresql_insert if dialect == 'postgresql' else sqlite_insert
+        statement = insert(table).values(backend=backend, input_class=input_class,
+                                         attempts=len(durations), failures=failures,
+                                         latency=prior_latency * c + d, updated_at=now)
+        statement = statement.on_conflict_do_update(
+            index_elements=['backend', 'input_class'],
+            set_={'attempts': table.c.attempts + statement.excluded.attempts,
+                  'failures': table.c.failures + statement.excluded.failures,
+                  'latency': table.c.latency * c + d,
+                  'updated_at': statement.excluded.updated_at}
+        )
+        session.execute(statement)
+        return
+
+    # Autres bases : mise à jour atomique, ligne créée si elle n'existe pas encore
+    key_filter = (table.c.backend == backend) & (table.c.input_class == input_class)
+    updated = session.execute(table.update().where(key_filter).values(
+        attempts=table.c.attempts + len(durations),
+        failures=table.c.failures + failures,
+        latency=table.c.latency * c + d,
+        updated_at=now
+    )).rowcount
+    if not updated:
+        session.execute(table.insert().values(backend=backend, input_class=input_class,
+                                              attempts=len(durations), failures=failures,
+                                              latency=prior_latency * c + d, updated_at=now))
+
+
+def save_converter_stats(registry):
+    """Enregistrer en base (écriture différée) les mesures du registre pas encore enregistrées"""
+    samples = registry.drain_samples()
+    if not samples or get_db_app() is None:
+        return
+
+    grouped = {}
+    for name, klass, seconds, success in samples:
+        durations, failures = grouped.get((name, klass), ([], 0))
+        durations.append(seconds)
+        grouped[(name, klass)] = (durations, failures + (0 if success else 1))
+    priors = {key: registry.prior_latency(key[0]) for key in grouped}
+
+    def write(session):
+        for key, (durations, failures) in grouped.items():
+            add_samples(session, key, priors[key], durations, failures)
+
+    get_db_writer().submit(write)
+
+
+# Dernière lecture de la table par le processus
+_loaded_at = 0.0
+_load_lock = threading.Lock()
+
+
+def load_converter_stats(registry, max_age=CONVERTER_STATS_TTL):
+    """
+    Enregistrer les mesures en attente du registre, puis le mettre à jour
+    avec les mesures de tous les processus si sa dernière lecture date de
+    plus de max_age secondes
+    """
+    global _loaded_at
+    save_converter_stats(registry)
+    if get_db_app() is None:
+        return registry
+
+    with _load_lock:
+        if time.time() - _loaded_at < max_age:
+            return registry
+        # Mesures de ce processus écrites avant la lecture
+        get_db_writer().flush(timeout=CONVERTER_STATS_FLUSH_TIMEOUT)
+        try:
+            with db_session():
+                rows = [(row.backend, row.input_class, row.attempts, row.failures, row.latency)
+                        for row in ConverterStat.query.all()]
+        except Exception as e:
+            print(f"Erreur lors du chargement des mesures des convertisseurs: {str(e)}")
+            return registry
+        registry.load_stats(rows)
+        _loaded_at = time.time()
+    return registry
@@ -0,0 +1,682 @@
+"""
+DocxFilesMerger - Application de traitement et fusion de documents.
+Développé par MOA Digital Agency LLC (https://myoneart.com)
+Email: moa@myoneart.com
+Copyright © 2025 MOA Digital Agency LLC. Tous droits réservés.
+
+Registre des convertisseurs disponibles (LibreOffice, docx2pdf, pandoc,
+python-docx, reportlab). La détection est faite une seule fois par processus :
+les fonctions de conversion interrogent ensuite le registre au lieu de
+réessayer chaque outil et d'intercepter FileNotFoundError / ImportError à
+chaque appel. Le registre mesure la latence et le taux d'échec de chaque
+convertisseur par classe de document et oriente chaque nouveau document vers
+le convertisseur au coût attendu le plus faible, au-dessus d'un seuil de
+fidélité configurable (CONVERTER_FIDELITY_FLOOR). Une petite part des
+conversions (CONVERTER_EXPLORE_RATE) est confiée à un autre convertisseur
+éligible, le moins coûteux restant le premier repli : sans ces essais, la
+mesure d'un convertisseur écarté ne serait jamais mise à jour. Il n'y a pas
+d'exploration avec un seuil de fidélité imposé (rendu rapide d'une
+échéance), dans un job soumis à une échéance (without_exploration) ni pour
+les parties d'un même PDF, qui gardent un rendu homogène.
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+import threading
+import subprocess
+import queue
+import asyncio
+import contextvars
+from pathlib import Path
+from contextlib import contextmanager
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from pdf_writer import PdfConcatenator, PdfError
+from cancellation import JobCancelled, run_command, check_cancelled, kill_process_group
+from config_cache import get_setting
+
+# Tâches de conversion prises en charge
+TASK_DOC_TO_DOCX = 'doc->docx'
+TASK_DOCX_TO_PDF = 'docx->pdf'
+
+# Seuil de fidélité par défaut (0 = tout convertisseur, 1 = rendu complet uniquement)
+DEFAULT_FIDELITY_FLOOR = float(os.environ.get('CONVERTER_FIDELITY_FLOOR', '0.7'))
+
+# Nombre de rendus PDF partiels menés en parallèle
+PDF_RENDER_WORKERS = int(os.environ.get('PDF_RENDER_WORKERS', min(4, os.cpu_count() or 1)))
+
+# Part des conversions confiées à un autre convertisseur que le moins coûteux, pour le remesurer
+CONVERTER_EXPLORE_RATE = float(os.environ.get('CONVERTER_EXPLORE_RATE', '0.05'))
+
+# Exploration permise dans le contexte courant (désactivée pour un job soumis à une échéance)
+_exploration = contextvars.ContextVar('converter_exploration', default=True)
+
+# Mesures gardées en attente d'enregistrement en base (voir converter_stats)
+STATS_JOURNAL_SIZE = 10000
+
+# Classes de taille des documents (octets)
+SIZE_CLASSES = [
+    ('small', 100 * 1024),
+    ('medium', 2 * 1024 * 1024),
+    ('large', None),
+]
+
+
+class ConverterBackend:
+    """Convertisseur de base : détection, version et coût de démarrage"""
+
+    name = None
+    tasks = ()
+    # Fidélité du rendu, de 0 (texte brut) à 1 (mise en forme complète)
+    fidelity = 0.0
+    # Attributs fixés par la détection, transmis aux processus des jobs
+    STATE_FIELDS = ('available', 'version', 'detail', 'warmup_ms')
+
+    def __init__(self):
+        self.available = False
+        self.version = None
+        self.detail = None
+        self.warmup_ms = None
+
+    def probe(self):
+        """Détecter le convertisseur et mesurer son coût de démarrage"""
+        start = time.perf_counter()
+        try:
+            self.version = self._probe()
+            self.available = True
+        except Exception as e:
+            self.available = False
+            self.detail = str(e)
+        self.warmup_ms = int((time.perf_counter() - start) * 1000)
+        return self.available
+
+    def _probe(self):
+        raise NotImplementedError
+
+    def to_state(self):
+        """Résultat de la détection, pour un processus qui ne la refait pas"""
+        return {field: getattr(self, field) for field in self.STATE_FIELDS}
+
+    def restore(self, state):
+        """Reprendre le résultat d'une détection faite par un autre processus (to_state)"""
+        for field in self.STATE_FIELDS:
+            if field in state:
+                setattr(self, field, state[field])
+
+    def convert(self, task, src_path, dest_path):
+        """Convertir src_path vers dest_path, retourne le chemin produit ou None"""
+        raise NotImplementedError
+
+    def to_dict(self):
+        """Convertir l'objet en dictionnaire pour JSON"""
+        return {
+            'name': self.name,
+            'available': self.available,
+            'version': self.version,
+            'warmup_ms': self.warmup_ms,
+            'tasks': list(self.tasks),
+            'fidelity': self.fidelity,
+            'detail': self.detail
+        }
+
+
+class LibreOfficeBackend(ConverterBackend):
+    """Conversion via LibreOffice en mode headless"""
+
+    name = 'libreoffice'
+    tasks = (TASK_DOC_TO_DOCX, TASK_DOCX_TO_PDF)
+    fidelity = 1.0
+    STATE_FIELDS = ConverterBackend.STATE_FIELDS + ('executable',)
+
+    def __init__(self):
+        super().__init__()
+        self.executable = None
+        # Profils utilisateur libres : deux instances LibreOffice ne peuvent
+        # pas partager le même profil, chaque conversion simultanée a le sien
+        self._profiles = queue.SimpleQueue()
+
+    def _probe(self):
+        self.executable = shutil.which('libreoffice') or shutil.which('soffice')
+        if not self.executable:
+            raise FileNotFoundError("LibreOffice introuvable dans le PATH")
+
+        result = subprocess.run([self.executable, '--headless', '--version'],
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                text=True, timeout=60)
+        return result.stdout.strip() or 'inconnue'
+
+    def acquire_profile(self):
+        """Profil utilisateur libre pour une conversion"""
+        try:
+            return self._profiles.get_nowait()
+        except queue.Empty:
+            return tempfile.mkdtemp(prefix='docxmerger_lo_profile_')
+
+    def release_profile(self, profile):
+        self._profiles.put(profile)
+
+    def command(self, task, src_path, outdir, profile):
+        """Ligne de commande qui convertit src_path dans le dossier outdir"""
+        target_format = 'docx' if task == TASK_DOC_TO_DOCX else 'pdf'
+        return [self.executable, f'-env:UserInstallation={Path(profile).as_uri()}',
+                '--headless', '--convert-to', target_format, '--outdir', outdir, src_path]
+
+    def convert(self, task, src_path, dest_path):
+        profile = self.acquire_profile()
+
+        # Convertir dans un dossier temporaire puis déplacer vers la destination
+        try:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                run_command(self.command(task, src_path, temp_dir, profile))
+                return self.move_output(task, src_path, temp_dir, dest_path)
+        finally:
+            self.release_profile(profile)
+
+    async def convert_async(self, task, src_path, dest_path):
+        """convert() pour une boucle asyncio : le processus est attendu sans bloquer"""
+        profile = self.acquire_profile()
+
+        try:
+            with tempfile.TemporaryDirectory() as temp_dir:
+                cmd = self.command(task, src_path, temp_dir, profile)
+                process = await asyncio.create_subprocess_exec(
+                    *cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, start_new_session=True)
+                try:
+                    stdout, stderr = await process.communicate()
+                except asyncio.CancelledError:
+                    # Tâche annulée : tuer LibreOffice et ses processus enfants
+                    if process.returncode is None:
+                        kill_process_group(process.pid)
+                    await process.wait()
+                    raise
+                if process.returncode != 0:
+                    raise subprocess.CalledProcessError(process.returncode, cmd, stdout, stderr)
+                return self.move_output(task, src_path, temp_dir, dest_path)
+        finally:
+            self.release_profile(profile)
+
+    def move_output(self, task, src_path, outdir, dest_path):
+        """Déplacer le fichier produit dans outdir vers dest_path"""
+        target_format = 'docx' if task == TASK_DOC_TO_DOCX else 'pdf'
+        name_without_ext = os.path.splitext(os.path.basename(src_path))[0]
+        generated = os.path.join(outdir, f"{name_without_ext}.{target_format}")
+        if not os.path.exists(generated):
+            return None
+
+        os.makedirs(os.path.dirname(os.path.abspath(dest_path)), exist_ok=True)
+        shutil.move(generated, dest_path)
+        return dest_path
+
+
+class Docx2PdfBackend(ConverterBackend):
+    """Conversion via la bibliothèque docx2pdf (nécessite Microsoft Word)"""
+
+    name = 'docx2pdf'
+    tasks = (TASK_DOCX_TO_PDF,)
+    fidelity = 1.0
+
+    def _probe(self):
+        # docx2pdf pilote Microsoft Word, disponible uniquement sous Windows et macOS
+        if sys.platform not in ('win32', 'darwin'):
+            raise RuntimeError("docx2pdf nécessite Microsoft Word (Windows ou macOS)")
+
+        import docx2pdf
+        return _package_version('docx2pdf')
+
+    def convert(self, task, src_path, dest_path):
+        import docx2pdf
+        docx2pdf.convert(src_path, dest_path)
+        return dest_path if os.path.exists(dest_path) else None
+
+
+class PandocBackend(ConverterBackend):
+    """Conversion via pandoc (si installé avec un moteur PDF)"""
+
+    name = 'pandoc'
+    tasks = (TASK_DOCX_TO_PDF,)
+    fidelity = 0.7
+    STATE_FIELDS = ConverterBackend.STATE_FIELDS + ('executable', 'pdf_engine')
+
+    # Moteurs PDF utilisables par pandoc, par ordre de préférence
+    PDF_ENGINES = ['wkhtmltopdf', 'weasyprint', 'xelatex', 'pdflatex']
+
+    def __init__(self):
+        super().__init__()
+        self.executable = None
+        self.pdf_engine = None
+
+    def _probe(self):
+        self.executable = shutil.which('pandoc')
+        if not self.executable:
+            raise FileNotFoundError("pandoc introuvable dans le PATH")
+
+        self.pdf_engine = next((engine for engine in self.PDF_ENGINES if shutil.which(engine)), None)
+        if not self.pdf_engine:
+            raise FileNotFoundError("Aucun moteur PDF trouvé pour pandoc")
+
+        result = subprocess.run([self.executable, '--version'],
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                text=True, timeout=60)
+        version = result.stdout.splitlines()[0] if result.stdout else 'inconnue'
+        return f"{version} ({self.pdf_engine})"
+
+    def convert(self, task, src_path, dest_path):
+        cmd = [self.executable, src_path, '-o', dest_path, f'--pdf-engine={self.pdf_engine}']
+        run_command(cmd)
+        return dest_path if os.path.exists(dest_path) else None
+
+
+class PythonDocxBackend(ConverterBackend):
+    """Réenregistrement via python-docx (fichiers .doc qui sont en réalité des DOCX)"""
+
+    name = 'python-docx'
+    tasks = (TASK_DOC_TO_DOCX,)
+    fidelity = 1.0
+
+    def _probe(self):
+        import docx
+        return _package_version('python-docx')
+
+    def convert(self, task, src_path, dest_path):
+        from docx import Document
+        document = Document(src_path)
+        document.save(dest_path)
+        return dest_path
+
+
+class ReportlabBackend(ConverterBackend):
+    """Rendu PDF en Python pur (paragraphes, titres, tableaux) via reportlab"""
+
+    name = 'reportlab'
+    tasks = (TASK_DOCX_TO_PDF,)
+    fidelity = 0.5
+
+    def _probe(self):
+        import reportlab
+        import pdf_renderer
+        return reportlab.Version
+
+    def convert(self, task, src_path, dest_path):
+        from pdf_renderer import render_docx_to_pdf
+        return render_docx_to_pdf(src_path, dest_path)
+
+
+def _package_version(distribution):
+    """Version installée d'un paquet Python, ou 'inconnue'"""
+    try:
+        from importlib.metadata import version
+        return version(distribution)
+    except Exception:
+        return 'inconnue'
+
+
+def input_class(task, src_path):
+    """Classe d'un document : tâche, extension et taille"""
+    try:
+        size = os.path.getsize(src_path)
+    except OSError:
+        size = 0
+    extension = os.path.splitext(src_path)[1].lower().lstrip('.')
+    size_class = next(label for label, limit in SIZE_CLASSES if limit is None or size < limit)
+    return f"{task}:{extension}:{size_class}"
+
+
+class BackendStats:
+    """Latence (moyenne mobile exponentielle) et taux d'échec d'un convertisseur"""
+
+    # Poids des nouvelles mesures dans la moyenne mobile
+    ALPHA = 0.3
+
+    def __init__(self, prior_latency):
+        self.attempts = 0
+        self.failures = 0
+        self.latency = prior_latency
+
+    def record(self, seconds, success):
+        self.attempts += 1
+        if not success:
+            self.failures += 1
+        self.latency = (1 - self.ALPHA) * self.latency + self.ALPHA * seconds
+
+    @property
+    def success_rate(self):
+        # Lissage de Laplace : un convertisseur jamais essayé vaut 1/2
+        return (self.attempts - self.failures + 1) / (self.attempts + 2)
+
+    @property
+    def expected_cost(self):
+        """Coût attendu : latence divisée par la probabilité de succès"""
+        return self.latency / max(self.success_rate, 0.05)
+
+    def to_dict(self):
+        return {
+            'attempts': self.attempts,
+            'failures': self.failures,
+            'latency_ms': int(self.latency * 1000),
+            'success_rate': round(self.success_rate, 3),
+            'expected_cost_ms': int(self.expected_cost * 1000)
+        }
+
+
+class ConverterRegistry:
+    """Registre des convertisseurs, détectés une seule fois par processus"""
+
+    # Ordre de préférence des convertisseurs pour chaque tâche (à coût égal)
+    PREFERENCES = {
+        TASK_DOC_TO_DOCX: ['python-docx', 'libreoffice'],
+        TASK_DOCX_TO_PDF: ['libreoffice', 'docx2pdf', 'pandoc', 'reportlab'],
+    }
+
+    def __init__(self, backends=None, fidelity_floor=None, explore_rate=None):
+        self._backends = {}
+        for backend in backends or [LibreOfficeBackend(), Docx2PdfBackend(), PandocBackend(),
+                                    PythonDocxBackend(), ReportlabBackend()]:
+            self._backends[backend.name] = backend
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+        # Mesures pas encore enregistrées en base : (convertisseur, classe, durée, succès)
+        self._journal = deque(maxlen=STATS_JOURNAL_SIZE)
+        self.fidelity_floor = DEFAULT_FIDELITY_FLOOR if fidelity_floor is None else fidelity_floor
+        self.explore_rate = CONVERTER_EXPLORE_RATE if explore_rate is None else explore_rate
+        self.probed_at = None
+
+    @classmethod
+    def from_state(cls, state):
+        """Registre d'un processus de job, repris de export_state() sans nouvelle détection"""
+        registry = cls()
+        with registry._lock:
+            for name, backend_state in state['backends'].items():
+                if name in registry._backends:
+                    registry._backends[name].restore(backend_state)
+            registry.probed_at = state['probed_at']
+        registry.load_stats(state['stats'])
+        return registry
+
+    def export_state(self):
+        """Détection et mesures du registre, transmises en JSON au processus d'un job"""
+        self.probe()
+        with self._stats_lock:
+            stats = [[name, klass, backend_stats.attempts, backend_stats.failures, backend_stats.latency]
+                     for (name, klass), backend_stats in self._stats.items()]
+        return {
+            'probed_at': self.probed_at,
+            'backends': {name: backend.to_state() for name, backend in self._backends.items()},
+            'stats': stats
+        }
+
+    def probe(self, force=False):
+        """Détecter les convertisseurs installés (une seule fois sauf si force=True)"""
+        with self._lock:
+            if self.probed_at is not None and not force:
+                return self
+            for backend in self._backends.values():
+                backend.probe()
+            self.probed_at = time.time()
+        return self
+
+    def get(self, name):
+        self.probe()
+        return self._backends.get(name)
+
+    def backends_for(self, task):
+        """Convertisseurs disponibles pour une tâche, dans l'ordre de préférence"""
+        self.probe()
+        return [self._backends[name] for name in self.PREFERENCES.get(task, [])
+                if name in self._backends and self._backends[name].available]
+
+    def prior_latency(self, name):
+        """Latence supposée d'un convertisseur jamais mesuré : son coût de démarrage"""
+        backend = self._backends.get(name)
+        return ((backend.warmup_ms or 0) if backend else 0) / 1000.0
+
+    def _stats_for(self, name, klass):
+        key = (name, klass)
+        if key not in self._stats:
+            self._stats[key] = BackendStats(self.prior_latency(name))
+        return self._stats[key]
+
+    def load_stats(self, rows):
+        """Remplacer les mesures par rows : (convertisseur, classe, essais, échecs, latence)"""
+        with self._stats_lock:
+            for name, klass, attempts, failures, latency in rows:
+                backend_stats = BackendStats(latency)
+                backend_stats.attempts = attempts
+                backend_stats.failures = failures
+                self._stats[(name, klass)] = backend_stats
+
+    def drain_samples(self):
+        """Mesures enregistrées depuis le dernier appel : (convertisseur, classe, durée, succès)"""
+        with self._stats_lock:
+            samples = list(self._journal)
+            self._journal.clear()
+        return samples
+
+    def replay(self, samples):
+        """Ajouter les mesures d'un autre processus (drain_samples du processus d'un job)"""
+        with self._stats_lock:
+            for name, klass, seconds, success in samples:
+                if name in self._backends:
+                    self._stats_for(name, klass).record(seconds, success)
+                    self._journal.append((name, klass, seconds, success))
+
+    def candidates(self, task, src_path=None, fidelity_floor=None, explore=False):
+        """
+        Convertisseurs à essayer pour un document, dans l'ordre :
+        d'abord ceux au-dessus du seuil de fidélité, triés par coût attendu
+        pour la classe du document, puis les autres par fidélité décroissante.
+        Avec explore (conversion réelle), un autre convertisseur éligible passe
+        en tête avec la probabilité explore_rate.
+        """
+        backends = self.backends_for(task)
+        floor = self.fidelity_floor if fidelity_floor is None else fidelity_floor
+        klass = input_class(task, src_path) if src_path else None
+
+        eligible = [b for b in backends if b.fidelity >= floor]
+        below = [b for b in backends if b.fidelity < floor]
+
+        if klass:
+            with self._stats_lock:
+                costs = {b.name: self._stats_for(b.name, klass).expected_cost for b in eligible}
+            # sorted() est stable : l'ordre de préférence départage les égalités
+            eligible = sorted(eligible, key=lambda b: costs[b.name])
+            if explore and len(eligible) > 1 and random.random() < self.explore_rate:
+                explored = random.choice(eligible[1:])
+                eligible.remove(explored)
+                eligible.insert(0, explored)
+
+        below = sorted(below, key=lambda b: -b.fidelity)
+        return eligible + below
+
+    def record(self, backend, task, src_path, seconds, success):
+        """Enregistrer la latence et le résultat d'une conversion"""
+        klass = input_class(task, src_path)
+        with self._stats_lock:
+            self._stats_for(backend.name, klass).record(seconds, success)
+            self._journal.append((backend.name, klass, seconds, success))
+
+    def expected_cost(self, backend, task, src_path):
+        """Durée attendue (secondes) d'une conversion de src_path par backend"""
+        klass = input_class(task, src_path)
+        with self._stats_lock:
+            return self._stats_for(backend.name, klass).expected_cost
+
+    def chosen(self, task, src_path=None):
+        """Convertisseur retenu pour une tâche, ou None si aucun n'est disponible"""
+        candidates = self.candidates(task, src_path)
+        return candidates[0] if candidates else None
+
+    def snapshot(self):
+        """État du registre pour le tableau de bord d'administration"""
+        self.probe()
+        with self._stats_lock:
+            stats = [dict(backend=name, input_class=klass, **backend_stats.to_dict())
+                     for (name, klass), backend_stats in sorted(self._stats.items())]
+        return {
+            'probed_at': self.probed_at,
+            'backends': [backend.to_dict() for backend in self._backends.values()],
+            'chosen': {task: (self.chosen(task).name if self.chosen(task) else None)
+                       for task in self.PREFERENCES},
+            'fidelity_floor': self.fidelity_floor,
+            'stats': stats
+        }
+
+
+# Registre partagé par le processus
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """Retourner le registre du processus, en le détectant au premier appel"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ConverterRegistry()
+    return _registry.probe()
+
+
+def set_registry(registry):
+    """Utiliser registry comme registre du processus (processus d'un job, voir job_limits)"""
+    global _registry
+    with _registry_lock:
+        _registry = registry
+
+
+@contextmanager
+def without_exploration():
+    """Toujours choisir le convertisseur le moins coûteux dans le bloc (et les threads lancés avec son contexte)"""
+    reset = _exploration.set(False)
+    try:
+        yield
+    finally:
+        _exploration.reset(reset)
+
+
+def _explores(fidelity_floor):
+    # Seuil imposé par l'appelant, ou bloc sans exploration : coût le plus faible
+    return fidelity_floor is None and _exploration.get()
+
+
+def convert(task, src_path, dest_path, fidelity_floor=None, explore=True):
+    """
+    Convertir un fichier avec le convertisseur au coût attendu le plus faible.
+    Les convertisseurs suivants ne sont essayés qu'en cas d'échec réel.
+    Retourne un tuple (chemin produit ou None, nom du convertisseur).
+    """
+    registry = get_registry()
+    for backend in registry.candidates(task, src_path, fidelity_floor,
+                                       explore=explore and _explores(fidelity_floor)):
+        check_cancelled()
+        start = time.perf_counter()
+        result = None
+        try:
+            result = backend.convert(task, src_path, dest_path)
+        except JobCancelled:
+            # Annulation : ni repli sur un autre convertisseur, ni échec comptabilisé
+            raise
+        except Exception as e:
+            print(f"Échec de la conversion {task} via {backend.name}: {str(e)}")
+
+        success = bool(result and os.path.exists(result))
+        registry.record(backend, task, src_path, time.perf_counter() - start, success)
+        if success:
+            return result, backend.name
+    return None, None
+
+
+async def convert_async(task, src_path, dest_path, run_blocking, fidelity_floor=None):
+    """
+    Équivalent de convert() pour une boucle asyncio. LibreOffice est attendu
+    via asyncio.create_subprocess_exec ; les autres convertisseurs, bloquants,
+    sont exécutés par la coroutine run_blocking(func, *args) de l'appelant
+    (dans son exécuteur). L'annulation de la tâche interrompt la conversion.
+    """
+    registry = get_registry()
+    for backend in registry.candidates(task, src_path, fidelity_floor, explore=_explores(fidelity_floor)):
+        start = time.perf_counter()
+        result = None
+        try:
+            if isinstance(backend, LibreOfficeBackend):
+                result = await backend.convert_async(task, src_path, dest_path)
+            else:
+                result = await run_blocking(backend.convert, task, src_path, dest_path)
+        except (JobCancelled, asyncio.CancelledError):
+            raise
+        except Exception as e:
+            print(f"Échec de la conversion {task} via {backend.name}: {str(e)}")
+
+        success = bool(result and os.path.exists(result))
+        registry.record(backend, task, src_path, time.perf_counter() - start, success)
+        if success:
+            return result, backend.name
+    return None, None
+
+
+def estimate_conversion_seconds(task, src_paths, fidelity_floor=None, workers=1):
+    """
+    Durée attendue de la conversion de src_paths, workers conversions étant
+    menées en parallèle, d'après les coûts mesurés par le registre
+    """
+    registry = get_registry()
+    total = 0.0
+    for src_path in src_paths:
+        candidates = registry.candidates(task, src_path, fidelity_floor)
+        if candidates:
+            total += registry.expected_cost(candidates[0], task, src_path)
+    return total / max(1, min(workers, len(src_paths)))
+
+
+def render_pdf_parallel(docx_files, pdf_path, max_workers=None, fidelity_floor=None):
+    """
+    Rendre chaque document source en PDF en parallèle, puis concaténer les PDF
+    partiels dans pdf_path au fur et à mesure, avec un signet par document.
+    Retourne les entrées de signets (titre, première page, nombre de pages),
+    ou None en cas d'échec : l'appelant convertit alors le document fusionné.
+    """
+    parts_dir = tempfile.mkdtemp(prefix='pdf_parts_', dir=os.path.dirname(os.path.abspath(pdf_path)))
+
+    def render(index, src_path):
+        part_path = os.path.join(parts_dir, f"{index:06d}.pdf")
+        # Même convertisseur pour toutes les parties : pas d'exploration
+        result, _ = convert(TASK_DOCX_TO_PDF, src_path, part_path, fidelity_floor, explore=False)
+        return result
+
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers or get_setting('pdf_render_workers',
+                                                                              PDF_RENDER_WORKERS)))
+    # Chaque rendu s'exécute dans le contexte de l'appelant (jeton d'annulation)
+    futures = [executor.submit(contextvars.copy_context().run, render, index, src_path)
+               for index, src_path in enumerate(docx_files)]
+    writer = PdfConcatenator(pdf_path)
+
+    try:
+        # Concaténer dans l'ordre, dès que chaque partie est prête
+        for src_path, future in zip(docx_files, futures):
+            part_path = future.result()
+            if not part_path:
+                raise PdfError(f"Rendu PDF impossible pour {os.path.basename(src_path)}")
+            writer.append(part_path, os.path.basename(src_path))
+            os.remove(part_path)
+
+        return writer.close()
+
+    except Exception as e:
+        for future in futures:
+            future.cancel()
+        writer.abort()
+        if os.path.exists(pdf_path):
+            os.remove(pdf_path)
+        if isinstance(e, JobCancelled):
+            raise
+        print(f"Échec du rendu PDF parallèle: {str(e)}")
+        return None
+
+    finally:
+        executor.shutdown(wait=True)
+        shutil.rmtree(parts_dir, ignore_errors=True)
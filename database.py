@@ -0,0 +1,241 @@
+"""
+DocxFilesMerger - Application de traitement et fusion de documents.
+Développé par MOA Digital Agency LLC (https://myoneart.com)
+Email: moa@myoneart.com
+Copyright © 2025 MOA Digital Agency LLC. Tous droits réservés.
+
+Accès à la base de données hors des requêtes web.
+Chaque processus (application web, service de traitement, processus d'un
+job) utilise une seule application Flask et un seul moteur SQLAlchemy,
+avec un pool de connexions partagé par tous ses threads. Les écritures des
+traitements (état des jobs, durées d'étape, statistiques d'utilisation)
+passent par une file d'écriture différée : un thread dédié les applique
+par lots, dans une seule transaction par lot, sans jamais bloquer le
+traitement des documents. La file est vidée à l'arrêt du processus.
+"""
+
+import os
+import queue
+import atexit
+import threading
+from datetime import datetime
+from contextlib import contextmanager
+
+from sqlalchemy import text
+
+from models import db, ProcessingJob, StageTiming
+
+# Pool de connexions de chaque processus (hors SQLite)
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '5'))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', '5'))
+# Durée de vie d'une connexion du pool (secondes)
+DB_POOL_RECYCLE = 300
+
+# Écritures appliquées par lot, et attente des écritures suivantes d'un lot (secondes)
+DB_WRITE_BATCH = int(os.environ.get('DB_WRITE_BATCH', '100'))
+DB_WRITE_INTERVAL = float(os.environ.get('DB_WRITE_INTERVAL', '0.2'))
+# Attente maximale des écritures en cours à l'arrêt du processus (secondes)
+DB_FLUSH_TIMEOUT = 30
+
+
+def ensure_indexes(session, statements):
+    """
+    Créer les index ajoutés aux modèles après la création de leurs tables
+    (CREATE INDEX IF NOT EXISTS : db.create_all ne modifie pas une table existante)
+    """
+    for statement in statements:
+        try:
+            session.execute(text(statement))
+            session.commit()
+        except Exception as e:
+            # Index unique impossible : doublons hérités, à fusionner à la main
+            session.rollback()
+            print(f"Erreur lors de la création d'un index: {str(e)}")
+
+
+def engine_options(database_uri):
+    """Options du moteur SQLAlchemy (SQLALCHEMY_ENGINE_OPTIONS) pour database_uri"""
+    options = {'pool_pre_ping': True, 'pool_recycle': DB_POOL_RECYCLE}
+    if database_uri and not database_uri.startswith('sqlite'):
+        options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
+    return options
+
+
+# Application portant le moteur du processus
+_db_app = None
+_db_app_lock = threading.Lock()
+
+
+def set_db_app(app):
+    """Utiliser app (l'application web) et son moteur pour les accès hors requête"""
+    global _db_app
+    with _db_app_lock:
+        _db_app = app
+
+
+def get_db_app():
+    """Application Flask du moteur partagé, créée au premier usage, ou None sans DATABASE_URL"""
+    global _db_app
+    if _db_app is None:
+        with _db_app_lock:
+            if _db_app is None:
+                database_uri = os.environ.get('DATABASE_URL')
+                if not database_uri:
+                    return None
+
+                from flask import Flask
+
+                app = Flask(__name__)
+                app.config['SQLALCHEMY_DATABASE_URI'] = database_uri
+                app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+                app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(database_uri)
+                db.init_app(app)
+                _db_app = app
+    return _db_app
+
+
+@contextmanager
+def db_session():
+    """
+    Session de la base dans un contexte d'application, pour les threads et
+    processus de traitement. Annulée si le bloc lève une exception ; lève
+    RuntimeError sans base configurée.
+    """
+    app = get_db_app()
+    if app is None:
+        raise RuntimeError("Base de données non configurée (DATABASE_URL)")
+
+    with app.app_context():
+        try:
+            yield db.session
+        except Exception:
+            db.session.rollback()
+            raise
+
+
+class DatabaseWriter:
+    """File d'écritures différées, appliquées par lots dans un thread dédié"""
+
+    def __init__(self, batch_size=DB_WRITE_BATCH, interval=DB_WRITE_INTERVAL):
+        self.batch_size = max(1, batch_size)
+        self.interval = interval
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, write):
+        """
+        Ajouter une écriture : write(session) est appelée dans le thread
+        d'écriture, le lot est validé ensuite. Sans base configurée,
+        l'écriture est ignorée.
+        """
+        if get_db_app() is None:
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='db-writer')
+                self._thread.daemon = True
+                self._thread.start()
+        self._queue.put(write)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            # Regrouper les écritures arrivées pendant l'intervalle
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=self.interval))
+                except queue.Empty:
+                    break
+            try:
+                self._apply(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _apply(self, batch):
+        try:
+            with db_session() as session:
+                for write in batch:
+                    write(session)
+                session.commit()
+        except Exception as e:
+            if len(batch) == 1:
+                print(f"Erreur lors de l'écriture dans la base de données: {str(e)}")
+                return
+            # Isoler l'écriture en échec : appliquer les autres une par une
+            for write in batch:
+                self._apply([write])
+
+    def flush(self, timeout=None):
+        """Attendre que les écritures en file soient appliquées. Retourne False à l'expiration du délai."""
+        with self._queue.all_tasks_done:
+            return self._queue.all_tasks_done.wait_for(lambda: not self._queue.unfinished_tasks, timeout)
+
+
+# File d'écriture du processus
+_db_writer = DatabaseWriter()
+
+
+def get_db_writer():
+    return _db_writer
+
+
+@atexit.register
+def _flush_at_exit():
+    get_db_writer().flush(timeout=DB_FLUSH_TIMEOUT)
+
+
+def _after_fork():
+    # Processus enfant : nouvelles connexions et nouvelle file (le thread d'écriture n'est pas copié)
+    global _db_writer
+    if _db_app is not None:
+        with _db_app.app_context():
+            db.engine.dispose(close=False)
+    _db_writer = DatabaseWriter()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def update_job(job_id, status, completed=False, **fields):
+    """Mettre à jour l'état d'un ProcessingJob (écriture différée)"""
+    completed_at = datetime.now() if completed else None
+
+    def write(session):
+        job = ProcessingJob.query.filter_by(job_id=job_id).first()
+        if job:
+            job.status = status
+            if completed_at:
+                job.completed_at = completed_at
+            for name, value in fields.items():
+                setattr(job, name, value)
+
+    get_db_writer().submit(write)
+
+
+def record_completed_job(job_id, file_count, processing_time, stage_samples=()):
+    """
+    Enregistrer un job terminé (écriture différée) : état du job et durées
+    d'étape (eta.StageSample). Les statistiques d'utilisation sont cumulées
+    par usage_stats.
+    """
+    completed_at = datetime.now()
+
+    def write(session):
+        job = ProcessingJob.query.filter_by(job_id=job_id).first()
+        if job:
+            job.status = 'completed'
+            job.completed_at = completed_at
+            job.file_count = file_count
+            job.processing_time = processing_time
+
+            # Durées d'étape, qui alimentent les modèles de débit
+            for sample in stage_samples:
+                session.add(StageTiming(job_id=job_id, **sample.to_dict()))
+
+    get_db_writer().submit(write)
+
+    # Statistiques d'utilisation du jour et de l'heure
+    from usage_stats import get_usage_aggregator
+    get_usage_aggregator().add(completed_at, file_count, processing_time)
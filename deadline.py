@@ -0,0 +1,179 @@
+"""
+DocxFilesMerger - Application de traitement et fusion de documents.
+Développé par MOA Digital Agency LLC (https://myoneart.com)
+Email: moa@myoneart.com
+Copyright © 2025 MOA Digital Agency LLC. Tous droits réservés.
+
+Mode « au mieux » sous échéance.
+Un job peut recevoir une échéance (horodatage absolu, pour rester valable
+dans le processus du job et après une reprise). Le traitement suit le temps
+restant et passe à des stratégies moins coûteuses quand il vient à manquer :
+convertisseur PDF le plus rapide quelle que soit sa fidélité, document
+fusionné sans table des matières, ou DOCX livré seul (le PDF reste alors
+disponible au premier téléchargement). Les dégradations appliquées sont
+rapportées dans le statut du job.
+"""
+
+import os
+import time
+
+from cancellation import CancelToken, JobCancelled, cancel_scope, current_cancel_token
+from converters import estimate_conversion_seconds, PDF_RENDER_WORKERS, TASK_DOCX_TO_PDF
+from config_cache import get_setting
+from eta import load_throughput_model
+from job_outputs import STAGE_PDF
+
+# Dégradations possibles
+DEGRADE_FAST_PDF = 'fast_pdf'
+DEGRADE_NO_TOC = 'no_toc'
+DEGRADE_DOCX_ONLY = 'docx_only'
+
+DEGRADATION_LABELS = {
+    DEGRADE_FAST_PDF: 'PDF rendu par le convertisseur le plus rapide',
+    DEGRADE_NO_TOC: 'table des matières omise',
+    DEGRADE_DOCX_ONLY: 'DOCX livré sans PDF',
+}
+
+# Seuil de fidélité du rendu rapide : le convertisseur au coût attendu le plus faible
+FAST_PDF_FIDELITY = 0.0
+
+# Marge appliquée aux durées estimées (les estimations sont des moyennes)
+SAFETY_FACTOR = 1.5
+
+
+class DeadlineExceeded(Exception):
+    """L'échéance du job a été atteinte pendant une étape"""
+
+
+def parse_deadline(value):
+    """
+    Valider un délai en secondes (None ou vide : pas d'échéance).
+    Lève ValueError pour une valeur non numérique ou négative.
+    """
+    if value is None or value == '':
+        return None
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Délai invalide: {value}")
+    if seconds <= 0:
+        raise ValueError(f"Le délai doit être positif: {value}")
+    return seconds
+
+
+class DeadlineToken(CancelToken):
+    """Jeton annulé à l'échéance, ou quand le jeton du traitement l'est"""
+
+    def __init__(self, parent, expires_at):
+        super().__init__()
+        self.parent = parent
+        self.expires_at = expires_at
+
+    @property
+    def cancelled(self):
+        if super().cancelled:
+            return True
+        if self.parent is not None and self.parent.cancelled:
+            return True
+        return time.time() >= self.expires_at
+
+
+class Deadline:
+    """Temps restant d'un job et dégradations appliquées pour le tenir"""
+
+    def __init__(self, expires_at):
+        self.expires_at = expires_at
+        self.degradations = []
+
+    @classmethod
+    def after(cls, seconds):
+        """Échéance dans seconds secondes, ou None sans délai"""
+        return cls(time.time() + seconds) if seconds else None
+
+    def remaining(self):
+        return max(0.0, self.expires_at - time.time())
+
+    @property
+    def expired(self):
+        return time.time() >= self.expires_at
+
+    def fits(self, estimated_seconds):
+        """Vrai si une étape estimée à estimated_seconds tient dans le temps restant"""
+        return estimated_seconds * SAFETY_FACTOR <= self.remaining()
+
+    def degrade(self, degradation):
+        if degradation not in self.degradations:
+            self.degradations.append(degradation)
+            print(f"Échéance: {DEGRADATION_LABELS[degradation]} "
+                  f"({int(self.remaining())} s restantes)")
+
+    def run(self, func, *args, **kwargs):
+        """
+        Exécuter func(*args, **kwargs), interrompue à l'échéance (processus
+        externes compris). Lève DeadlineExceeded si l'échéance a été atteinte,
+        JobCancelled si le traitement a été annulé.
+        """
+        parent = current_cancel_token()
+        try:
+            with cancel_scope(DeadlineToken(parent, self.expires_at)):
+                return func(*args, **kwargs)
+        except JobCancelled:
+            if (parent is not None and parent.cancelled) or not self.expired:
+                raise
+            raise DeadlineExceeded("Échéance atteinte")
+
+    @staticmethod
+    def estimate_pdf_seconds(source_files, fidelity_floor=None, workers=1):
+        """
+        Durée attendue du rendu PDF de source_files : latences mesurées des
+        convertisseurs (converter_stats, partagées par les workers) et, pour
+        le rendu complet, durée de l'étape PDF des derniers jobs terminés
+        (modèle de débit d'eta), la plus longue des deux
+        """
+        measured = estimate_conversion_seconds(TASK_DOCX_TO_PDF, source_files, fidelity_floor, workers)
+        if fidelity_floor is not None:
+            return measured
+
+        size = 0
+        for src_path in source_files:
+            try:
+                size += os.path.getsize(src_path)
+            except OSError:
+                pass
+        return max(measured, load_throughput_model().predict(STAGE_PDF, len(source_files), size))
+
+    def render_pdf(self, render, source_files, pdf_path, required=False):
+        """
+        Rendre le PDF via render(fidelity_floor) en tenant l'échéance : rendu
+        rapide si le rendu complet ne tient pas dans le temps restant, PDF
+        abandonné (DOCX livré seul) si même le rendu rapide ne tient pas ou
+        si l'échéance est atteinte pendant le rendu. Un PDF requis (seule
+        sortie du job) est toujours rendu, au besoin après l'échéance.
+        Retourne le chemin produit ou None.
+        """
+        workers = get_setting('pdf_render_workers', PDF_RENDER_WORKERS) if len(source_files) > 1 else 1
+        if not required and not self.fits(self.estimate_pdf_seconds(source_files, FAST_PDF_FIDELITY, workers)):
+            self.degrade(DEGRADE_DOCX_ONLY)
+            return None
+
+        fidelity_floor = None
+        if not self.fits(self.estimate_pdf_seconds(source_files, workers=workers)):
+            fidelity_floor = FAST_PDF_FIDELITY
+            self.degrade(DEGRADE_FAST_PDF)
+
+        if required:
+            return render(fidelity_floor)
+        try:
+            return self.run(render, fidelity_floor)
+        except DeadlineExceeded:
+            if os.path.exists(pdf_path):
+                os.remove(pdf_path)
+            self.degrade(DEGRADE_DOCX_ONLY)
+            return None
+
+    def to_dict(self):
+        """Convertir l'objet en dictionnaire pour JSON"""
+        return {
+            'deadline': int(self.expires_at),
+            'degradations': list(self.degradations)
+        }
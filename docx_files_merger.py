@@ -12,9 +12,17 @@ import zipfile
 import tempfile
 import shutil
 import argparse
-import subprocess
 import time
 from pathlib import Path
+from contextlib import nullcontext
+
+from converters import (get_registry, convert, render_pdf_parallel, without_exploration,
+                        TASK_DOC_TO_DOCX, TASK_DOCX_TO_PDF)
+from pipeline import run_pipeline
+from cancellation import CancelToken, JobCancelled, cancel_scope, install_signal_handlers
+from job_outputs import (OUTPUT_DOCX, OUTPUT_PDF, INTERMEDIATES_KEEP, INTERMEDIATES_POLICIES,
+                         parse_outputs, parse_intermediates, should_delete_intermediates)
+from deadline import Deadline, DEGRADE_NO_TOC, DEGRADE_DOCX_ONLY, DEGRADATION_LABELS, parse_deadline
 
 # Essai d'importation des dépendances optionnelles
 try:
@@ -34,15 +42,6 @@ except ImportError:
     print("Installez-la avec: pip install python-docx")
     sys.exit(1)
 
-try:
-    from reportlab.lib.pagesizes import letter
-    from reportlab.pdfgen import canvas
-except ImportError:
-    print("Avertissement: La bibliothèque reportlab n'est pas installée.")
-    print("Le PDF généré sera de qualité basique.")
-    print("Installez-la avec: pip install reportlab")
-
-
 def print_progress(message, percent, step=""):
     """Affiche l'avancement du traitement dans le terminal"""
     bar_length = 40
@@ -63,50 +62,60 @@ def print_progress(message, percent, step=""):
         sys.stdout.write("\n")
 
 
-def extract_doc_files(zip_path, extract_dir):
-    """Extract all .doc and .docx files from a zip file"""
+def _extraction_plan(zip_ref):
+    """
+    List the .doc and .docx entries of an open zip file, sorted by file name,
+    with the flattened name each one is extracted to. Two entries with the
+    same name (ignoring the extension, since a .doc becomes a .docx once
+    converted) get distinct names so that no file overwrites another.
+    """
+    entries = [f for f in zip_ref.namelist()
+               if not f.endswith('/') and f.lower().endswith(('.doc', '.docx'))]
+    entries.sort(key=os.path.basename)
+    
+    plan = []
+    used_names = set()
+    for entry in entries:
+        name, ext = os.path.splitext(os.path.basename(entry))
+        unique_name = name
+        suffix = 2
+        while unique_name.lower() in used_names:
+            unique_name = f"{name} ({suffix})"
+            suffix += 1
+        used_names.add(unique_name.lower())
+        plan.append((entry, unique_name + ext))
+    return plan
+
+
+def list_doc_files(zip_path):
+    """Return the names of the .doc/.docx files of a zip file once extracted, in merge order"""
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        return [file_name for _, file_name in _extraction_plan(zip_ref)]
+
+
+def iter_doc_files(zip_path, extract_dir):
+    """
+    Extract the .doc and .docx files of a zip file one by one, in merge
+    order, yielding the path of each file as soon as it is written
+    """
     # Ensure extract directory exists
     os.makedirs(extract_dir, exist_ok=True)
     
-    # Open and extract files
     with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-        all_files = zip_ref.namelist()
-        doc_files = [f for f in all_files if f.lower().endswith(('.doc', '.docx'))]
-        
-        if not doc_files:
-            print("Aucun fichier DOC/DOCX trouvé dans l'archive.")
-            return []
-        
-        # Extract only .doc and .docx files
-        for i, file_path in enumerate(doc_files):
-            # Extract file
-            zip_ref.extract(file_path, path=extract_dir)
-            
-            # Get just the filename without directory structure
-            file_name = os.path.basename(file_path)
-            
-            # If the file was in a subdirectory, move it to the extract_dir
-            extracted_path = os.path.join(extract_dir, file_path)
-            if os.path.dirname(extracted_path) != extract_dir:
-                target_path = os.path.join(extract_dir, file_name)
-                os.makedirs(os.path.dirname(target_path), exist_ok=True)
-                shutil.move(extracted_path, target_path)
-                
-                # Clean up empty directories
-                dir_path = os.path.dirname(extracted_path)
-                while dir_path != extract_dir:
-                    try:
-                        os.rmdir(dir_path)
-                        dir_path = os.path.dirname(dir_path)
-                    except OSError:
-                        break
-
-    # Get all extracted files
-    extracted_files = []
-    for root, _, files in os.walk(extract_dir):
-        for file in files:
-            if file.lower().endswith(('.doc', '.docx')):
-                extracted_files.append(os.path.join(root, file))
+        for entry, file_name in _extraction_plan(zip_ref):
+            # Flatten the directory structure of the archive
+            dest_path = os.path.join(extract_dir, file_name)
+            with zip_ref.open(entry) as source, open(dest_path, 'wb') as dest:
+                shutil.copyfileobj(source, dest)
+            yield dest_path
+
+
+def extract_doc_files(zip_path, extract_dir):
+    """Extract all .doc and .docx files from a zip file"""
+    extracted_files = list(iter_doc_files(zip_path, extract_dir))
+    
+    if not extracted_files:
+        print("Aucun fichier DOC/DOCX trouvé dans l'archive.")
     
     return extracted_files
 
@@ -115,8 +124,8 @@ def convert_doc_to_docx(doc_path, output_dir):
     """
     Convert a .doc file to .docx format
     
-    This function attempts to use LibreOffice for conversion if available,
-    falling back to a basic document creation method if not
+    This function uses the converters detected at startup (LibreOffice if
+    available), falling back to a basic document creation method if not
     """
     # Skip if already a .docx file
     if doc_path.lower().endswith('.docx'):
@@ -126,36 +135,19 @@ def convert_doc_to_docx(doc_path, output_dir):
     docx_filename = os.path.basename(doc_path).rsplit('.', 1)[0] + '.docx'
     docx_path = os.path.join(output_dir, docx_filename)
     
-    # Try to use LibreOffice for conversion
-    try:
-        # Create a temporary directory
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Construct LibreOffice command
-            command = [
-                'libreoffice', '--headless', '--convert-to', 'docx',
-                '--outdir', temp_dir, doc_path
-            ]
-            
-            # Run LibreOffice conversion
-            result = subprocess.run(command, capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                # Get the output file
-                converted_file = os.path.join(temp_dir, docx_filename)
-                
-                # If conversion successful, move to the target location
-                if os.path.exists(converted_file):
-                    shutil.move(converted_file, docx_path)
-                    return docx_path
-    except (subprocess.SubprocessError, FileNotFoundError):
-        # LibreOffice not available or conversion failed
-        pass
+    # Use the converters detected at startup (python-docx, LibreOffice)
+    result, _ = convert(TASK_DOC_TO_DOCX, doc_path, docx_path)
+    if result:
+        return result
     
     # Fallback: Create a new document with basic content
-    print(f"\nAvertissement: Impossible de convertir {doc_path} avec LibreOffice.")
+    print(f"\nAvertissement: Impossible de convertir {doc_path} (LibreOffice indisponible ou en échec).")
     print("Création d'un document DOCX basique à la place.")
-    
-    # Create a basic DOCX file
+    return write_placeholder_docx(doc_path, docx_path)
+
+
+def write_placeholder_docx(doc_path, docx_path):
+    """Create a basic .docx describing a .doc file that could not be converted"""
     doc = Document()
     doc.add_heading(f"Document converti: {os.path.basename(doc_path)}", 0)
     doc.add_paragraph("Ce document a été créé car la conversion automatique du fichier DOC original a échoué.")
@@ -181,22 +173,8 @@ def merge_docx_files(docx_files, output_path):
     if not docx_files:
         print("Aucun fichier DOCX à fusionner.")
         return None
-
-    # Ensure output directory exists
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
     
-    # Create a new document
-    merged_doc = Document()
-    merged_doc.add_heading('Documents Fusionnés', 0)
-    
-    # Add table of contents
-    merged_doc.add_heading('Table des matières', level=1)
-    for i, doc_path in enumerate(docx_files, 1):
-        filename = os.path.basename(doc_path)
-        toc_para = merged_doc.add_paragraph(f"{i}. ")
-        toc_para.add_run(filename).bold = True
-    
-    merged_doc.add_page_break()
+    merged_doc = new_merged_document([os.path.basename(f) for f in docx_files])
     
     # Define progress tracking
     total_files = len(docx_files)
@@ -207,30 +185,68 @@ def merge_docx_files(docx_files, output_path):
         percent = (i / total_files) * 100
         print_progress("Fusion des documents", percent, f"{i+1}/{total_files}")
         
-        try:
-            # Document header
-            filename = os.path.basename(doc_path)
-            merged_doc.add_heading(f"Document {i+1}: {filename}", level=1)
-            
-            # Open the document to merge
-            src_doc = Document(doc_path)
-            
-            # Copy all elements from the source document
-            for element in src_doc.element.body:
-                merged_doc.element.body.append(element)
-            
-            # Add a page break after each document except the last one
-            if i < len(docx_files) - 1:
-                merged_doc.add_page_break()
-                
-        except Exception as e:
-            print(f"\nErreur lors de la fusion du document {doc_path}: {str(e)}")
-            # Continue with the next document
+        append_document(merged_doc, doc_path, i, total_files)
     
     # Final progress update
     print_progress("Fusion des documents", 100, f"{total_files}/{total_files}")
     
-    # Save the merged document
+    return save_merged_document(merged_doc, output_path)
+
+
+def new_merged_document(file_names, toc=True):
+    """Create the merged document: title, then table of contents and page break (if toc)"""
+    merged_doc = Document()
+    merged_doc.add_heading('Documents Fusionnés', 0)
+    
+    if toc:
+        add_table_of_contents(merged_doc, file_names)
+    return merged_doc
+
+
+def add_table_of_contents(merged_doc, file_names):
+    """Insert the table of contents and a page break right after the title"""
+    paragraphs = [merged_doc.add_heading('Table des matières', level=1)]
+    for i, filename in enumerate(file_names, 1):
+        toc_para = merged_doc.add_paragraph(f"{i}. ")
+        toc_para.add_run(filename).bold = True
+        paragraphs.append(toc_para)
+    paragraphs.append(merged_doc.add_page_break())
+    
+    # Paragraphs are appended at the end of the body: move them after the title
+    previous = merged_doc.paragraphs[0]._p
+    for paragraph in paragraphs:
+        previous.addnext(paragraph._p)
+        previous = paragraph._p
+
+
+def append_document(merged_doc, doc_path, i, total_files):
+    """Append document number i (0-based) of total_files to the merged document"""
+    try:
+        # Document header
+        filename = os.path.basename(doc_path)
+        merged_doc.add_heading(f"Document {i+1}: {filename}", level=1)
+        
+        # Open the document to merge
+        src_doc = Document(doc_path)
+        
+        # Copy all elements from the source document
+        for element in src_doc.element.body:
+            merged_doc.element.body.append(element)
+        
+        # Add a page break after each document except the last one
+        if i < total_files - 1:
+            merged_doc.add_page_break()
+            
+    except Exception as e:
+        print(f"\nErreur lors de la fusion du document {doc_path}: {str(e)}")
+        # Continue with the next document
+
+
+def save_merged_document(merged_doc, output_path):
+    """Save the merged document, returning its path or None on failure"""
+    # Ensure output directory exists
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    
     try:
         merged_doc.save(output_path)
         return output_path
@@ -239,116 +255,68 @@ def merge_docx_files(docx_files, output_path):
         return None
 
 
-def convert_docx_to_pdf(docx_path, pdf_path):
+def convert_docx_to_pdf(docx_path, pdf_path, source_files=None, fidelity_floor=None):
     """
     Convert a .docx file to .pdf format
     
-    This function attempts multiple methods to convert the document:
+    When source_files holds several documents, they are rendered in parallel
+    and concatenated with one bookmark per document. Otherwise (or if that
+    fails) the merged document is converted with the converters detected at
+    startup, in order:
     1. libreoffice (if available)
     2. docx2pdf library (if installed)
-    3. Basic fallback message if conversion is not possible
+    3. Built-in streaming renderer (reportlab)
+    
+    docx_path may be None when only the PDF is requested: the source files
+    are then merged into a temporary document only if they cannot be
+    rendered in parallel.
+    
+    fidelity_floor overrides the converters' fidelity floor (0 picks the
+    fastest converter, see deadline.FAST_PDF_FIDELITY).
     """
     # Ensure the output directory exists
     os.makedirs(os.path.dirname(pdf_path), exist_ok=True)
     
-    # Try Method 1: LibreOffice
-    try:
-        with tempfile.TemporaryDirectory() as temp_dir:
-            command = [
-                'libreoffice', '--headless', '--convert-to', 'pdf',
-                '--outdir', temp_dir, docx_path
-            ]
-            
-            # Run the conversion
-            print("Conversion PDF via LibreOffice...")
-            result = subprocess.run(command, capture_output=True, text=True)
-            
-            if result.returncode == 0:
-                # Get the output file name
-                pdf_filename = os.path.basename(docx_path).rsplit('.', 1)[0] + '.pdf'
-                temp_pdf = os.path.join(temp_dir, pdf_filename)
-                
-                # Move to the target location if successful
-                if os.path.exists(temp_pdf):
-                    shutil.move(temp_pdf, pdf_path)
-                    return pdf_path
-    except (subprocess.SubprocessError, FileNotFoundError):
-        # LibreOffice not available
-        pass
-    
-    # Try Method 2: docx2pdf library
-    try:
-        import docx2pdf
-        print("Conversion PDF via docx2pdf...")
-        docx2pdf.convert(docx_path, pdf_path)
-        
-        if os.path.exists(pdf_path):
+    # Render the source documents in parallel, then concatenate them
+    if source_files and len(source_files) > 1:
+        print(f"Rendu PDF parallèle de {len(source_files)} documents...")
+        if render_pdf_parallel(source_files, pdf_path, fidelity_floor=fidelity_floor):
             return pdf_path
-    except ImportError:
-        # docx2pdf not available
-        pass
-    except Exception as e:
-        print(f"Erreur lors de la conversion avec docx2pdf: {str(e)}")
     
-    # Method 3: Basic PDF with reportlab
-    try:
-        # Open the Word document
-        doc = Document(docx_path)
-        
-        # Create a PDF
-        c = canvas.Canvas(pdf_path, pagesize=letter)
-        width, height = letter
-        
-        # Extract and write text
-        c.setFont("Helvetica", 16)
-        c.drawString(72, height - 72, "Document converti en PDF")
-        
-        c.setFont("Helvetica", 12)
-        c.drawString(72, height - 100, "Ce PDF contient uniquement le texte extrait du document DOCX.")
-        c.drawString(72, height - 120, "Pour un PDF complet avec mise en forme, installez LibreOffice.")
-        
-        y_position = height - 160
-        c.setFont("Helvetica", 10)
-        
-        # Add paragraphs
-        for para in doc.paragraphs:
-            if para.text:
-                # Wrap text to fit page width
-                text = para.text
-                while text and y_position > 72:
-                    if len(text) > 80:  # Simple text wrapping
-                        wrapped_text = text[:80]
-                        text = text[80:]
-                    else:
-                        wrapped_text = text
-                        text = ""
-                    
-                    c.drawString(72, y_position, wrapped_text)
-                    y_position -= 15
-                
-                # Add extra space between paragraphs
-                y_position -= 5
-            
-            # Start a new page if needed
-            if y_position < 72:
-                c.showPage()
-                y_position = height - 72
-                c.setFont("Helvetica", 10)
-        
-        # Save the PDF
-        c.save()
-        print("PDF basique créé avec ReportLab.")
-        return pdf_path
-        
-    except Exception as e:
-        print(f"Erreur lors de la création du PDF basique: {str(e)}")
+    # No merged document (PDF only): convert the single source, or merge the
+    # sources into a temporary document
+    if not docx_path:
+        if not source_files:
+            return None
+        if len(source_files) == 1:
+            return convert_docx_to_pdf(source_files[0], pdf_path, fidelity_floor=fidelity_floor)
+        fd, temp_docx = tempfile.mkstemp(suffix='.docx', dir=os.path.dirname(os.path.abspath(pdf_path)))
+        os.close(fd)
+        try:
+            if not merge_docx_files(source_files, temp_docx):
+                return None
+            return convert_docx_to_pdf(temp_docx, pdf_path, fidelity_floor=fidelity_floor)
+        finally:
+            os.remove(temp_docx)
+    
+    # Use the converter with the best expected cost for this document
+    candidates = get_registry().candidates(TASK_DOCX_TO_PDF, docx_path, fidelity_floor)
+    if candidates:
+        print(f"Conversion PDF via {candidates[0].name}...")
+    
+    result, backend_name = convert(TASK_DOCX_TO_PDF, docx_path, pdf_path, fidelity_floor)
+    if result:
+        if backend_name == 'reportlab':
+            print("PDF créé avec le moteur de rendu intégré (ReportLab).")
+        return result
     
     # If all methods failed
     print("Impossible de convertir le document en PDF.")
     return None
 
 
-def process_zip_file(zip_path, output_dir, show_progress=True):
+def process_zip_file(zip_path, output_dir, show_progress=True, outputs=None,
+                     intermediates=INTERMEDIATES_KEEP, deadline=None):
     """
     Process a zip file containing .doc/.docx files:
     1. Extract all .doc and .docx files
@@ -356,8 +324,60 @@ def process_zip_file(zip_path, output_dir, show_progress=True):
     3. Merge all into a single .docx
     4. Convert the merged file to PDF
     
-    Returns a tuple of (docx_path, pdf_path) with the paths to the generated files
+    Steps 1 to 3 run as a streaming pipeline: each document is converted as
+    soon as it is extracted and merged as soon as it is ready.
+    
+    outputs lists the files to produce ('docx', 'pdf', default both): step 3
+    only runs if the .docx is requested, step 4 only if the PDF is. The
+    extracted files are then kept or deleted according to intermediates
+    ('keep', 'delete' or 'on_error').
+    
+    deadline is an optional deadline.Deadline: when time runs short, the
+    table of contents is left out, step 4 switches to the fastest converter
+    or is skipped (the .docx is delivered alone). The degradations applied
+    are listed in deadline.degradations.
+    
+    Returns a tuple of (docx_path, pdf_path) with the paths to the generated
+    files (None for an output that was not requested or could not be made).
+    If the current job is cancelled (see cancellation.cancel_scope), the
+    partial outputs are deleted and JobCancelled is raised.
     """
+    outputs = parse_outputs(outputs)
+    intermediates = parse_intermediates(intermediates)
+    
+    try:
+        # With a deadline, always use the cheapest converter
+        with without_exploration() if deadline else nullcontext():
+            docx_path, pdf_path = _process_zip_file(zip_path, output_dir, show_progress, outputs, deadline)
+    except JobCancelled:
+        remove_partial_outputs(output_dir)
+        raise
+    
+    # Extracted and converted documents are no longer needed once the outputs exist
+    success = all(path for output, path in ((OUTPUT_DOCX, docx_path), (OUTPUT_PDF, pdf_path))
+                  if output in delivered_outputs(outputs, deadline))
+    if should_delete_intermediates(intermediates, success):
+        shutil.rmtree(os.path.join(output_dir, "extracted"), ignore_errors=True)
+    return docx_path, pdf_path
+
+
+def remove_partial_outputs(output_dir):
+    """Delete the files written by process_zip_file in output_dir"""
+    shutil.rmtree(os.path.join(output_dir, "extracted"), ignore_errors=True)
+    for name in ("merged.docx", "merged.pdf"):
+        path = os.path.join(output_dir, name)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def delivered_outputs(outputs, deadline=None):
+    """Outputs a job is expected to deliver, once the deadline degradations are applied"""
+    if deadline and DEGRADE_DOCX_ONLY in deadline.degradations:
+        return [output for output in outputs if output != OUTPUT_PDF]
+    return outputs
+
+
+def _process_zip_file(zip_path, output_dir, show_progress, outputs, deadline):
     # Create output directories
     os.makedirs(output_dir, exist_ok=True)
     extract_dir = os.path.join(output_dir, "extracted")
@@ -371,79 +391,100 @@ def process_zip_file(zip_path, output_dir, show_progress=True):
     if show_progress:
         print(f"Traitement du fichier ZIP: {os.path.basename(zip_path)}")
     
-    # Step 1: Extract files
-    if show_progress:
-        print("Étape 1: Extraction des fichiers...")
-    extracted_files = extract_doc_files(zip_path, extract_dir)
+    # Steps 1 to 3: extract, convert and merge the documents as a stream
+    file_names = list_doc_files(zip_path)
     
-    if not extracted_files:
+    if not file_names:
         print("Aucun fichier DOC/DOCX trouvé dans l'archive.")
         return None, None
     
+    total_files = len(file_names)
     if show_progress:
-        print(f"  ✓ {len(extracted_files)} fichiers extraits")
-    
-    # Step 2: Convert .doc to .docx if needed
-    if show_progress:
-        print("Étape 2: Conversion des fichiers DOC en DOCX...")
-    
+        print(f"Étapes 1 à 3: Extraction, conversion et fusion de {total_files} documents...")
+    
+    # Documents converted from .doc are merged under their .docx name
+    build_docx = OUTPUT_DOCX in outputs
+    merged_doc = None
+    toc_names = [os.path.splitext(name)[0] + '.docx' for name in file_names]
+    if build_docx:
+        # With a deadline, the table of contents is added last, if time remains
+        merged_doc = new_merged_document(toc_names, toc=not deadline)
     docx_files = []
-    doc_files = [f for f in extracted_files if f.lower().endswith('.doc')]
-    
-    if doc_files:
-        if show_progress:
-            print(f"  Conversion de {len(doc_files)} fichiers DOC...")
-        
-        for i, doc_path in enumerate(doc_files):
-            if show_progress:
-                percent = ((i + 1) / len(doc_files)) * 100
-                print_progress("Conversion DOC vers DOCX", percent, f"{i+1}/{len(doc_files)}")
-            
-            docx_path = convert_doc_to_docx(doc_path, extract_dir)
-            docx_files.append(docx_path)
     
-    # Add already .docx files
-    docx_files.extend([f for f in extracted_files if f.lower().endswith('.docx')])
+    def convert_file(file_path):
+        # Convert .doc to .docx if needed
+        return convert_doc_to_docx(file_path, extract_dir)
     
-    # Sort files by name for consistent ordering
-    docx_files.sort()
-    
-    if show_progress:
-        print(f"  ✓ {len(docx_files)} fichiers DOCX prêts pour la fusion")
-    
-    # Step 3: Merge all .docx files
-    if show_progress:
-        print("Étape 3: Fusion des documents...")
+    def merge_file(i, file_path, docx_path):
+        if docx_path:
+            if build_docx:
+                append_document(merged_doc, docx_path, i, total_files)
+            docx_files.append(docx_path)
+        if show_progress:
+            percent = ((i + 1) / total_files) * 100
+            print_progress("Traitement des documents", percent, f"{i+1}/{total_files}")
     
-    merged_docx = merge_docx_files(docx_files, docx_output)
+    run_pipeline(iter_doc_files(zip_path, extract_dir), convert_file, merge_file)
     
-    if not merged_docx:
+    if not docx_files:
         print("Erreur lors de la fusion des documents.")
         return None, None
     
-    if show_progress:
-        print(f"  ✓ Document fusionné créé: {os.path.basename(merged_docx)}")
-    
-    # Step 4: Convert to PDF
-    if show_progress:
-        print("Étape 4: Conversion en PDF...")
-    
-    pdf_path = convert_docx_to_pdf(merged_docx, pdf_output)
-    
-    if pdf_path:
+    merged_docx = None
+    if build_docx:
         if show_progress:
-            print(f"  ✓ PDF créé: {os.path.basename(pdf_path)}")
-    else:
+            print(f"  ✓ {len(docx_files)} documents fusionnés")
+        
+        if deadline:
+            if deadline.expired:
+                deadline.degrade(DEGRADE_NO_TOC)
+            else:
+                add_table_of_contents(merged_doc, toc_names)
+        
+        merged_docx = save_merged_document(merged_doc, docx_output)
+        
+        if not merged_docx:
+            print("Erreur lors de la fusion des documents.")
+            return None, None
+        
         if show_progress:
-            print("  ✗ Échec de la conversion en PDF")
+            print(f"  ✓ Document fusionné créé: {os.path.basename(merged_docx)}")
+    
+    # Step 4: Convert to PDF (only if requested)
+    pdf_path = None
+    if OUTPUT_PDF in outputs:
+        if show_progress:
+            print("Étape 4: Conversion en PDF...")
+        
+        if deadline:
+            # Best effort before the deadline: fastest converter, or .docx alone
+            pdf_path = deadline.render_pdf(
+                lambda fidelity_floor: convert_docx_to_pdf(merged_docx, pdf_output, docx_files, fidelity_floor),
+                docx_files, pdf_output, required=not build_docx)
+        else:
+            pdf_path = convert_docx_to_pdf(merged_docx, pdf_output, source_files=docx_files)
+        
+        if pdf_path:
+            if show_progress:
+                print(f"  ✓ PDF créé: {os.path.basename(pdf_path)}")
+        elif DEGRADE_DOCX_ONLY in getattr(deadline, 'degradations', ()):
+            if show_progress:
+                print("  - PDF abandonné pour respecter le délai")
+        else:
+            if show_progress:
+                print("  ✗ Échec de la conversion en PDF")
     
     # Summary
     if show_progress:
         print("\nTraitement terminé!")
         print(f"Documents traités: {len(docx_files)}")
-        print(f"Document DOCX fusionné: {merged_docx}")
+        if merged_docx:
+            print(f"Document DOCX fusionné: {merged_docx}")
         if pdf_path:
             print(f"Document PDF: {pdf_path}")
+        if deadline and deadline.degradations:
+            print("Dégradations appliquées pour respecter le délai: " +
+                  ", ".join(DEGRADATION_LABELS[d] for d in deadline.degradations))
     
     return merged_docx, pdf_path
 
@@ -460,34 +501,61 @@ def main():
                         help="Dossier de sortie pour les fichiers générés (par défaut: ./output)")
     parser.add_argument("-q", "--quiet", action="store_true", 
                         help="Mode silencieux (pas d'affichage des barres de progression)")
+    parser.add_argument("--outputs", default="docx,pdf",
+                        help="Fichiers à produire : docx, pdf ou docx,pdf (par défaut: docx,pdf)")
+    parser.add_argument("--intermediates", default=INTERMEDIATES_KEEP, choices=INTERMEDIATES_POLICIES,
+                        help="Conservation des fichiers extraits : keep, delete ou on_error "
+                             "(par défaut: keep)")
+    parser.add_argument("--deadline", metavar="SECONDES",
+                        help="Délai de traitement : au-delà, le traitement passe à des stratégies "
+                             "moins coûteuses (PDF rapide, sans table des matières, DOCX seul)")
     
     args = parser.parse_args()
     
+    try:
+        outputs = parse_outputs(args.outputs)
+        deadline_seconds = parse_deadline(args.deadline)
+    except ValueError as e:
+        parser.error(str(e))
+    
     # Vérifier que le fichier ZIP existe
     if not os.path.isfile(args.zip_file):
         print(f"Erreur: Le fichier {args.zip_file} n'existe pas.")
         return 1
     
-    # Traiter le fichier
+    # Traiter le fichier ; Ctrl+C ou SIGTERM annule proprement le traitement
     start_time = time.time()
+    deadline = Deadline.after(deadline_seconds)
+    token = CancelToken()
+    install_signal_handlers(token)
     
     try:
-        docx_path, pdf_path = process_zip_file(
-            args.zip_file, 
-            args.output_dir,
-            show_progress=not args.quiet
-        )
+        with cancel_scope(token):
+            docx_path, pdf_path = process_zip_file(
+                args.zip_file, 
+                args.output_dir,
+                show_progress=not args.quiet,
+                outputs=outputs,
+                intermediates=args.intermediates,
+                deadline=deadline
+            )
         
         processing_time = time.time() - start_time
         
         if not args.quiet:
             print(f"\nTemps de traitement: {processing_time:.2f} secondes")
         
-        if docx_path and pdf_path:
+        # Every requested output must have been produced (unless given up for the deadline)
+        produced = {OUTPUT_DOCX: docx_path, OUTPUT_PDF: pdf_path}
+        if all(produced[output] for output in delivered_outputs(outputs, deadline)):
             return 0
         else:
             return 1
     
+    except JobCancelled:
+        print("\nTraitement annulé. Les fichiers partiels ont été supprimés.")
+        return 130
+    
     except Exception as e:
         print(f"Erreur: {str(e)}")
         return 1
@@ -13,10 +13,15 @@ import time
 import argparse
 import glob
 from pathlib import Path
-from docx_files_merger import process_zip_file
+from docx_files_merger import process_zip_file, delivered_outputs
+from job_outputs import (OUTPUT_DOCX, OUTPUT_PDF, INTERMEDIATES_KEEP, INTERMEDIATES_POLICIES,
+                         parse_outputs)
+from cancellation import CancelToken, JobCancelled, cancel_scope, install_signal_handlers
+from deadline import Deadline, DEGRADATION_LABELS, parse_deadline
 
 
-def traiter_fichier(chemin_zip, dossier_sortie, silencieux=False):
+def traiter_fichier(chemin_zip, dossier_sortie, silencieux=False, sorties=None,
+                    intermediaires=INTERMEDIATES_KEEP, delai=None):
     """
     Traite un fichier ZIP pour extraire, fusionner et convertir son contenu.
     
@@ -24,6 +29,9 @@ def traiter_fichier(chemin_zip, dossier_sortie, silencieux=False):
         chemin_zip: Chemin vers le fichier ZIP à traiter
         dossier_sortie: Dossier où stocker les résultats
         silencieux: Mode silencieux (sans affichage de progression)
+        sorties: Fichiers à produire ('docx', 'pdf'), tous par défaut
+        intermediaires: Conservation des fichiers extraits (keep, delete, on_error)
+        delai: Délai de traitement en secondes (mode dégradé au-delà), aucun par défaut
         
     Returns:
         Un dictionnaire avec le résultat du traitement
@@ -47,24 +55,37 @@ def traiter_fichier(chemin_zip, dossier_sortie, silencieux=False):
     
     # Mesurer le temps de traitement
     debut = time.time()
+    echeance = Deadline.after(delai)
     
     try:
         # Traiter le fichier
+        sorties = parse_outputs(sorties)
         docx_path, pdf_path = process_zip_file(
             chemin_zip, 
             dossier_sortie,
-            show_progress=(not silencieux)
+            show_progress=(not silencieux),
+            outputs=sorties,
+            intermediates=intermediaires,
+            deadline=echeance
         )
         
         temps_total = time.time() - debut
+        degradations = list(echeance.degradations) if echeance else []
         
-        if docx_path and pdf_path:
+        # Toutes les sorties demandées doivent avoir été produites (sauf le PDF
+        # abandonné pour respecter le délai)
+        produits = {OUTPUT_DOCX: docx_path, OUTPUT_PDF: pdf_path}
+        if all(produits[sortie] for sortie in delivered_outputs(sorties, echeance)):
+            message = f"Traitement réussi en {temps_total:.2f} secondes."
+            if degradations:
+                message += " Mode dégradé: " + ", ".join(DEGRADATION_LABELS[d] for d in degradations) + "."
             return {
                 "statut": "succès",
                 "temps": temps_total,
                 "docx": docx_path,
                 "pdf": pdf_path,
-                "message": f"Traitement réussi en {temps_total:.2f} secondes."
+                "degradations": degradations,
+                "message": message
             }
         else:
             return {
@@ -72,9 +93,14 @@ def traiter_fichier(chemin_zip, dossier_sortie, silencieux=False):
                 "temps": temps_total,
                 "docx": docx_path,
                 "pdf": pdf_path,
+                "degradations": degradations,
                 "message": "Traitement partiel (certains fichiers n'ont pas pu être générés)."
             }
     
+    except JobCancelled:
+        # Arrêter aussi le traitement des fichiers suivants
+        raise
+    
     except Exception as e:
         temps_total = time.time() - debut
         return {
@@ -86,7 +112,8 @@ def traiter_fichier(chemin_zip, dossier_sortie, silencieux=False):
         }
 
 
-def traiter_dossier(dossier_zip, dossier_sortie, silencieux=False):
+def traiter_dossier(dossier_zip, dossier_sortie, silencieux=False, sorties=None,
+                    intermediaires=INTERMEDIATES_KEEP, delai=None):
     """
     Traite tous les fichiers ZIP d'un dossier.
     
@@ -94,6 +121,9 @@ def traiter_dossier(dossier_zip, dossier_sortie, silencieux=False):
         dossier_zip: Chemin vers le dossier contenant les fichiers ZIP
         dossier_sortie: Dossier où stocker les résultats
         silencieux: Mode silencieux (sans affichage de progression)
+        sorties: Fichiers à produire ('docx', 'pdf'), tous par défaut
+        intermediaires: Conservation des fichiers extraits (keep, delete, on_error)
+        delai: Délai de traitement de chaque fichier en secondes, aucun par défaut
         
     Returns:
         Une liste de dictionnaires contenant les résultats du traitement
@@ -125,7 +155,7 @@ def traiter_dossier(dossier_zip, dossier_sortie, silencieux=False):
         dossier_resultat = os.path.join(dossier_sortie, nom_base)
         
         # Traiter le fichier
-        resultat = traiter_fichier(zip_path, dossier_resultat, silencieux)
+        resultat = traiter_fichier(zip_path, dossier_resultat, silencieux, sorties, intermediaires, delai)
         resultat["fichier"] = zip_path
         resultats.append(resultat)
         
@@ -166,20 +196,51 @@ def main():
     parser.add_argument("-q", "--quiet", action="store_true",
                         help="Mode silencieux (sans affichage de progression)")
     parser.add_argument("-r", "--rapport", help="Générer un rapport CSV des résultats")
+    parser.add_argument("--sorties", default="docx,pdf",
+                        help="Fichiers à produire : docx, pdf ou docx,pdf (par défaut: docx,pdf)")
+    parser.add_argument("--intermediaires", default=INTERMEDIATES_KEEP, choices=INTERMEDIATES_POLICIES,
+                        help="Conservation des fichiers extraits : keep, delete ou on_error "
+                             "(par défaut: keep)")
+    parser.add_argument("--delai", metavar="SECONDES",
+                        help="Délai de traitement de chaque fichier : au-delà, le traitement passe à "
+                             "des stratégies moins coûteuses (PDF rapide, sans table des matières, DOCX seul)")
     
     # Parser les arguments
     args = parser.parse_args()
     
+    try:
+        args.sorties = parse_outputs(args.sorties)
+        args.delai = parse_deadline(args.delai)
+    except ValueError as e:
+        parser.error(str(e))
+    
+    # Ctrl+C ou SIGTERM annule proprement le traitement en cours
+    token = CancelToken()
+    install_signal_handlers(token)
+    
+    try:
+        with cancel_scope(token):
+            return executer(args)
+    except JobCancelled:
+        print("\nTraitement annulé. Les fichiers partiels ont été supprimés.")
+        return 130
+
+
+def executer(args):
+    """Exécute le traitement demandé par les arguments de la ligne de commande"""
     # Traiter selon le mode d'entrée
     if args.fichier:
         # Traitement d'un seul fichier
-        resultat = traiter_fichier(args.fichier, args.output, args.quiet)
+        resultat = traiter_fichier(args.fichier, args.output, args.quiet, args.sorties,
+                                   args.intermediaires, args.delai)
         
         if not args.quiet:
             if resultat["statut"] == "succès":
                 print(f"\n✅ {resultat['message']}")
-                print(f"Document DOCX: {resultat['docx']}")
-                print(f"Document PDF: {resultat['pdf']}")
+                if resultat['docx']:
+                    print(f"Document DOCX: {resultat['docx']}")
+                if resultat['pdf']:
+                    print(f"Document PDF: {resultat['pdf']}")
             elif resultat["statut"] == "partiel":
                 print(f"\n⚠️ {resultat['message']}")
                 if resultat['docx']:
@@ -198,7 +259,8 @@ def main():
     
     else:
         # Traitement d'un dossier
-        resultats = traiter_dossier(args.dossier, args.output, args.quiet)
+        resultats = traiter_dossier(args.dossier, args.output, args.quiet, args.sorties,
+                                    args.intermediaires, args.delai)
         
         # Générer un rapport si demandé
         if args.rapport:
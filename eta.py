@@ -0,0 +1,261 @@
+"""
+DocxFilesMerger - Application de traitement et fusion de documents.
+Développé par MOA Digital Agency LLC (https://myoneart.com)
+Email: moa@myoneart.com
+Copyright © 2025 MOA Digital Agency LLC. Tous droits réservés.
+
+Estimation du temps restant des traitements.
+Chaque étape (extraction, conversion, fusion, PDF) a un modèle de débit,
+en documents par seconde et en octets par seconde, appris des durées
+d'étape des derniers jobs terminés (table stage_timings, jointe à
+ProcessingJob). Au démarrage d'un job, le modèle prédit la durée de chaque
+étape pour son volume ; pendant le traitement, la prédiction est corrigée
+par le débit observé dans le job lui-même. Le statut publié porte le temps
+restant estimé (eta_seconds), et l'écart entre durée prédite et durée
+réelle est enregistré pour chaque job terminé.
+"""
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+
+from job_outputs import STAGE_EXTRACT, STAGE_CONVERT, STAGE_MERGE, STAGE_PDF
+from database import get_db_app, db_session
+from models import ProcessingJob, StageTiming
+
+STAGES = (STAGE_EXTRACT, STAGE_CONVERT, STAGE_MERGE, STAGE_PDF)
+# Ligne de stage_timings portant la durée totale du job et sa prédiction
+STAGE_TOTAL = 'total'
+
+# Nombre de jobs terminés dont les durées d'étape alimentent les modèles
+ETA_HISTORY_JOBS = int(os.environ.get('ETA_HISTORY_JOBS', '50'))
+# Durée de validité du modèle chargé en base (secondes)
+ETA_MODEL_TTL = 60
+
+# Débits par défaut (documents/s, octets/s), tant qu'aucun job n'est terminé
+DEFAULT_RATES = {
+    STAGE_EXTRACT: (50.0, 50 * 1024 * 1024),
+    STAGE_CONVERT: (0.5, 256 * 1024),
+    STAGE_MERGE: (10.0, 2 * 1024 * 1024),
+    STAGE_PDF: (5.0, 1024 * 1024),
+}
+# Durée cumulée en dessous de laquelle les mesures d'une étape sont ignorées (secondes)
+MIN_SAMPLE_SECONDS = 0.5
+
+
+class StageSample:
+    """Durée mesurée d'une étape pour un volume de documents et d'octets (size)"""
+
+    def __init__(self, stage, documents, size, seconds, predicted_seconds=None):
+        self.stage = stage
+        self.documents = documents
+        self.size = size
+        self.seconds = seconds
+        self.predicted_seconds = predicted_seconds
+
+    def to_dict(self):
+        """Convertir l'objet en dictionnaire pour JSON"""
+        return {
+            'stage': self.stage,
+            'documents': self.documents,
+            'size': self.size,
+            'seconds': round(self.seconds, 3),
+            'predicted_seconds': (round(self.predicted_seconds, 3)
+                                  if self.predicted_seconds is not None else None)
+        }
+
+
+class ThroughputModel:
+    """Débits de chaque étape (documents/s, octets/s)"""
+
+    def __init__(self, rates=None, samples=0):
+        self.rates = dict(DEFAULT_RATES)
+        self.rates.update(rates or {})
+        self.learned = set(rates or {})
+        self.samples = samples
+
+    @classmethod
+    def from_samples(cls, samples):
+        """Débits moyens pondérés par la durée (sommes des volumes / somme des durées)"""
+        totals = {}
+        for sample in samples:
+            if sample.stage not in DEFAULT_RATES:
+                continue
+            documents, size, seconds = totals.get(sample.stage, (0, 0, 0.0))
+            totals[sample.stage] = (documents + sample.documents, size + sample.size,
+                                    seconds + sample.seconds)
+
+        rates = {}
+        for stage, (documents, size, seconds) in totals.items():
+            if seconds >= MIN_SAMPLE_SECONDS and documents and size:
+                rates[stage] = (documents / seconds, size / seconds)
+        return cls(rates, samples=len(samples))
+
+    def predict(self, stage, documents, size):
+        """
+        Durée prédite d'une étape (secondes) : moyenne des prédictions par
+        nombre de documents (coût fixe par document) et par volume (coût
+        proportionnel à la taille)
+        """
+        if not documents:
+            return 0.0
+        documents_per_second, bytes_per_second = self.rates[stage]
+        by_documents = documents / documents_per_second
+        if not size:
+            return by_documents
+        return (by_documents + size / bytes_per_second) / 2
+
+    def to_dict(self):
+        """Convertir l'objet en dictionnaire pour JSON"""
+        return {
+            'samples': self.samples,
+            'stages': [{
+                'stage': stage,
+                'documents_per_second': round(documents_per_second, 3),
+                'bytes_per_second': int(bytes_per_second),
+                'learned': stage in self.learned
+            } for stage, (documents_per_second, bytes_per_second) in self.rates.items()]
+        }
+
+
+class EtaTracker:
+    """
+    Prédiction et suivi de la durée d'un job. workload associe à chaque
+    étape exécutée son volume (documents, octets). L'extraction, la
+    conversion et la fusion se chevauchent (pipeline.run_pipeline) : leur
+    durée commune est celle de l'étape la plus lente, la conversion étant
+    répartie sur workers threads.
+    """
+
+    def __init__(self, model, workload, workers=1):
+        self.model = model
+        self.workload = dict(workload)
+        self.workers = max(1, workers)
+        self.predicted = {stage: model.predict(stage, *volume) for stage, volume in self.workload.items()}
+        self.predicted_total = self._pipeline_prediction() + self.predicted.get(STAGE_PDF, 0.0)
+
+        self.started = time.time()
+        self._busy = {}
+        self._volume = {}
+        self._phase_started = self.started
+        self._lock = threading.Lock()
+
+    def _pipeline_prediction(self):
+        return max([self.predicted.get(STAGE_EXTRACT, 0.0),
+                    self.predicted.get(STAGE_CONVERT, 0.0) / self.workers,
+                    self.predicted.get(STAGE_MERGE, 0.0)])
+
+    def weights(self):
+        """Part de la durée prédite de chaque étape, pour le pourcentage d'avancement"""
+        return {stage: max(seconds / (self.workers if stage == STAGE_CONVERT else 1), 1e-3)
+                for stage, seconds in self.predicted.items()}
+
+    @contextmanager
+    def timed(self, stage, documents=1, size=0):
+        """Compter la durée du bloc et son volume dans l'étape stage"""
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.record(stage, time.time() - start, documents, size)
+
+    def record(self, stage, seconds, documents, size):
+        """Ajouter seconds et le volume (documents, size) à l'étape stage"""
+        with self._lock:
+            self._busy[stage] = self._busy.get(stage, 0.0) + seconds
+            count, total = self._volume.get(stage, (0, 0))
+            self._volume[stage] = (count + documents, total + size)
+
+    def start_phase(self):
+        """Début d'une phase (pipeline ou PDF) : référence du débit observé"""
+        self._phase_started = time.time()
+
+    def eta(self, stage, fraction=0.0):
+        """
+        Temps restant estimé (secondes) quand stage est réalisée à fraction
+        (0 à 1). La prédiction du modèle est mélangée au débit observé dans
+        la phase en cours, d'autant plus que la phase est avancée.
+        """
+        fraction = min(max(fraction, 0.0), 1.0)
+        in_pipeline = stage != STAGE_PDF
+        predicted = self._pipeline_prediction() if in_pipeline else self.predicted.get(STAGE_PDF, 0.0)
+
+        remaining = predicted * (1 - fraction)
+        if fraction > 0:
+            observed = (time.time() - self._phase_started) / fraction * (1 - fraction)
+            remaining = (1 - fraction) * remaining + fraction * observed
+
+        if in_pipeline:
+            remaining += self.predicted.get(STAGE_PDF, 0.0)
+        return int(round(remaining))
+
+    def samples(self):
+        """Durées mesurées de chaque étape et du job entier, avec leurs prédictions"""
+        with self._lock:
+            samples = [StageSample(stage, documents, size, self._busy[stage], self.predicted.get(stage))
+                       for stage, (documents, size) in self._volume.items()]
+
+        documents, size = self.workload.get(STAGE_EXTRACT, (0, 0))
+        samples.append(StageSample(STAGE_TOTAL, documents, size, time.time() - self.started,
+                                   self.predicted_total))
+        return samples
+
+    def prediction_error(self):
+        """Écart relatif entre durée réelle et durée prédite du job (0.2 : 20 % plus long)"""
+        if not self.predicted_total:
+            return None
+        return round((time.time() - self.started - self.predicted_total) / self.predicted_total, 3)
+
+
+def prediction_error_stats(totals):
+    """
+    Erreur de prédiction sur des lignes STAGE_TOTAL (objets avec seconds et
+    predicted_seconds) : erreur relative absolue moyenne et biais moyen
+    """
+    errors = [(row.seconds - row.predicted_seconds) / row.predicted_seconds
+              for row in totals if row.predicted_seconds]
+    if not errors:
+        return {'samples': 0, 'mean_abs_error': None, 'mean_bias': None}
+    return {
+        'samples': len(errors),
+        'mean_abs_error': round(sum(abs(error) for error in errors) / len(errors), 3),
+        'mean_bias': round(sum(errors) / len(errors), 3)
+    }
+
+
+# Modèle chargé en base, partagé par le processus
+_model = None
+_model_loaded_at = 0.0
+_model_lock = threading.Lock()
+
+
+def load_throughput_model(history=ETA_HISTORY_JOBS):
+    """
+    Modèle de débit appris des history derniers jobs terminés, mis en cache
+    ETA_MODEL_TTL secondes. Sans base de données, les débits par défaut.
+    """
+    global _model, _model_loaded_at
+    with _model_lock:
+        if _model is not None and time.time() - _model_loaded_at < ETA_MODEL_TTL:
+            return _model
+
+        model = ThroughputModel()
+        if get_db_app() is not None:
+            try:
+                with db_session():
+                    rows = (StageTiming.query
+                            .join(ProcessingJob, ProcessingJob.job_id == StageTiming.job_id)
+                            .filter(ProcessingJob.status == 'completed')
+                            .filter(StageTiming.stage.in_(STAGES))
+                            .order_by(StageTiming.id.desc())
+                            .limit(history * len(STAGES))
+                            .all())
+                    model = ThroughputModel.from_samples(
+                        [StageSample(row.stage, row.documents, row.size, row.seconds) for row in rows])
+            except Exception as e:
+                print(f"Erreur lors du chargement des durées d'étape: {str(e)}")
+
+        _model = model
+        _model_loaded_at = time.time()
+        return model
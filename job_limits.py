@@ -0,0 +1,301 @@
+"""
+DocxFilesMerger - Application de traitement et fusion de documents.
+Développé par MOA Digital Agency LLC (https://myoneart.com)
+Email: moa@myoneart.com
+Copyright © 2025 MOA Digital Agency LLC. Tous droits réservés.
+
+Limites de ressources par traitement.
+Chaque job est exécuté dans un processus enfant dédié, soumis à une limite
+d'espace d'adressage (mémoire) et de temps CPU (setrlimit), tandis que le
+processus parent surveille l'espace disque occupé par son dossier de sortie.
+Un job qui dépasse une limite échoue seul, avec un message explicite : le
+worker gunicorn ou le service de traitement qui l'a lancé n'est pas affecté.
+Une valeur de 0 désactive la limite correspondante.
+Les statuts écrits par le job sont transmis au processus parent par un tube
+et republiés sur son bus d'événements (flux SSE). Le processus du job reçoit
+les convertisseurs détectés par son parent (sans nouvelle détection) et lui
+renvoie, par le même tube, les mesures de ses conversions (converter_stats).
+Il s'arrête avec son parent : un job orphelin ne peut pas écrire dans le
+dossier de sortie d'un job repris par un autre processus (job_store).
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import shutil
+import threading
+import subprocess
+
+from cancellation import JobCancelled, current_cancel_token, kill_process, kill_process_group
+from status_events import get_event_bus
+from config_cache import get_setting
+from converters import ConverterRegistry, get_registry, set_registry
+from converter_stats import load_converter_stats, save_converter_stats
+
+try:
+    import resource
+except ImportError:
+    # Pas de setrlimit hors Unix : seul le quota disque est appliqué
+    resource = None
+
+# Mémoire (Mo), temps CPU (secondes) et espace disque (Mo) maximum d'un job
+JOB_MEMORY_LIMIT_MB = int(os.environ.get('JOB_MEMORY_LIMIT_MB', '4096'))
+JOB_CPU_LIMIT_SECONDS = int(os.environ.get('JOB_CPU_LIMIT_SECONDS', '3600'))
+JOB_DISK_QUOTA_MB = int(os.environ.get('JOB_DISK_QUOTA_MB', '4096'))
+
+# Intervalle de vérification du quota disque et de l'annulation (secondes)
+CHECK_INTERVAL = 1.0
+
+# prctl : signal reçu par le processus enfant à la disparition de son parent (Linux)
+PR_SET_PDEATHSIG = 1
+
+# Codes de sortie du processus enfant
+EXIT_SUCCESS = 0
+EXIT_FAILURE = 1
+EXIT_MEMORY = 3
+
+
+class JobProcessError(Exception):
+    """Le processus d'un job s'est arrêté anormalement"""
+
+    status_text = 'Le processus de traitement s\'est arrêté brutalement.'
+
+
+class ResourceLimitExceeded(JobProcessError):
+    """Le job a dépassé une de ses limites de ressources"""
+
+    def __init__(self, resource_name, message):
+        super().__init__(message)
+        self.resource_name = resource_name
+        self.status_text = message
+
+
+def default_limits():
+    """Limites d'un job : réglages de l'administration, ou variables d'environnement"""
+    return {
+        'memory_mb': get_setting('job_memory_limit_mb', JOB_MEMORY_LIMIT_MB),
+        'cpu_seconds': get_setting('job_cpu_limit_seconds', JOB_CPU_LIMIT_SECONDS),
+        'disk_mb': get_setting('job_disk_quota_mb', JOB_DISK_QUOTA_MB)
+    }
+
+
+def apply_limits(limits):
+    """Appliquer au processus courant (et à ses enfants) les limites mémoire et CPU"""
+    if resource is None:
+        return
+    if limits.get('memory_mb'):
+        memory = limits['memory_mb'] * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    if limits.get('cpu_seconds'):
+        # SIGXCPU à la limite, SIGKILL peu après si le signal est ignoré
+        cpu = limits['cpu_seconds']
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 5))
+
+
+def directory_size(path):
+    """Taille totale (octets) des fichiers d'un dossier"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                # Fichier supprimé entre-temps
+                pass
+    return total
+
+
+def run_with_limits(func_name, args=(), kwargs=None, output_dir=None, limits=None):
+    """
+    Exécuter utils.<func_name>(*args, **kwargs) dans un processus enfant
+    soumis aux limites. Retourne le booléen renvoyé par la fonction ; lève
+    ResourceLimitExceeded ou JobProcessError si le processus a été arrêté,
+    JobCancelled si le traitement en cours a été annulé entre-temps.
+    """
+    limits = limits or default_limits()
+    # Convertisseurs détectés par ce processus, avec les mesures de tous les workers
+    registry = load_converter_stats(get_registry())
+    # Tube par lequel l'enfant transmet ses statuts au bus d'événements du parent
+    events_read, events_write = os.pipe()
+    request = json.dumps({
+        'func': func_name,
+        'args': list(args),
+        'kwargs': kwargs or {},
+        'limits': limits,
+        'events_fd': events_write,
+        'registry': registry.export_state(),
+        'parent_pid': os.getpid()
+    })
+
+    # Nouvelle session : le groupe (LibreOffice compris) peut être tué d'un coup
+    try:
+        process = subprocess.Popen([sys.executable, os.path.abspath(__file__)],
+                                   stdin=subprocess.PIPE, start_new_session=True,
+                                   pass_fds=(events_write,))
+    except Exception:
+        os.close(events_read)
+        raise
+    finally:
+        os.close(events_write)
+
+    def on_message(message):
+        # Mesures des conversions du job, ajoutées au registre de ce processus
+        registry.replay(message.get('converter_samples', []))
+
+    relay = get_event_bus().relay_from(events_read, on_message=on_message)
+    token = current_cancel_token()
+    if token is not None:
+        token.register_process(process)
+
+    quota = limits.get('disk_mb', 0) * 1024 * 1024
+    try:
+        process.stdin.write(request.encode('utf-8'))
+        process.stdin.close()
+
+        while True:
+            try:
+                process.wait(timeout=CHECK_INTERVAL)
+                break
+            except subprocess.TimeoutExpired:
+                pass
+            if token is not None and token.cancelled:
+                kill_process(process)
+                process.wait()
+                raise JobCancelled("Traitement annulé")
+            if quota and output_dir and directory_size(output_dir) > quota:
+                kill_process(process)
+                process.wait()
+                raise ResourceLimitExceeded(
+                    'disk', f"Quota disque du traitement dépassé ({limits['disk_mb']} Mo).")
+    finally:
+        if token is not None:
+            token.unregister_process(process)
+        # Derniers statuts et mesures transmis avant la fin du processus
+        relay.join(timeout=CHECK_INTERVAL)
+        save_converter_stats(registry)
+
+    returncode = process.returncode
+    if token is not None and token.cancelled:
+        raise JobCancelled("Traitement annulé")
+    if returncode in (EXIT_SUCCESS, EXIT_FAILURE):
+        return returncode == EXIT_SUCCESS
+    if returncode == EXIT_MEMORY:
+        raise ResourceLimitExceeded(
+            'memory', f"Limite de mémoire du traitement dépassée ({limits['memory_mb']} Mo).")
+    if returncode == -getattr(signal, 'SIGXCPU', 0):
+        raise ResourceLimitExceeded(
+            'cpu', f"Limite de temps de calcul du traitement dépassée ({limits['cpu_seconds']} s).")
+    if returncode == -signal.SIGKILL:
+        # Limite CPU stricte ou processus tué par le système faute de mémoire
+        raise ResourceLimitExceeded(
+            'killed', "Le traitement a été arrêté par le système (mémoire ou temps de calcul épuisés).")
+    raise JobProcessError(f"Processus de traitement terminé avec le code {returncode}")
+
+
+def run_job_with_limits(job_id, func_name, args=(), kwargs=None):
+    """
+    Exécuter un job (run_processing ou run_stored_job) dans un processus
+    soumis aux limites. Un dépassement de limite ou un arrêt brutal du
+    processus est enregistré comme une erreur du job ; une annulation
+    supprime ses fichiers partiels.
+    """
+    from utils import fail_job, finish_cancelled_job
+    from job_store import get_job_store
+
+    kwargs = kwargs or {}
+    # Dossiers du job, à partir de la file durable pour run_stored_job
+    if func_name == 'run_stored_job':
+        stored_job = get_job_store().get(job_id)
+        if stored_job is None:
+            print(f"Job {job_id} introuvable dans la file durable")
+            return False
+        job_args, job_kwargs = stored_job.args, stored_job.kwargs
+    else:
+        job_args, job_kwargs = args, kwargs
+    output_dir = job_args[1] if len(job_args) > 1 else job_kwargs.get('output_dir')
+    status_dir = job_kwargs.get('status_dir')
+
+    try:
+        return run_with_limits(func_name, args, kwargs, output_dir=output_dir)
+    except JobCancelled:
+        # Le processus enfant a été tué avant d'avoir pu nettoyer
+        finish_cancelled_job(output_dir, status_dir, job_id)
+        raise
+    except JobProcessError as e:
+        print(f"Job {job_id} interrompu: {str(e)}")
+        if getattr(e, 'resource_name', None) == 'disk' and output_dir:
+            # Libérer l'espace occupé par un job qui ne pourra pas aboutir
+            shutil.rmtree(output_dir, ignore_errors=True)
+        fail_job(job_id, status_dir, e.status_text, str(e))
+        if func_name == 'run_stored_job':
+            get_job_store().finish(job_id, success=False)
+        return False
+
+
+def run_stored_job_with_limits(job_id):
+    """run_stored_job exécuté dans un processus soumis aux limites"""
+    return run_job_with_limits(job_id, 'run_stored_job', (job_id,))
+
+
+def exit_with_parent(parent_pid):
+    """
+    Arrêter le processus courant et son groupe (LibreOffice compris) dès que
+    le processus parent parent_pid disparaît : PR_SET_PDEATHSIG sous Linux,
+    surveillance de getppid() ailleurs
+    """
+    def stop(signum=None, frame=None):
+        # Le processus enfant dirige sa session : son groupe porte son pid
+        kill_process_group(os.getpid())
+        os._exit(EXIT_FAILURE)
+
+    try:
+        import ctypes
+        libc = ctypes.CDLL(None, use_errno=True)
+        signal.signal(signal.SIGTERM, stop)
+        # Signal envoyé à la fin du thread parent, qui attend ce processus jusqu'au bout
+        if libc.prctl(PR_SET_PDEATHSIG, signal.SIGTERM) != 0:
+            raise OSError(ctypes.get_errno(), "prctl")
+    except (OSError, AttributeError):
+        def watch():
+            while True:
+                if os.getppid() != parent_pid:
+                    stop()
+                time.sleep(CHECK_INTERVAL)
+
+        watcher = threading.Thread(target=watch, name='parent-watch')
+        watcher.daemon = True
+        watcher.start()
+
+    # Parent arrêté avant la mise en place de la surveillance
+    if os.getppid() != parent_pid:
+        stop()
+
+
+def _child_main():
+    # Processus enfant : lire la demande, appliquer les limites puis exécuter le job
+    request = json.loads(sys.stdin.read())
+    if request.get('parent_pid'):
+        exit_with_parent(request['parent_pid'])
+    apply_limits(request['limits'])
+    if request.get('events_fd') is not None:
+        get_event_bus().forward_to(request['events_fd'])
+    if request.get('registry'):
+        set_registry(ConverterRegistry.from_state(request['registry']))
+
+    started = time.time()
+    try:
+        import utils
+        result = getattr(utils, request['func'])(*request['args'], **request['kwargs'])
+    except MemoryError:
+        print(f"Limite de mémoire atteinte après {int(time.time() - started)} s")
+        return EXIT_MEMORY
+    finally:
+        # Mesures des conversions, ajoutées au registre du parent
+        get_event_bus().send({'converter_samples': get_registry().drain_samples()})
+    return EXIT_SUCCESS if result else EXIT_FAILURE
+
+
+if __name__ == '__main__':
+    sys.exit(_child_main())
@@ -0,0 +1,115 @@
+"""
+DocxFilesMerger - Application de traitement et fusion de documents.
+Développé par MOA Digital Agency LLC (https://myoneart.com)
+Email: moa@myoneart.com
+Copyright © 2025 MOA Digital Agency LLC. Tous droits réservés.
+
+Fichiers produits par un traitement et conservation des fichiers
+intermédiaires.
+Un job ne produit que les sorties demandées (docx, pdf ou les deux) : les
+étapes qui ne servent à aucune sortie ne sont pas exécutées, et ne comptent
+ni dans l'avancement affiché ni dans la durée estimée du job. Les fichiers
+intermédiaires (documents extraits et convertis) sont conservés ou
+supprimés en fin de traitement selon la politique choisie.
+"""
+
+OUTPUT_DOCX = 'docx'
+OUTPUT_PDF = 'pdf'
+ALL_OUTPUTS = (OUTPUT_DOCX, OUTPUT_PDF)
+
+# Conservation des fichiers intermédiaires en fin de traitement
+INTERMEDIATES_KEEP = 'keep'
+INTERMEDIATES_DELETE = 'delete'
+# Conservés seulement si le traitement échoue (diagnostic)
+INTERMEDIATES_ON_ERROR = 'on_error'
+INTERMEDIATES_POLICIES = (INTERMEDIATES_KEEP, INTERMEDIATES_DELETE, INTERMEDIATES_ON_ERROR)
+
+# Étapes d'un traitement et part de la durée totale de chacune
+STAGE_EXTRACT = 'extract'
+STAGE_CONVERT = 'convert'
+STAGE_MERGE = 'merge'
+STAGE_PDF = 'pdf'
+STAGE_WEIGHTS = {
+    STAGE_EXTRACT: 10,
+    STAGE_CONVERT: 20,
+    STAGE_MERGE: 40,
+    STAGE_PDF: 30,
+}
+
+
+def parse_outputs(value=None):
+    """
+    Normaliser les sorties demandées : None (toutes), "docx,pdf" ou une
+    liste. Lève ValueError pour une sortie inconnue ou une liste vide.
+    """
+    if value is None:
+        return list(ALL_OUTPUTS)
+    if isinstance(value, str):
+        value = value.split(',')
+    outputs = {str(output).strip().lower() for output in value if str(output).strip()}
+    unknown = outputs - set(ALL_OUTPUTS)
+    if unknown:
+        raise ValueError(f"Sortie inconnue: {', '.join(sorted(unknown))} "
+                         f"(valeurs possibles: {', '.join(ALL_OUTPUTS)})")
+    if not outputs:
+        raise ValueError("Aucune sortie demandée")
+    return [output for output in ALL_OUTPUTS if output in outputs]
+
+
+def parse_intermediates(value=None, default=INTERMEDIATES_KEEP):
+    """Valider une politique de conservation des fichiers intermédiaires"""
+    if not value:
+        return default
+    value = value.strip().lower()
+    if value not in INTERMEDIATES_POLICIES:
+        raise ValueError(f"Politique de conservation inconnue: {value} "
+                         f"(valeurs possibles: {', '.join(INTERMEDIATES_POLICIES)})")
+    return value
+
+
+def should_delete_intermediates(policy, success):
+    return policy == INTERMEDIATES_DELETE or (policy == INTERMEDIATES_ON_ERROR and success)
+
+
+def planned_stages(outputs, pdf_on_demand=False):
+    """
+    Étapes exécutées pour produire outputs. Le PDF différé au premier
+    téléchargement est rendu à partir du DOCX : il n'est pas produit par le
+    job, sauf si le DOCX n'est pas demandé.
+    """
+    stages = [STAGE_EXTRACT, STAGE_CONVERT]
+    if OUTPUT_DOCX in outputs:
+        stages.append(STAGE_MERGE)
+    if OUTPUT_PDF in outputs and not (pdf_on_demand and OUTPUT_DOCX in outputs):
+        stages.append(STAGE_PDF)
+    return stages
+
+
+def stage_share(stages):
+    """Part de la durée d'un traitement complet représentée par stages"""
+    return sum(STAGE_WEIGHTS[stage] for stage in stages) / sum(STAGE_WEIGHTS.values())
+
+
+class StageProgress:
+    """Pourcentage d'avancement calculé sur les seules étapes exécutées"""
+
+    def __init__(self, stages, weights=None):
+        # weights : durées prédites des étapes (eta.EtaTracker), sinon STAGE_WEIGHTS
+        self.stages = list(stages)
+        self.weights = {stage: (weights or STAGE_WEIGHTS).get(stage, STAGE_WEIGHTS[stage]) for stage in self.stages}
+        self.total = sum(self.weights.values())
+
+    def _offset(self, stage):
+        index = self.stages.index(stage)
+        return sum(self.weights[previous] for previous in self.stages[:index])
+
+    def percent(self, stage, fraction=0.0):
+        """Avancement quand stage est réalisée à fraction (0 à 1)"""
+        done = self._offset(stage) + fraction * self.weights[stage]
+        return int(100 * done / self.total)
+
+    def span(self, first, last, fraction):
+        """Avancement d'étapes qui se chevauchent, de first à last, réalisées à fraction"""
+        start = self._offset(first)
+        end = self._offset(last) + self.weights[last]
+        return int(100 * (start + fraction * (end - start)) / self.total)
@@ -0,0 +1,102 @@
+"""
+DocxFilesMerger - Application de traitement et fusion de documents.
+Développé par MOA Digital Agency LLC (https://myoneart.com)
+Email: moa@myoneart.com
+Copyright © 2025 MOA Digital Agency LLC. Tous droits réservés.
+
+Registre des jobs en mémoire, indexé par job_id.
+Les routes /status/<job_id> et /download/<job_id>/<type> y retrouvent les
+dossiers d'un job en temps constant, sans parcourir les dossiers de statut
+ou de sortie. Un job absent du registre (créé par un autre worker, ou avant
+un redémarrage) est chargé depuis la table ProcessingJob puis conservé.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+# Nombre de jobs conservés en mémoire (les plus anciens sont rechargés au besoin)
+JOB_REGISTRY_MAX_JOBS = int(os.environ.get('JOB_REGISTRY_MAX_JOBS', '10000'))
+
+
+class JobRecord:
+    """Job connu du registre : identifiant, dossiers et fichier d'origine"""
+
+    def __init__(self, job_id, output_dir, status_dir, original_filename=None):
+        self.job_id = job_id
+        self.output_dir = output_dir
+        self.status_dir = status_dir
+        self.original_filename = original_filename
+
+    @property
+    def status_file(self):
+        return os.path.join(self.status_dir, 'status.json')
+
+    def to_dict(self):
+        """Convertir l'objet en dictionnaire pour JSON"""
+        return {
+            'job_id': self.job_id,
+            'output_dir': self.output_dir,
+            'status_dir': self.status_dir,
+            'original_filename': self.original_filename
+        }
+
+
+class JobRegistry:
+    """
+    Jobs indexés par job_id. loader(job_id) cherche un job en base et
+    retourne (trouvé, nom du fichier d'origine).
+    """
+
+    def __init__(self, output_root, status_root, loader=None, max_jobs=JOB_REGISTRY_MAX_JOBS):
+        self.output_root = output_root
+        self.status_root = status_root
+        self.loader = loader
+        self.max_jobs = max_jobs
+        self._records = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _record(self, job_id, original_filename=None):
+        return JobRecord(job_id,
+                         os.path.join(self.output_root, job_id),
+                         os.path.join(self.status_root, job_id),
+                         original_filename)
+
+    def register(self, job_id, original_filename=None):
+        """Enregistrer un nouveau job et retourner son JobRecord"""
+        record = self._record(job_id, original_filename)
+        self._remember(record)
+        return record
+
+    def _remember(self, record):
+        with self._lock:
+            self._records[record.job_id] = record
+            self._records.move_to_end(record.job_id)
+            while len(self._records) > self.max_jobs:
+                self._records.popitem(last=False)
+
+    def get(self, job_id):
+        """JobRecord du job, chargé depuis la base s'il n'est pas en mémoire, ou None"""
+        with self._lock:
+            record = self._records.get(job_id)
+            if record is not None:
+                self._records.move_to_end(job_id)
+                return record
+
+        if self.loader is None:
+            return None
+        try:
+            found, original_filename = self.loader(job_id)
+        except Exception as e:
+            print(f"Erreur lors du chargement du job {job_id}: {str(e)}")
+            return None
+        if not found:
+            return None
+
+        record = self._record(job_id, original_filename)
+        self._remember(record)
+        return record
+
+    def forget(self, job_id):
+        with self._lock:
+            self._records.pop(job_id, None)
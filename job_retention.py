@@ -0,0 +1,151 @@
+"""
+DocxFilesMerger - Application de traitement et fusion de documents.
+Développé par MOA Digital Agency LLC (https://myoneart.com)
+Email: moa@myoneart.com
+Copyright © 2025 MOA Digital Agency LLC. Tous droits réservés.
+
+Rétention des jobs en base.
+Les fichiers d'un job sont supprimés au bout de 24 heures, mais ses lignes
+(processing_jobs, stage_timings) restaient indéfiniment. Les jobs terminés,
+en erreur, annulés ou jamais lancés, créés depuis plus de
+job_retention_days jours, sont supprimés par lots de JOB_RETENTION_BATCH,
+chacun dans une courte transaction : les lignes déjà verrouillées par un
+traitement en cours sont sautées (SKIP LOCKED avec PostgreSQL) et une pause
+sépare deux lots, si bien que les insertions des nouveaux jobs ne sont
+jamais bloquées longtemps. Avec JOB_ARCHIVE_PATH, chaque lot supprimé est
+ajouté à un fichier d'archive (une ligne JSON par job) une fois la
+suppression validée : un lot dont la transaction échoue, puis est repris à
+la passe suivante, n'est pas archivé deux fois.
+
+Les jobs terminés sont déjà comptés dans UsageStat (par jour) à leur fin :
+rien n'est perdu des statistiques d'utilisation, et les totaux du tableau
+de bord (JobStats) restent ceux de tous les jobs traités, la suppression en
+masse contournant les écouteurs de models.py. Seul le nombre de jobs de
+chaque état (JobStatusCount), qui décrit le contenu de la table, est
+diminué. Les statistiques par heure (UsageRollup) plus anciennes que la
+durée de rétention sont supprimées : leur total est conservé par jour.
+"""
+
+import os
+import json
+import time
+import threading
+from collections import Counter
+from datetime import datetime, timedelta
+
+from config_cache import get_setting
+from database import get_db_app, db_session
+from models import ProcessingJob, StageTiming, UsageRollup, JobStatusCount
+
+# Durée de conservation des jobs en base (jours, 0 : sans limite)
+JOB_RETENTION_DAYS = int(os.environ.get('JOB_RETENTION_DAYS', '30'))
+# Jobs supprimés par transaction, et pause entre deux lots (secondes)
+JOB_RETENTION_BATCH = int(os.environ.get('JOB_RETENTION_BATCH', '500'))
+JOB_RETENTION_PAUSE = 0.1
+# Intervalle minimal entre deux passes de rétention d'un processus (secondes)
+JOB_RETENTION_INTERVAL = int(os.environ.get('JOB_RETENTION_INTERVAL', '3600'))
+# Fichier d'archive des jobs supprimés (JSON, une ligne par job ; vide : pas d'archive)
+JOB_ARCHIVE_PATH = os.environ.get('JOB_ARCHIVE_PATH', '')
+
+# États des jobs qui peuvent être supprimés (les jobs en attente ou en cours sont gardés)
+RETENTION_STATUSES = ('completed', 'error', 'cancelled', 'uploaded')
+
+
+def archive_jobs(archive_path, records):
+    """Ajouter au fichier d'archive les jobs supprimés (dictionnaires de ProcessingJob.to_dict)"""
+    archived_at = datetime.now().isoformat()
+    with open(archive_path, 'a', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(dict(record, archived_at=archived_at), ensure_ascii=False) + '\n')
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _delete_batch(session, cutoff, batch_size, archive_path):
+    # Jobs les plus anciens d'abord (index sur created_at), sans attendre les lignes verrouillées
+    jobs = (ProcessingJob.query
+            .filter(ProcessingJob.created_at < cutoff)
+            .filter(ProcessingJob.status.in_(RETENTION_STATUSES))
+            .order_by(ProcessingJob.created_at)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .all())
+    if not jobs:
+        return 0
+
+    # Contenu lu avant la suppression, archivé une fois celle-ci validée
+    records = [job.to_dict() for job in jobs] if archive_path else None
+
+    job_ids = [job.job_id for job in jobs]
+    session.query(StageTiming).filter(StageTiming.job_id.in_(job_ids)).delete(synchronize_session=False)
+    session.query(ProcessingJob).filter(ProcessingJob.id.in_([job.id for job in jobs])) \
+           .delete(synchronize_session=False)
+
+    # Suppression en masse : nombre de jobs de chaque état mis à jour ici
+    table = JobStatusCount.__table__
+    for status, count in Counter(job.status for job in jobs).items():
+        session.execute(table.update().where(table.c.status == status)
+                        .values(count=table.c.count - count))
+    session.commit()
+
+    if records:
+        archive_jobs(archive_path, records)
+    return len(jobs)
+
+
+def purge_old_jobs(retention_days=None, batch_size=JOB_RETENTION_BATCH, archive_path=JOB_ARCHIVE_PATH):
+    """
+    Supprimer (et archiver) les jobs plus anciens que retention_days jours
+    (défaut : réglage job_retention_days), par lots. Retourne le nombre de
+    jobs supprimés.
+    """
+    if retention_days is None:
+        retention_days = get_setting('job_retention_days', JOB_RETENTION_DAYS)
+    if not retention_days or get_db_app() is None:
+        return 0
+
+    # created_at est en UTC, les statistiques par heure en heure locale
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    batch_size = max(1, batch_size)
+    deleted = 0
+    try:
+        while True:
+            with db_session() as session:
+                count = _delete_batch(session, cutoff, batch_size, archive_path)
+            deleted += count
+            if count < batch_size:
+                break
+            # Laisser passer les écritures des traitements entre deux lots
+            time.sleep(JOB_RETENTION_PAUSE)
+
+        with db_session() as session:
+            session.query(UsageRollup) \
+                   .filter(UsageRollup.hour < datetime.now() - timedelta(days=retention_days)) \
+                   .delete(synchronize_session=False)
+            session.commit()
+    except Exception as e:
+        print(f"Erreur lors de la suppression des anciens jobs: {str(e)}")
+
+    if deleted:
+        print(f"{deleted} jobs de plus de {retention_days} jours supprimés")
+    return deleted
+
+
+# Dernière passe de rétention du processus
+_last_run = 0.0
+_run_lock = threading.Lock()
+
+
+def run_retention(interval=JOB_RETENTION_INTERVAL):
+    """Passe de rétention, au plus une par interval secondes et par processus"""
+    global _last_run
+    if not _run_lock.acquire(blocking=False):
+        # Passe déjà en cours dans ce processus
+        return 0
+    try:
+        if time.time() - _last_run < interval:
+            return 0
+        _last_run = time.time()
+        return purge_old_jobs()
+    finally:
+        _run_lock.release()
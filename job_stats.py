@@ -0,0 +1,96 @@
+"""
+DocxFilesMerger - Application de traitement et fusion de documents.
+Développé par MOA Digital Agency LLC (https://myoneart.com)
+Email: moa@myoneart.com
+Copyright © 2025 MOA Digital Agency LLC. Tous droits réservés.
+
+Statistiques et liste des jobs pour l'administration.
+Les totaux du tableau de bord (nombre de jobs terminés, fichiers traités,
+durée moyenne) et le nombre de jobs de chaque état sont lus dans des tables
+d'agrégats (JobStats, JobStatusCount) tenues à jour par les écritures des
+jobs (voir models.py), sans parcourir processing_jobs. La liste des jobs est
+paginée par identifiant décroissant (pagination par clé) : chaque page
+coûte une lecture d'index, quelle que soit sa position dans la table.
+"""
+
+from database import ensure_indexes
+from models import db, ProcessingJob, JobStats, JobStatusCount, FINAL_STATUSES
+
+# Index de processing_jobs, ajoutés aux tables créées avant eux
+JOB_INDEXES = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_processing_jobs_job_id ON processing_jobs (job_id)",
+    "CREATE INDEX IF NOT EXISTS ix_processing_jobs_created_at ON processing_jobs (created_at)",
+    "CREATE INDEX IF NOT EXISTS ix_processing_jobs_status_id ON processing_jobs (status, id)",
+)
+
+# Taille des pages de /admin/jobs
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def ensure_job_stats(session):
+    """
+    Créer les index de processing_jobs et, au premier démarrage, les
+    agrégats à partir du contenu de la table (seul parcours complet)
+    """
+    ensure_indexes(session, JOB_INDEXES)
+    if session.get(JobStats, 1) is not None:
+        return
+
+    total_jobs, total_files, timed_jobs, total_processing_time = session.query(
+        db.func.count(ProcessingJob.id),
+        db.func.sum(ProcessingJob.file_count),
+        db.func.count(ProcessingJob.processing_time),
+        db.func.sum(ProcessingJob.processing_time)
+    ).filter(ProcessingJob.status.in_(FINAL_STATUSES)).one()
+    session.add(JobStats(id=1,
+                         total_jobs=total_jobs or 0,
+                         total_files=total_files or 0,
+                         timed_jobs=timed_jobs or 0,
+                         total_processing_time=total_processing_time or 0))
+
+    session.query(JobStatusCount).delete()
+    for status, count in session.query(ProcessingJob.status, db.func.count(ProcessingJob.id)) \
+                                .group_by(ProcessingJob.status):
+        session.add(JobStatusCount(status=status, count=count))
+    try:
+        session.commit()
+    except Exception as e:
+        # Agrégats créés au même moment par un autre worker
+        session.rollback()
+        print(f"Agrégats des jobs non initialisés: {str(e)}")
+
+
+def dashboard_stats():
+    """Totaux du tableau de bord : jobs terminés, fichiers traités et durée moyenne (secondes)"""
+    stats = db.session.get(JobStats, 1) or JobStats(total_jobs=0, total_files=0,
+                                                    timed_jobs=0, total_processing_time=0)
+    return {
+        'total_jobs': stats.total_jobs,
+        'total_files': stats.total_files,
+        'avg_time': int(stats.avg_time)
+    }
+
+
+def status_counts():
+    """Nombre de jobs de chaque état"""
+    return {row.status: row.count for row in JobStatusCount.query.all() if row.count}
+
+
+def list_jobs(status=None, before=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Page de jobs, du plus récent au plus ancien : jobs d'identifiant
+    inférieur à before (None : première page), limités à status s'il est
+    donné. Retourne (jobs, before de la page suivante ou None).
+    """
+    query = ProcessingJob.query
+    if status:
+        query = query.filter(ProcessingJob.status == status)
+    if before is not None:
+        query = query.filter(ProcessingJob.id < before)
+
+    # Une ligne de plus pour savoir s'il reste une page
+    jobs = query.order_by(ProcessingJob.id.desc()).limit(limit + 1).all()
+    if len(jobs) > limit:
+        return jobs[:limit], jobs[limit - 1].id
+    return jobs, None
@@ -0,0 +1,309 @@
+"""
+DocxFilesMerger - Application de traitement et fusion de documents.
+Développé par MOA Digital Agency LLC (https://myoneart.com)
+Email: moa@myoneart.com
+Copyright © 2025 MOA Digital Agency LLC. Tous droits réservés.
+
+File d'attente durable des traitements (SQLite local).
+Chaque job soumis est enregistré avec ses paramètres, puis chaque étape
+terminée y inscrit un point de reprise et ses artefacts (fichiers produits).
+Le processus qui exécute les jobs signale régulièrement qu'il est vivant ;
+les jobs d'un processus arrêté (redémarrage de gunicorn, déploiement...)
+sont repris par un autre processus à partir du dernier point de reprise.
+"""
+
+import os
+import json
+import time
+import socket
+import sqlite3
+import threading
+import traceback
+
+# Emplacement de la base SQLite des jobs
+JOB_STORE_PATH = os.environ.get('JOB_STORE_PATH', os.path.join(os.getcwd(), 'jobs.db'))
+
+# Intervalle du signal de vie et délai après lequel un job sans signal est repris (secondes)
+HEARTBEAT_INTERVAL = 10
+STALE_AFTER = 60
+
+# Nombre maximal d'exécutions d'un job avant abandon (job qui fait planter le processus)
+MAX_ATTEMPTS = 3
+
+# Durée de conservation des jobs terminés (heures)
+RETENTION_HOURS = 24
+
+STATE_QUEUED = 'queued'
+STATE_RUNNING = 'running'
+STATE_COMPLETED = 'completed'
+STATE_FAILED = 'failed'
+STATE_CANCELLED = 'cancelled'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    func TEXT NOT NULL,
+    args TEXT NOT NULL,
+    kwargs TEXT NOT NULL,
+    state TEXT NOT NULL,
+    owner TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    heartbeat_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    job_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    artifacts TEXT NOT NULL,
+    completed_at REAL NOT NULL,
+    PRIMARY KEY (job_id, stage)
+);
+"""
+
+
+def _process_owner():
+    """Identifiant du processus courant : hôte et pid"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _owner_is_dead(owner):
+    """Vrai si owner désigne un processus de cet hôte qui n'existe plus"""
+    host, _, pid = (owner or '').rpartition(':')
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        return False
+    return False
+
+
+class StoredJob:
+    """Job enregistré dans la file durable"""
+
+    def __init__(self, row):
+        self.job_id = row['job_id']
+        self.func = row['func']
+        self.args = tuple(json.loads(row['args']))
+        self.kwargs = json.loads(row['kwargs'])
+        self.state = row['state']
+        self.owner = row['owner']
+        self.attempts = row['attempts']
+        self.created_at = row['created_at']
+        self.heartbeat_at = row['heartbeat_at']
+
+
+class JobStore:
+    """File d'attente durable et points de reprise des jobs"""
+
+    def __init__(self, path=JOB_STORE_PATH):
+        self.path = path
+        self.owner = _process_owner()
+        self._local = threading.local()
+        self._monitor = None
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        # Une connexion par thread ; WAL pour lire pendant les écritures
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, job_id, func, args=(), kwargs=None, claim=True):
+        """
+        Enregistrer un job. Avec claim, le processus courant en devient
+        propriétaire ; sinon un service de traitement le réclamera (claim()).
+        """
+        now = time.time()
+        owner = self.owner if claim else None
+        self._connect().execute(
+            "INSERT OR REPLACE INTO jobs (job_id, func, args, kwargs, state, owner, attempts,"
+            " created_at, updated_at, heartbeat_at) VALUES (?, ?, ?, ?, ?, ?, 0, ?, ?, ?)",
+            (job_id, func, json.dumps(list(args)), json.dumps(kwargs or {}),
+             STATE_QUEUED, owner, now, now, now if claim else None)
+        )
+        self._connect().execute("DELETE FROM checkpoints WHERE job_id = ?", (job_id,))
+
+    def claim(self, job_id):
+        """Devenir propriétaire d'un job (service de traitement)"""
+        now = time.time()
+        self._connect().execute(
+            "UPDATE jobs SET owner = ?, heartbeat_at = ?, updated_at = ? WHERE job_id = ?",
+            (self.owner, now, now, job_id)
+        )
+
+    def release(self, job_id):
+        """Rendre un job réclamé mais qui n'a pas pu être remis en file"""
+        self._connect().execute(
+            "UPDATE jobs SET owner = NULL, heartbeat_at = NULL WHERE job_id = ? AND owner = ?",
+            (job_id, self.owner)
+        )
+
+    def discard(self, job_id):
+        """Supprimer un job qui n'a pas pu être mis en file"""
+        conn = self._connect()
+        conn.execute("DELETE FROM jobs WHERE job_id = ?", (job_id,))
+        conn.execute("DELETE FROM checkpoints WHERE job_id = ?", (job_id,))
+
+    def get(self, job_id):
+        row = self._connect().execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return StoredJob(row) if row else None
+
+    def start(self, job_id):
+        """
+        Marquer le début d'une exécution du job. Le propriétaire reste le
+        processus qui l'a mis en file (l'exécution peut avoir lieu dans un
+        processus enfant du service de traitement).
+        """
+        now = time.time()
+        self._connect().execute(
+            "UPDATE jobs SET state = ?, attempts = attempts + 1, updated_at = ?"
+            " WHERE job_id = ? AND state != ?",
+            (STATE_RUNNING, now, job_id, STATE_CANCELLED)
+        )
+
+    def finish(self, job_id, success=True):
+        # Un job annulé le reste, même si son exécution se termine ensuite
+        now = time.time()
+        self._connect().execute(
+            "UPDATE jobs SET state = ?, updated_at = ? WHERE job_id = ? AND state != ?",
+            (STATE_COMPLETED if success else STATE_FAILED, now, job_id, STATE_CANCELLED)
+        )
+
+    def cancel(self, job_id):
+        """Marquer un job annulé : il ne sera ni exécuté ni repris"""
+        now = time.time()
+        self._connect().execute(
+            "UPDATE jobs SET state = ?, updated_at = ? WHERE job_id = ? AND state IN (?, ?)",
+            (STATE_CANCELLED, now, job_id, STATE_QUEUED, STATE_RUNNING)
+        )
+
+    def checkpoint(self, job_id, stage, artifacts=None):
+        """Enregistrer une étape terminée et ses artefacts"""
+        self._connect().execute(
+            "INSERT OR REPLACE INTO checkpoints (job_id, stage, artifacts, completed_at)"
+            " VALUES (?, ?, ?, ?)",
+            (job_id, stage, json.dumps(artifacts or {}), time.time())
+        )
+
+    def checkpoints(self, job_id):
+        """Étapes terminées d'un job : {étape: artefacts}"""
+        rows = self._connect().execute(
+            "SELECT stage, artifacts FROM checkpoints WHERE job_id = ?", (job_id,)
+        ).fetchall()
+        return {row['stage']: json.loads(row['artifacts']) for row in rows}
+
+    def heartbeat(self):
+        """Signaler que les jobs de ce processus sont toujours pris en charge"""
+        now = time.time()
+        self._connect().execute(
+            "UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND state IN (?, ?)",
+            (now, self.owner, STATE_QUEUED, STATE_RUNNING)
+        )
+
+    def claim_orphans(self):
+        """
+        Réclamer les jobs non terminés dont le propriétaire a disparu
+        (processus arrêté, signal de vie trop ancien, ou job jamais réclamé).
+        Retourne les jobs réclamés.
+        """
+        conn = self._connect()
+        now = time.time()
+        rows = conn.execute(
+            "SELECT * FROM jobs WHERE state IN (?, ?) AND (owner IS NULL OR owner != ?)",
+            (STATE_QUEUED, STATE_RUNNING, self.owner)
+        ).fetchall()
+
+        claimed = []
+        for row in rows:
+            last_seen = row['heartbeat_at'] or row['created_at']
+            if not (_owner_is_dead(row['owner']) or now - last_seen > STALE_AFTER):
+                continue
+            # Réclamation atomique : un seul processus reprend le job
+            cursor = conn.execute(
+                "UPDATE jobs SET owner = ?, state = ?, heartbeat_at = ?, updated_at = ?"
+                " WHERE job_id = ? AND owner IS ? AND state = ?",
+                (self.owner, STATE_QUEUED, now, now, row['job_id'], row['owner'], row['state'])
+            )
+            if cursor.rowcount == 1:
+                claimed.append(self.get(row['job_id']))
+        return claimed
+
+    def purge(self, max_age_hours=RETENTION_HOURS):
+        """Supprimer les jobs terminés depuis plus de max_age_hours"""
+        conn = self._connect()
+        cutoff = time.time() - max_age_hours * 3600
+        conn.execute(
+            "DELETE FROM checkpoints WHERE job_id IN (SELECT job_id FROM jobs"
+            " WHERE state IN (?, ?, ?) AND updated_at < ?)",
+            (STATE_COMPLETED, STATE_FAILED, STATE_CANCELLED, cutoff)
+        )
+        conn.execute(
+            "DELETE FROM jobs WHERE state IN (?, ?, ?) AND updated_at < ?",
+            (STATE_COMPLETED, STATE_FAILED, STATE_CANCELLED, cutoff)
+        )
+
+    def start_monitor(self, resubmit, give_up=None):
+        """
+        Démarrer le thread qui signale la vie des jobs de ce processus et
+        reprend les jobs orphelins : resubmit(job) les remet en file,
+        give_up(job) est appelé pour ceux qui ont atteint MAX_ATTEMPTS.
+        """
+        if self._monitor:
+            return
+
+        def monitor():
+            last_purge = 0
+            while True:
+                try:
+                    self.heartbeat()
+                    for job in self.claim_orphans():
+                        if job.attempts >= MAX_ATTEMPTS:
+                            print(f"Job {job.job_id} abandonné après {job.attempts} tentatives")
+                            self.finish(job.job_id, success=False)
+                            if give_up:
+                                give_up(job)
+                            continue
+                        print(f"Reprise du job {job.job_id} interrompu")
+                        try:
+                            resubmit(job)
+                        except Exception as e:
+                            # File pleine : un autre processus (ou le prochain passage) le reprendra
+                            print(f"Impossible de remettre le job {job.job_id} en file: {str(e)}")
+                            self.release(job.job_id)
+                    if time.time() - last_purge > 3600:
+                        self.purge()
+                        last_purge = time.time()
+                except Exception as e:
+                    print(f"Erreur lors de la surveillance des jobs: {str(e)}")
+                    print(traceback.format_exc())
+                time.sleep(HEARTBEAT_INTERVAL)
+
+        self._monitor = threading.Thread(target=monitor, name='job-store-monitor')
+        self._monitor.daemon = True
+        self._monitor.start()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_job_store():
+    """File d'attente durable partagée par le processus"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = JobStore()
+        return _store
@@ -0,0 +1,267 @@
+"""
+DocxFilesMerger - Application de traitement et fusion de documents.
+Développé par MOA Digital Agency LLC (https://myoneart.com)
+Email: moa@myoneart.com
+Copyright © 2025 MOA Digital Agency LLC. Tous droits réservés.
+
+Ordonnanceur des traitements : un nombre fixe de workers consomme une file
+d'attente bornée. Quand la file est pleine, submit() lève QueueFullError
+avec la position qu'aurait eue le job et un délai de nouvel essai estimé.
+cancel() retire un job de la file ou annule le job en cours : sa place dans
+le pool est libérée aussitôt, sans attendre la fin de l'annulation.
+
+L'ordre de prise en charge dépend de la taille des jobs (nombre de documents
+et octets décompressés de l'archive) : le job dont la durée estimée est la
+plus courte passe en premier, l'attente réduisant progressivement la durée
+retenue pour qu'un gros job ne soit pas repoussé indéfiniment. Les gros jobs
+n'occupent jamais tous les workers : une place reste disponible pour les
+petits, qui ne restent pas bloqués derrière une archive de plusieurs
+milliers de documents.
+"""
+
+import os
+import math
+import time
+import threading
+import traceback
+from collections import deque
+
+from cancellation import CancelToken, JobCancelled, cancel_scope
+
+# Secondes d'attente retranchées à la durée estimée d'un job par seconde passée dans la file
+SCHEDULER_AGING = float(os.environ.get('SCHEDULER_AGING', '1.0'))
+
+# Durée estimée (secondes) à partir de laquelle un job est considéré comme gros
+SCHEDULER_LARGE_JOB_SECONDS = float(os.environ.get('SCHEDULER_LARGE_JOB_SECONDS', '300'))
+
+# Un document compte pour une unité de travail, plus une par tranche d'octets décompressés
+BYTES_PER_WORK_UNIT = 512 * 1024
+
+
+class QueueFullError(Exception):
+    """File d'attente pleine : le job doit être soumis plus tard"""
+
+    def __init__(self, position, retry_after):
+        super().__init__(f"File d'attente pleine (position {position})")
+        self.position = position
+        self.retry_after = retry_after
+
+
+class Job:
+    """Traitement en attente ou en cours"""
+
+    def __init__(self, job_id, func, args=(), kwargs=None, on_start=None, size=None):
+        self.job_id = job_id
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.on_start = on_start
+        # Unités de travail estimées d'après la taille de l'archive, None si inconnue
+        self.work = job_work(size)
+        self.expected_seconds = None
+        self.large = False
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.token = CancelToken()
+        # Job annulé dont le worker a été remplacé dans le pool
+        self.detached = False
+
+
+def job_work(size):
+    """
+    Unités de travail d'un job de taille (documents, octets décompressés),
+    éventuellement suivie de la part d'un traitement complet que représentent
+    les étapes exécutées (job qui ne produit pas toutes les sorties)
+    """
+    if not size:
+        return None
+    documents, uncompressed_bytes = size[:2]
+    share = size[2] if len(size) > 2 else 1.0
+    return max(1.0, documents + uncompressed_bytes / BYTES_PER_WORK_UNIT) * share
+
+
+class JobScheduler:
+    """Pool de workers de taille fixe alimenté par une file d'attente bornée"""
+
+    # Durée estimée d'un job tant qu'aucun n'a été mesuré (secondes)
+    DEFAULT_JOB_SECONDS = 30.0
+    # Durée estimée d'une unité de travail tant qu'aucun job n'a été mesuré (secondes)
+    DEFAULT_SECONDS_PER_UNIT = 0.5
+
+    def __init__(self, workers=2, max_queue=20, aging=SCHEDULER_AGING,
+                 large_job_seconds=SCHEDULER_LARGE_JOB_SECONDS):
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self.aging = max(0.0, aging)
+        self.large_job_seconds = large_job_seconds
+        # Places que les gros jobs peuvent occuper : une reste aux petits jobs
+        self.large_workers = max(1, self.workers - 1)
+        self._queue = deque()
+        self._running = {}
+        self._condition = threading.Condition()
+        self._threads = []
+        self._average_seconds = self.DEFAULT_JOB_SECONDS
+        self._seconds_per_unit = self.DEFAULT_SECONDS_PER_UNIT
+
+    def _start_workers(self):
+        # Démarrage paresseux : aucun thread tant qu'aucun job n'est soumis
+        if self._threads:
+            return
+        for _ in range(self.workers):
+            self._start_worker()
+
+    def _start_worker(self):
+        thread = threading.Thread(target=self._worker, name=f"job-worker-{len(self._threads)}")
+        thread.daemon = True
+        thread.start()
+        self._threads.append(thread)
+
+    def submit(self, job_id, func, args=(), kwargs=None, on_start=None, size=None):
+        """
+        Ajouter un job à la file. size est la taille de l'archive à traiter,
+        (nombre de documents, octets décompressés[, part des étapes
+        exécutées]), ou None si elle est inconnue. Retourne la position du job dans la file (0 s'il sera pris
+        en charge immédiatement par un worker libre).
+        """
+        job = Job(job_id, func, args, kwargs, on_start, size)
+        with self._condition:
+            self._start_workers()
+
+            idle_workers = self.workers - len(self._running)
+            if len(self._queue) >= self.max_queue + max(0, idle_workers):
+                position = len(self._queue) + 1
+                raise QueueFullError(position, self.estimate_wait(position))
+
+            job.expected_seconds = self._expected_seconds(job)
+            job.large = job.expected_seconds >= self.large_job_seconds
+            self._queue.append(job)
+            position = self._position(job.job_id)
+            self._condition.notify_all()
+        return position
+
+    def _expected_seconds(self, job):
+        # Durée estimée d'après la taille, sinon durée moyenne des jobs
+        if job.work is None:
+            return self._average_seconds
+        return job.work * self._seconds_per_unit
+
+    def _priority(self, job, now):
+        # Plus court d'abord, l'attente vieillissant la priorité
+        return job.expected_seconds - self.aging * (now - job.submitted_at)
+
+    def _ordered_queue(self):
+        """Jobs en attente dans l'ordre où ils seraient pris en charge"""
+        now = time.time()
+        return sorted(self._queue, key=lambda job: self._priority(job, now))
+
+    def _next_job(self):
+        """Job à prendre en charge, ou None si aucun ne peut démarrer"""
+        large_running = sum(1 for job in self._running.values() if job.large)
+        for job in self._ordered_queue():
+            if job.large and large_running >= self.large_workers:
+                continue
+            return job
+        return None
+
+    def _position(self, job_id):
+        idle_workers = max(0, self.workers - len(self._running))
+        large_running = sum(1 for job in self._running.values() if job.large)
+        for index, job in enumerate(self._ordered_queue()):
+            if job.job_id == job_id:
+                if job.large and large_running >= self.large_workers:
+                    # Attend qu'un gros job se termine, même si un worker est libre
+                    return index + 1
+                return max(0, index + 1 - idle_workers)
+        return None
+
+    def estimate_wait(self, position):
+        """Délai estimé (secondes) avant qu'un job à cette position démarre"""
+        rounds = math.ceil(position / self.workers)
+        return max(1, int(rounds * self._average_seconds))
+
+    def position(self, job_id):
+        """Position d'un job dans la file, 0 s'il est en cours, None s'il est inconnu"""
+        with self._condition:
+            if job_id in self._running:
+                return 0
+            position = self._position(job_id)
+            return None if position is None else max(1, position)
+
+    def cancel(self, job_id):
+        """
+        Annuler un job : 'dequeued' s'il attendait dans la file, 'running'
+        s'il était en cours (il s'arrête au prochain point de contrôle),
+        None s'il est inconnu ou déjà terminé.
+        """
+        with self._condition:
+            for job in self._queue:
+                if job.job_id == job_id:
+                    self._queue.remove(job)
+                    return 'dequeued'
+
+            job = self._running.pop(job_id, None)
+            if job is None:
+                return None
+            # Rendre la place au pool immédiatement : un nouveau worker
+            # remplace celui qui termine l'annulation
+            job.detached = True
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            self._start_worker()
+            self._condition.notify_all()
+
+        job.token.cancel()
+        return 'running'
+
+    def stats(self):
+        with self._condition:
+            return {
+                'workers': self.workers,
+                'running': len(self._running),
+                'running_large': sum(1 for job in self._running.values() if job.large),
+                'queued': len(self._queue),
+                'queued_large': sum(1 for job in self._queue if job.large),
+                'max_queue': self.max_queue,
+                'average_seconds': round(self._average_seconds, 1),
+                'seconds_per_unit': round(self._seconds_per_unit, 3)
+            }
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                job = self._next_job()
+                while job is None:
+                    # File vide, ou seuls des gros jobs alors que leurs places sont prises
+                    self._condition.wait()
+                    job = self._next_job()
+                self._queue.remove(job)
+                job.started_at = time.time()
+                self._running[job.job_id] = job
+
+            try:
+                if job.on_start:
+                    job.on_start(job.job_id)
+                with cancel_scope(job.token):
+                    job.func(*job.args, **job.kwargs)
+            except JobCancelled:
+                print(f"Job {job.job_id} annulé")
+            except Exception as e:
+                print(f"Erreur lors du traitement du job {job.job_id}: {str(e)}")
+                print(traceback.format_exc())
+            finally:
+                elapsed = time.time() - job.started_at
+                with self._condition:
+                    detached = job.detached
+                    if not detached:
+                        self._running.pop(job.job_id, None)
+                        # Moyennes mobiles de la durée des jobs pour estimer l'attente
+                        # et la durée des prochains jobs d'après leur taille
+                        self._average_seconds = 0.8 * self._average_seconds + 0.2 * elapsed
+                        if job.work:
+                            self._seconds_per_unit = (0.8 * self._seconds_per_unit
+                                                      + 0.2 * elapsed / job.work)
+                        # Une place de gros job a pu se libérer
+                        self._condition.notify_all()
+
+            if detached:
+                # Un autre worker a déjà pris la place de celui-ci
+                return
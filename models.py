@@ -6,6 +6,8 @@ Copyright © 2025 MOA Digital Agency LLC. Tous droits réservés.
 """
 
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from datetime import datetime
 
 # Initialiser SQLAlchemy
@@ -14,15 +16,21 @@ db = SQLAlchemy()
 class ProcessingJob(db.Model):
     """Modèle pour les traitements de fichiers"""
     __tablename__ = 'processing_jobs'
+    __table_args__ = (
+        # Liste des jobs d'un état, du plus récent au plus ancien (/admin/jobs)
+        db.Index('ix_processing_jobs_status_id', 'status', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
-    job_id = db.Column(db.String(100), nullable=False)
-    status = db.Column(db.String(50), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    job_id = db.Column(db.String(100), nullable=False, unique=True, index=True)
+    # Anciennes valeurs chargées avant modification : les agrégats (JobStats,
+    # JobStatusCount) sont mis à jour par différence
+    status = db.column_property(db.Column(db.String(50), nullable=False), active_history=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     completed_at = db.Column(db.DateTime)
-    file_count = db.Column(db.Integer)
+    file_count = db.column_property(db.Column(db.Integer), active_history=True)
     original_filename = db.Column(db.String(255))
-    processing_time = db.Column(db.Integer)
+    processing_time = db.column_property(db.Column(db.Integer), active_history=True)
     
     def __repr__(self):
         return f'<ProcessingJob {self.job_id}>'
@@ -40,12 +48,164 @@ class ProcessingJob(db.Model):
             'processing_time': self.processing_time
         }
 
+class JobStats(db.Model):
+    """Modèle pour les totaux des jobs terminés de processing_jobs (ligne unique, id = 1)"""
+    __tablename__ = 'job_stats'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    total_jobs = db.Column(db.BigInteger, default=0)
+    total_files = db.Column(db.BigInteger, default=0)
+    # Jobs dont la durée est connue, et somme de ces durées (durée moyenne)
+    timed_jobs = db.Column(db.BigInteger, default=0)
+    total_processing_time = db.Column(db.BigInteger, default=0)
+    
+    def __repr__(self):
+        return f'<JobStats {self.total_jobs}>'
+    
+    @property
+    def avg_time(self):
+        return self.total_processing_time / self.timed_jobs if self.timed_jobs else 0
+
+class JobStatusCount(db.Model):
+    """Modèle pour le nombre de jobs de chaque état"""
+    __tablename__ = 'job_status_counts'
+    
+    status = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.BigInteger, default=0)
+    
+    def __repr__(self):
+        return f'<JobStatusCount {self.status} {self.count}>'
+
+def _add_job_stats(connection, jobs=0, files=0, timed_jobs=0, processing_time=0):
+    # Incrément atomique de la ligne des totaux, dans la transaction du job
+    table = JobStats.__table__
+    connection.execute(table.update().where(table.c.id == 1).values(
+        total_jobs=table.c.total_jobs + jobs,
+        total_files=table.c.total_files + files,
+        timed_jobs=table.c.timed_jobs + timed_jobs,
+        total_processing_time=table.c.total_processing_time + processing_time
+    ))
+
+def increment_row(connection, table, key_name, key, values):
+    """
+    Ajouter values (colonne : incrément) à la ligne key de table, créée au
+    besoin, en une requête atomique (INSERT ... ON CONFLICT DO UPDATE) : deux
+    processus qui créent la même ligne en même temps n'entrent pas en
+    conflit. connection est une connexion ou une session.
+    """
+    bind = connection.get_bind() if hasattr(connection, 'get_bind') else connection
+    dialect = bind.dialect.name
+    
+    if dialect in ('postgresql', 'sqlite'):
+        insert = postgresql_insert if dialect == 'postgresql' else sqlite_insert
+        statement = insert(table).values({key_name: key, **values})
+        statement = statement.on_conflict_do_update(
+            index_elements=[key_name],
+            set_={name: table.c[name] + statement.excluded[name] for name in values}
+        )
+        connection.execute(statement)
+        return
+    
+    # Autres bases : incrément atomique, ligne créée si elle n'existe pas encore
+    updated = connection.execute(
+        table.update().where(table.c[key_name] == key)
+        .values({name: table.c[name] + value for name, value in values.items()})
+    ).rowcount
+    if not updated:
+        connection.execute(table.insert().values({key_name: key, **values}))
+
+def _add_status_count(connection, status, count):
+    if status:
+        increment_row(connection, JobStatusCount.__table__, 'status', status, {'count': count})
+
+# États d'un job terminé : seuls ces jobs sont comptés dans JobStats
+FINAL_STATUSES = ('completed', 'error', 'cancelled')
+
+def _job_totals(status, files, processing_time):
+    # Contribution d'un job aux totaux de JobStats (nulle tant qu'il n'est pas terminé)
+    if status not in FINAL_STATUSES:
+        return {'jobs': 0, 'files': 0, 'timed_jobs': 0, 'processing_time': 0}
+    return {'jobs': 1,
+            'files': files or 0,
+            'timed_jobs': 1 if processing_time is not None else 0,
+            'processing_time': processing_time or 0}
+
+# Agrégats tenus à jour à chaque insertion, modification ou suppression d'un
+# job par l'ORM (les requêtes update()/delete() en masse les contournent).
+# La ligne unique de JobStats n'est modifiée que lorsqu'un job devient
+# terminé (ou l'est déjà) : les écritures d'un job en cours (progression,
+# passage à 'processing') ne se disputent pas son verrou.
+@db.event.listens_for(ProcessingJob, 'after_insert')
+def _job_inserted(mapper, connection, job):
+    totals = _job_totals(job.status, job.file_count, job.processing_time)
+    if totals['jobs']:
+        _add_job_stats(connection, **totals)
+    _add_status_count(connection, job.status, 1)
+
+@db.event.listens_for(ProcessingJob, 'after_update')
+def _job_updated(mapper, connection, job):
+    state = db.inspect(job)
+    
+    def previous(name):
+        history = state.attrs[name].history
+        if not history.deleted and not history.added:
+            return getattr(job, name)
+        return history.deleted[0] if history.deleted else None
+    
+    old_status = previous('status')
+    old = _job_totals(old_status, previous('file_count'), previous('processing_time'))
+    new = _job_totals(job.status, job.file_count, job.processing_time)
+    if old != new:
+        _add_job_stats(connection, **{name: new[name] - old[name] for name in new})
+    
+    if old_status != job.status:
+        _add_status_count(connection, old_status, -1)
+        _add_status_count(connection, job.status, 1)
+
+@db.event.listens_for(ProcessingJob, 'after_delete')
+def _job_deleted(mapper, connection, job):
+    totals = _job_totals(job.status, job.file_count, job.processing_time)
+    if totals['jobs']:
+        _add_job_stats(connection, **{name: -value for name, value in totals.items()})
+    _add_status_count(connection, job.status, -1)
+
+class StageTiming(db.Model):
+    """Modèle pour les durées d'étape des traitements terminés (estimation du temps restant)"""
+    __tablename__ = 'stage_timings'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.String(100), nullable=False, index=True)
+    stage = db.Column(db.String(20), nullable=False)
+    documents = db.Column(db.Integer, default=0)
+    size = db.Column(db.BigInteger, default=0)
+    seconds = db.Column(db.Float, nullable=False)
+    predicted_seconds = db.Column(db.Float)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<StageTiming {self.job_id} {self.stage}>'
+
+class ConverterStat(db.Model):
+    """Modèle pour les mesures des convertisseurs, par classe de document (converters.BackendStats)"""
+    __tablename__ = 'converter_stats'
+    
+    backend = db.Column(db.String(50), primary_key=True)
+    input_class = db.Column(db.String(100), primary_key=True)
+    attempts = db.Column(db.Integer, default=0)
+    failures = db.Column(db.Integer, default=0)
+    # Moyenne mobile exponentielle de la durée d'une conversion (secondes)
+    latency = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<ConverterStat {self.backend} {self.input_class}>'
+
 class UsageStat(db.Model):
     """Modèle pour les statistiques d'utilisation"""
     __tablename__ = 'usage_stats'
     
     id = db.Column(db.Integer, primary_key=True)
-    date = db.Column(db.Date, default=datetime.utcnow().date)
+    date = db.Column(db.Date, default=datetime.utcnow().date, unique=True, index=True)
     total_jobs = db.Column(db.Integer, default=0)
     total_files_processed = db.Column(db.Integer, default=0)
     total_processing_time = db.Column(db.Integer, default=0)
@@ -53,6 +213,19 @@ class UsageStat(db.Model):
     def __repr__(self):
         return f'<UsageStat {self.date}>'
 
+class UsageRollup(db.Model):
+    """Modèle pour les statistiques d'utilisation par heure"""
+    __tablename__ = 'usage_rollups'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    hour = db.Column(db.DateTime, nullable=False, unique=True, index=True)
+    total_jobs = db.Column(db.Integer, default=0)
+    total_files_processed = db.Column(db.Integer, default=0)
+    total_processing_time = db.Column(db.Integer, default=0)
+    
+    def __repr__(self):
+        return f'<UsageRollup {self.hour}>'
+
 class Config(db.Model):
     """Modèle pour les configurations de l'application"""
     __tablename__ = 'config'
@@ -67,9 +240,9 @@ class Config(db.Model):
     
     @classmethod
     def get_value(cls, key, default=None):
-        """Récupérer une valeur de configuration par sa clé"""
-        config = cls.query.filter_by(key=key).first()
-        return config.value if config else default
+        """Récupérer une valeur de configuration par sa clé (cache typé, voir config_cache)"""
+        from config_cache import get_setting
+        return get_setting(key, default)
     
     @classmethod
     def set_value(cls, key, value, description=None):
@@ -83,4 +256,7 @@ class Config(db.Model):
             config = cls(key=key, value=value, description=description)
             db.session.add(config)
         db.session.commit()
+        
+        from config_cache import get_config_cache
+        get_config_cache().invalidate()
         return config
\ No newline at end of file
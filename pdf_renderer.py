@@ -0,0 +1,368 @@
+"""
+DocxFilesMerger - Application de traitement et fusion de documents.
+Développé par MOA Digital Agency LLC (https://myoneart.com)
+Email: moa@myoneart.com
+Copyright © 2025 MOA Digital Agency LLC. Tous droits réservés.
+
+Rendu DOCX -> PDF en Python pur, sans LibreOffice.
+Le XML du corps du document (word/document.xml) est lu en flux : chaque
+paragraphe ou tableau est rendu puis libéré dès sa lecture. Le texte est
+découpé selon la largeur réelle des caractères (stringWidth) et les pages
+sont écrites par lots dans des PDF partiels concaténés à la fin, si bien
+que la mémoire reste bornée même pour des documents de plusieurs milliers
+de pages.
+"""
+
+import os
+import shutil
+import zipfile
+import tempfile
+import xml.etree.ElementTree as ET
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+
+from pdf_writer import concatenate_pdfs
+from cancellation import check_cancelled
+
+W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+
+# Nombre de pages écrites dans chaque PDF partiel avant de libérer le canevas
+PAGES_PER_PART = 200
+
+MARGIN = 72
+BODY_SIZE = 10
+LEADING = 1.35
+PARAGRAPH_SPACING = 5
+CELL_PADDING = 4
+
+# Taille des titres selon le style du paragraphe
+HEADING_SIZES = {0: 22, 1: 16, 2: 14, 3: 12}
+
+FONTS = {
+    (False, False): 'Helvetica',
+    (True, False): 'Helvetica-Bold',
+    (False, True): 'Helvetica-Oblique',
+    (True, True): 'Helvetica-BoldOblique',
+}
+
+
+def _is_on(element):
+    """Propriété booléenne WordprocessingML (w:b, w:i...) active ou non"""
+    if element is None:
+        return False
+    return element.get(W + 'val', 'true') not in ('false', '0', 'off')
+
+
+def _heading_level(paragraph):
+    """Niveau de titre du paragraphe (0 pour Title), ou None"""
+    style = paragraph.find(f'{W}pPr/{W}pStyle')
+    if style is None:
+        return None
+    name = style.get(W + 'val', '').lower()
+    if name in ('title', 'titre'):
+        return 0
+    for prefix in ('heading', 'titre'):
+        if name.startswith(prefix) and name[len(prefix):].isdigit():
+            return int(name[len(prefix):])
+    return None
+
+
+def _is_list_item(paragraph):
+    """Paragraphe numéroté ou de style liste (List Bullet...)"""
+    if paragraph.find(f'{W}pPr/{W}numPr') is not None:
+        return True
+    style = paragraph.find(f'{W}pPr/{W}pStyle')
+    return style is not None and 'list' in style.get(W + 'val', '').lower()
+
+
+def _paragraph_runs(paragraph):
+    """
+    Segments (texte, police) d'un paragraphe. Les sauts de ligne sont
+    représentés par '\\n' et les sauts de page par None.
+    """
+    segments = []
+    for run in paragraph.iter(W + 'r'):
+        properties = run.find(W + 'rPr')
+        bold = italic = False
+        if properties is not None:
+            bold = _is_on(properties.find(W + 'b'))
+            italic = _is_on(properties.find(W + 'i'))
+        font = FONTS[(bold, italic)]
+
+        for child in run:
+            if child.tag == W + 't':
+                segments.append((child.text or '', font))
+            elif child.tag == W + 'tab':
+                segments.append(('    ', font))
+            elif child.tag == W + 'cr':
+                segments.append(('\n', font))
+            elif child.tag == W + 'br':
+                if child.get(W + 'type') == 'page':
+                    segments.append((None, font))
+                else:
+                    segments.append(('\n', font))
+    return segments
+
+
+def _wrap(segments, width, size):
+    """
+    Découper des segments (texte, police) en lignes tenant dans width,
+    d'après la largeur réelle des glyphes. Chaque ligne est une liste de
+    morceaux (texte, police).
+    """
+    lines = [[]]
+    line_width = 0.0
+
+    for text, font in segments:
+        if text == '\n':
+            lines.append([])
+            line_width = 0.0
+            continue
+
+        # Chaque mot garde l'espace qui le précède
+        for index, word in enumerate(text.split(' ')):
+            piece = word if index == 0 else ' ' + word
+            if not piece:
+                continue
+            piece_width = stringWidth(piece, font, size)
+
+            if lines[-1] and line_width + piece_width > width:
+                lines.append([])
+                piece = piece.lstrip(' ')
+                piece_width = stringWidth(piece, font, size)
+                line_width = 0.0
+
+            if piece_width <= width:
+                lines[-1].append((piece, font))
+                line_width += piece_width
+                continue
+
+            # Mot plus large que la ligne : couper caractère par caractère
+            for char in piece:
+                char_width = stringWidth(char, font, size)
+                if lines[-1] and line_width + char_width > width:
+                    lines.append([])
+                    line_width = 0.0
+                lines[-1].append((char, font))
+                line_width += char_width
+    return lines
+
+
+class StreamingPdfRenderer:
+    """Rendu page par page vers une suite de PDF partiels"""
+
+    def __init__(self, pdf_path, pagesize=letter, pages_per_part=PAGES_PER_PART):
+        self.pdf_path = pdf_path
+        self.pagesize = pagesize
+        self.width, self.height = pagesize
+        self.pages_per_part = pages_per_part
+        self.parts_dir = tempfile.mkdtemp(prefix='pdf_render_',
+                                          dir=os.path.dirname(os.path.abspath(pdf_path)))
+        self.parts = []
+        self.page_count = 0
+        self.canvas = None
+        self._pages_in_part = 0
+        self._page_has_content = False
+        self._open_part()
+
+    @property
+    def text_width(self):
+        return self.width - 2 * MARGIN
+
+    def _open_part(self):
+        part_path = os.path.join(self.parts_dir, f"{len(self.parts):06d}.pdf")
+        self.parts.append(part_path)
+        self.canvas = canvas.Canvas(part_path, pagesize=self.pagesize, pageCompression=1)
+        self._pages_in_part = 0
+        self.y = self.height - MARGIN
+
+    def new_page(self):
+        """Terminer la page courante ; changer de PDF partiel si le lot est plein"""
+        self.canvas.showPage()
+        self.page_count += 1
+        self._pages_in_part += 1
+        self._page_has_content = False
+        if self._pages_in_part >= self.pages_per_part:
+            self.canvas.save()
+            self._open_part()
+        else:
+            self.y = self.height - MARGIN
+
+    def _ensure_space(self, height):
+        if self.y - height < MARGIN and self._page_has_content:
+            self.new_page()
+
+    def draw_line(self, pieces, x, size):
+        """Dessiner une ligne de morceaux (texte, police) à la position courante"""
+        self.y -= size * LEADING
+
+        # Regrouper les morceaux consécutifs de même police
+        runs = []
+        for text, font in pieces:
+            if runs and runs[-1][1] == font:
+                runs[-1][0] += text
+            else:
+                runs.append([text, font])
+
+        for text, font in runs:
+            self.canvas.setFont(font, size)
+            self.canvas.drawString(x, self.y, text)
+            x += stringWidth(text, font, size)
+        self._page_has_content = True
+
+    def paragraph(self, element):
+        level = _heading_level(element)
+        size = HEADING_SIZES.get(level, 12) if level is not None else BODY_SIZE
+        segments = _paragraph_runs(element)
+
+        indent = 0
+        if _is_list_item(element):
+            # Élément de liste : puce et retrait
+            indent = 18
+            segments.insert(0, ('• ', 'Helvetica'))
+
+        if level is not None:
+            segments = [(text, 'Helvetica-Bold') if text is not None else (None, font)
+                        for text, font in segments]
+            self._ensure_space(size * LEADING * 2)
+            self.y -= PARAGRAPH_SPACING
+
+        page_break_before = element.find(f'{W}pPr/{W}pageBreakBefore')
+        if _is_on(page_break_before) and self._page_has_content:
+            self.new_page()
+
+        if not any(text for text, _ in segments if text is not None):
+            # Paragraphe vide : ligne blanche
+            self._ensure_space(size * LEADING)
+            self.y -= size * LEADING
+
+        # Découper le paragraphe aux sauts de page explicites
+        chunk = []
+        for segment in segments + [(None, None)]:
+            if segment[0] is not None:
+                chunk.append(segment)
+                continue
+            if chunk:
+                for line in _wrap(chunk, self.text_width - indent, size):
+                    self._ensure_space(size * LEADING)
+                    self.draw_line(line, MARGIN + indent, size)
+                chunk = []
+            if segment[1] is not None and self._page_has_content:
+                self.new_page()
+
+        self.y -= PARAGRAPH_SPACING
+
+    def table(self, element):
+        grid = [int(col.get(W + 'w', '0') or 0) for col in element.iter(W + 'gridCol')]
+
+        for row in element.findall(W + 'tr'):
+            cells = row.findall(W + 'tc')
+            if not cells:
+                continue
+
+            # Largeurs des colonnes proportionnelles à la grille du tableau
+            weights = grid if len(grid) == len(cells) and sum(grid) else [1] * len(cells)
+            total = float(sum(weights))
+            widths = [self.text_width * weight / total for weight in weights]
+
+            cell_lines = []
+            for cell, width in zip(cells, widths):
+                lines = []
+                for paragraph in cell.iter(W + 'p'):
+                    segments = [s for s in _paragraph_runs(paragraph) if s[0] is not None]
+                    lines.extend(_wrap(segments, width - 2 * CELL_PADDING, BODY_SIZE))
+                cell_lines.append(lines)
+
+            self._draw_row(cell_lines, widths)
+
+        self.y -= PARAGRAPH_SPACING
+
+    def _draw_row(self, cell_lines, widths):
+        line_height = BODY_SIZE * LEADING
+        offset = 0
+        remaining = max(1, max(len(lines) for lines in cell_lines))
+        fits_on_page = remaining * line_height + 2 * CELL_PADDING <= self.height - 2 * MARGIN
+
+        # Une ligne de tableau trop haute pour une page est répartie sur plusieurs pages
+        while remaining > 0:
+            available = int((self.y - MARGIN - 2 * CELL_PADDING) // line_height)
+            if available < 1 or (available < remaining and fits_on_page and self._page_has_content):
+                self.new_page()
+                available = int((self.y - MARGIN - 2 * CELL_PADDING) // line_height)
+
+            count = max(1, min(available, remaining))
+            row_height = count * line_height + 2 * CELL_PADDING
+            top = self.y
+
+            x = MARGIN
+            for lines, width in zip(cell_lines, widths):
+                self.canvas.rect(x, top - row_height, width, row_height, stroke=1, fill=0)
+                self.y = top - CELL_PADDING
+                for line in lines[offset:offset + count]:
+                    self.draw_line(line, x + CELL_PADDING, BODY_SIZE)
+                x += width
+
+            self.y = top - row_height
+            self._page_has_content = True
+            offset += count
+            remaining -= count
+
+    def finish(self):
+        """Sauvegarder le dernier lot et assembler les PDF partiels"""
+        if self._page_has_content or self.page_count == 0:
+            self.canvas.showPage()
+            self.page_count += 1
+            self._pages_in_part += 1
+        if self._pages_in_part:
+            self.canvas.save()
+        else:
+            self.parts.pop()
+
+        try:
+            if len(self.parts) == 1:
+                shutil.move(self.parts[0], self.pdf_path)
+            else:
+                concatenate_pdfs([(part, None) for part in self.parts], self.pdf_path)
+        finally:
+            shutil.rmtree(self.parts_dir, ignore_errors=True)
+        return self.pdf_path
+
+    def abort(self):
+        shutil.rmtree(self.parts_dir, ignore_errors=True)
+
+
+def render_docx_to_pdf(docx_path, pdf_path, pagesize=letter, pages_per_part=PAGES_PER_PART):
+    """
+    Rendre un fichier DOCX en PDF (paragraphes, titres, listes et tableaux
+    simples) en lisant le corps du document en flux.
+    """
+    renderer = StreamingPdfRenderer(pdf_path, pagesize=pagesize, pages_per_part=pages_per_part)
+    try:
+        with zipfile.ZipFile(docx_path) as archive, archive.open('word/document.xml') as source:
+            body = None
+            depth = 0
+            for event, element in ET.iterparse(source, events=('start', 'end')):
+                if event == 'start':
+                    depth += 1
+                    if element.tag == W + 'body':
+                        body = element
+                    continue
+
+                depth -= 1
+                # Éléments directement sous w:body (document > body > élément)
+                if depth != 2 or body is None:
+                    continue
+                check_cancelled()
+                if element.tag == W + 'p':
+                    renderer.paragraph(element)
+                elif element.tag == W + 'tbl':
+                    renderer.table(element)
+                # Libérer les éléments déjà rendus
+                body.clear()
+    except Exception:
+        renderer.abort()
+        raise
+
+    return renderer.finish()
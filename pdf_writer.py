@@ -0,0 +1,506 @@
+"""
+DocxFilesMerger - Application de traitement et fusion de documents.
+Développé par MOA Digital Agency LLC (https://myoneart.com)
+Email: moa@myoneart.com
+Copyright © 2025 MOA Digital Agency LLC. Tous droits réservés.
+
+Concaténation native de fichiers PDF, sans dépendance externe.
+Les PDF partiels sont lus un par un et leurs objets recopiés (renumérotés)
+directement dans le fichier de sortie : seuls les décalages des objets et les
+références des pages restent en mémoire. Une entrée de signet (outline) est
+ajoutée pour chaque document source, pointant sur sa première page.
+
+Seuls les PDF à table xref classique sont pris en charge (c'est le cas des
+fichiers produits par LibreOffice et reportlab) ; les PDF chiffrés ou à
+flux d'objets compressés lèvent PdfUnsupportedError.
+"""
+
+import re
+
+WHITESPACE = b'\x00\t\n\x0c\r '
+DELIMITERS = b'()<>[]{}/%'
+
+# Attributs hérités du nœud /Pages par les pages
+INHERITABLE = ('Resources', 'MediaBox', 'CropBox', 'Rotate')
+
+_OBJ_HEADER = re.compile(rb'(\d+)\s+(\d+)\s+obj\b')
+_XREF_SECTION = re.compile(rb'\s*(\d+)\s+(\d+)')
+_XREF_ENTRY = re.compile(rb'\s*(\d{10})\s+(\d{5})\s+([nf])')
+_INTEGER = re.compile(rb'[+-]?\d+')
+
+
+class PdfError(Exception):
+    """Fichier PDF illisible"""
+
+
+class PdfUnsupportedError(PdfError):
+    """Structure PDF non prise en charge par la concaténation native"""
+
+
+class PdfName(str):
+    """Nom PDF (/Type), stocké sans la barre oblique"""
+
+
+class PdfRaw(bytes):
+    """Valeur PDF recopiée telle quelle (nombre, chaîne, booléen, null)"""
+
+
+class PdfRef:
+    """Référence indirecte (N G R)"""
+
+    __slots__ = ('num', 'gen')
+
+    def __init__(self, num, gen=0):
+        self.num = num
+        self.gen = gen
+
+
+class _OutputRef(PdfRef):
+    """Référence vers un objet du fichier de sortie (jamais renumérotée)"""
+
+    __slots__ = ()
+
+
+class _Parser:
+    """Analyseur minimal des objets PDF"""
+
+    def __init__(self, data, pos=0):
+        self.data = data
+        self.pos = pos
+
+    def skip_ws(self):
+        data, n = self.data, len(self.data)
+        while self.pos < n:
+            c = data[self.pos]
+            if c in WHITESPACE:
+                self.pos += 1
+            elif c == 0x25:  # '%' : commentaire jusqu'à la fin de ligne
+                while self.pos < n and data[self.pos] not in b'\r\n':
+                    self.pos += 1
+            else:
+                break
+
+    def _regular(self):
+        start = self.pos
+        data, n = self.data, len(self.data)
+        while self.pos < n and data[self.pos] not in WHITESPACE and data[self.pos] not in DELIMITERS:
+            self.pos += 1
+        return data[start:self.pos]
+
+    def parse_value(self):
+        self.skip_ws()
+        data = self.data
+        if self.pos >= len(data):
+            raise PdfError("Fin de fichier inattendue")
+
+        if data.startswith(b'<<', self.pos):
+            self.pos += 2
+            result = {}
+            while True:
+                self.skip_ws()
+                if data.startswith(b'>>', self.pos):
+                    self.pos += 2
+                    return result
+                key = self.parse_value()
+                if not isinstance(key, PdfName):
+                    raise PdfError("Clé de dictionnaire invalide")
+                result[key] = self.parse_value()
+
+        c = data[self.pos]
+        if c == 0x5B:  # '['
+            self.pos += 1
+            result = []
+            while True:
+                self.skip_ws()
+                if data.startswith(b']', self.pos):
+                    self.pos += 1
+                    return result
+                result.append(self.parse_value())
+
+        if c == 0x28:  # '(' : chaîne littérale avec parenthèses imbriquées
+            start, depth, i = self.pos, 0, self.pos
+            while True:
+                ch = data[i]
+                if ch == 0x5C:  # '\\'
+                    i += 2
+                    continue
+                if ch == 0x28:
+                    depth += 1
+                elif ch == 0x29:
+                    depth -= 1
+                    if depth == 0:
+                        break
+                i += 1
+            self.pos = i + 1
+            return PdfRaw(data[start:self.pos])
+
+        if c == 0x3C:  # '<' : chaîne hexadécimale
+            end = data.index(b'>', self.pos)
+            raw = data[self.pos:end + 1]
+            self.pos = end + 1
+            return PdfRaw(raw)
+
+        if c == 0x2F:  # '/'
+            self.pos += 1
+            return PdfName(self._regular().decode('latin-1'))
+
+        token = self._regular()
+        if not token:
+            raise PdfError(f"Jeton inattendu à la position {self.pos}")
+
+        # Référence indirecte : deux entiers suivis de R
+        if _INTEGER.fullmatch(token):
+            saved = self.pos
+            self.skip_ws()
+            generation = self._regular()
+            if generation and generation.isdigit():
+                self.skip_ws()
+                if self._regular() == b'R':
+                    return PdfRef(int(token), int(generation))
+            self.pos = saved
+        return PdfRaw(token)
+
+
+class PdfReader:
+    """Lecture des objets d'un PDF à table xref classique"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.data = f.read()
+        if not self.data.startswith(b'%PDF-'):
+            raise PdfError(f"{path} n'est pas un fichier PDF")
+
+        self.offsets = {}
+        self._cache = {}
+        try:
+            self.trailer = self._read_xref()
+        except PdfUnsupportedError:
+            raise
+        except Exception:
+            # Table xref absente ou corrompue : reconstruire par balayage
+            self.trailer = self._scan_objects()
+
+        if 'Encrypt' in self.trailer:
+            raise PdfUnsupportedError("PDF chiffré")
+        if 'Root' not in self.trailer:
+            raise PdfError("Catalogue introuvable")
+
+    def _read_xref(self):
+        data = self.data
+        index = data.rfind(b'startxref')
+        if index < 0:
+            raise PdfError("startxref introuvable")
+        parser = _Parser(data, index + len(b'startxref'))
+        offset = int(parser.parse_value())
+
+        trailer = None
+        seen = set()
+        while offset is not None and offset not in seen:
+            seen.add(offset)
+            parser = _Parser(data, offset)
+            parser.skip_ws()
+            if not data.startswith(b'xref', parser.pos):
+                raise PdfUnsupportedError("Table xref compressée (flux xref)")
+            parser.pos += 4
+
+            while True:
+                parser.skip_ws()
+                if data.startswith(b'trailer', parser.pos):
+                    parser.pos += len(b'trailer')
+                    section_trailer = parser.parse_value()
+                    break
+                match = _XREF_SECTION.match(data, parser.pos)
+                if not match:
+                    raise PdfError("Section xref invalide")
+                first, count = int(match.group(1)), int(match.group(2))
+                parser.pos = match.end()
+                for i in range(count):
+                    entry = _XREF_ENTRY.match(data, parser.pos)
+                    if not entry:
+                        raise PdfError("Entrée xref invalide")
+                    parser.pos = entry.end()
+                    # Les sections les plus récentes sont lues en premier
+                    if entry.group(3) == b'n' and first + i not in self.offsets:
+                        self.offsets[first + i] = int(entry.group(1))
+
+            if 'XRefStm' in section_trailer:
+                raise PdfUnsupportedError("PDF hybride avec flux xref")
+            if trailer is None:
+                trailer = section_trailer
+            prev = section_trailer.get('Prev')
+            offset = int(prev) if prev is not None else None
+
+        # Vérifier que les décalages pointent bien sur des objets
+        for num, obj_offset in self.offsets.items():
+            match = _OBJ_HEADER.match(data, obj_offset)
+            if not match or int(match.group(1)) != num:
+                raise PdfError(f"Décalage xref incorrect pour l'objet {num}")
+        return trailer
+
+    def _scan_objects(self):
+        self.offsets = {}
+        for match in _OBJ_HEADER.finditer(self.data):
+            # La dernière définition d'un objet l'emporte
+            self.offsets[int(match.group(1))] = match.start()
+
+        index = self.data.rfind(b'trailer')
+        if index < 0:
+            raise PdfUnsupportedError("Trailer introuvable")
+        return _Parser(self.data, index + len(b'trailer')).parse_value()
+
+    def object_numbers(self):
+        return sorted(self.offsets)
+
+    def read_object(self, num):
+        """Retourner (valeur, données du flux ou None) pour l'objet num"""
+        if num in self._cache:
+            return self._cache[num]
+        if num not in self.offsets:
+            return PdfRaw(b'null'), None
+
+        data = self.data
+        match = _OBJ_HEADER.match(data, self.offsets[num])
+        parser = _Parser(data, match.end())
+        value = parser.parse_value()
+        stream = None
+
+        parser.skip_ws()
+        if isinstance(value, dict) and data.startswith(b'stream', parser.pos):
+            start = parser.pos + len(b'stream')
+            if data.startswith(b'\r\n', start):
+                start += 2
+            elif data.startswith(b'\n', start) or data.startswith(b'\r', start):
+                start += 1
+
+            length = value.get('Length')
+            if isinstance(length, PdfRef):
+                length = self.resolve(length)
+            try:
+                end = start + int(length)
+                if not data[end:end + 20].lstrip().startswith(b'endstream'):
+                    raise ValueError
+            except (TypeError, ValueError):
+                # Longueur absente ou fausse : chercher la fin du flux
+                end = data.index(b'endstream', start)
+                while end > start and data[end - 1] in b'\r\n':
+                    end -= 1
+            stream = data[start:end]
+
+            if value.get('Type') == 'ObjStm':
+                raise PdfUnsupportedError("Flux d'objets compressés")
+
+        result = (value, stream)
+        self._cache[num] = result
+        return result
+
+    def resolve(self, value):
+        """Résoudre une référence indirecte (sans le flux)"""
+        while isinstance(value, PdfRef):
+            value = self.read_object(value.num)[0]
+        return value
+
+    def pages(self):
+        """Liste ordonnée de (numéro d'objet, attributs hérités) des pages"""
+        catalog = self.resolve(self.trailer['Root'])
+        root = catalog.get('Pages')
+        result = []
+        self._walk_pages(root, {}, result, set())
+        return result
+
+    def _walk_pages(self, ref, inherited, result, visited):
+        if not isinstance(ref, PdfRef) or ref.num in visited:
+            return
+        visited.add(ref.num)
+        node = self.resolve(ref)
+        if not isinstance(node, dict):
+            return
+
+        if node.get('Type') == 'Pages' or 'Kids' in node:
+            attributes = dict(inherited)
+            for key in INHERITABLE:
+                if key in node:
+                    attributes[key] = node[key]
+            for kid in self.resolve(node.get('Kids', [])):
+                self._walk_pages(kid, attributes, result, visited)
+        else:
+            result.append((ref.num, inherited))
+
+    def page_tree_nodes(self):
+        """Numéros des objets du catalogue et des nœuds /Pages"""
+        nodes = set()
+        root = self.trailer['Root']
+        if isinstance(root, PdfRef):
+            nodes.add(root.num)
+        for num in self.object_numbers():
+            value = self.read_object(num)[0]
+            if isinstance(value, dict) and value.get('Type') in ('Pages', 'Catalog'):
+                nodes.add(num)
+        return nodes
+
+
+def _serialize(value, renumber):
+    if isinstance(value, _OutputRef):
+        return b'%d 0 R' % value.num
+    if isinstance(value, PdfRef):
+        new_num = renumber(value.num)
+        return b'null' if new_num is None else b'%d 0 R' % new_num
+    if isinstance(value, PdfName):
+        return b'/' + value.encode('latin-1')
+    if isinstance(value, dict):
+        parts = [b'/' + key.encode('latin-1') + b' ' + _serialize(item, renumber)
+                 for key, item in value.items()]
+        return b'<<' + b' '.join(parts) + b'>>'
+    if isinstance(value, list):
+        return b'[' + b' '.join(_serialize(item, renumber) for item in value) + b']'
+    if isinstance(value, bytes):
+        return bytes(value)
+    if isinstance(value, bool):
+        return b'true' if value else b'false'
+    if isinstance(value, int):
+        return b'%d' % value
+    if value is None:
+        return b'null'
+    raise PdfError(f"Valeur PDF non sérialisable: {value!r}")
+
+
+def _text_string(text):
+    """Chaîne de texte PDF (UTF-16BE avec BOM) pour les titres des signets"""
+    return PdfRaw(b'<FEFF' + text.encode('utf-16-be').hex().upper().encode('ascii') + b'>')
+
+
+class PdfConcatenator:
+    """
+    Écrit un PDF en flux à partir de PDF partiels ajoutés dans l'ordre.
+    Chaque partie reçoit une entrée de signet et son décalage de pages.
+    """
+
+    def __init__(self, dest_path):
+        self.dest_path = dest_path
+        self._file = open(dest_path, 'wb')
+        self._offsets = [None]  # l'objet 0 est toujours libre
+        self._page_refs = []
+        self._pages_root = self._reserve()
+        self.entries = []
+        self._write(b'%PDF-1.7\n%\xe2\xe3\xcf\xd3\n')
+
+    def _reserve(self):
+        self._offsets.append(None)
+        return len(self._offsets) - 1
+
+    def _write(self, data):
+        self._file.write(data)
+
+    def _write_object(self, num, value, stream=None, renumber=None):
+        self._offsets[num] = self._file.tell()
+        if stream is not None:
+            value = dict(value)
+            value['Length'] = len(stream)
+        self._write(b'%d 0 obj\n' % num)
+        self._write(_serialize(value, renumber))
+        if stream is not None:
+            self._write(b'\nstream\n')
+            self._write(stream)
+            self._write(b'\nendstream')
+        self._write(b'\nendobj\n')
+
+    def append(self, pdf_path, title=None):
+        """
+        Ajouter toutes les pages de pdf_path, retourne le nombre de pages.
+        Une partie sans titre n'a pas d'entrée de signet.
+        """
+        reader = PdfReader(pdf_path)
+        pages = reader.pages()
+        skipped = reader.page_tree_nodes()
+
+        # Nouvelle numérotation des objets recopiés
+        mapping = {num: self._reserve() for num in reader.object_numbers() if num not in skipped}
+        page_attributes = dict(pages)
+
+        for num in reader.object_numbers():
+            if num in skipped:
+                continue
+            value, stream = reader.read_object(num)
+            if num in page_attributes and isinstance(value, dict):
+                # Recopier les attributs hérités et rattacher la page au nouvel arbre
+                value = dict(value)
+                for key, inherited in page_attributes[num].items():
+                    value.setdefault(key, inherited)
+                value['Parent'] = _OutputRef(self._pages_root)
+                value['Type'] = PdfName('Page')
+            self._write_object(mapping[num], value, stream, renumber=mapping.get)
+
+        first_page = len(self._page_refs)
+        self._page_refs.extend(mapping[num] for num, _ in pages if num in mapping)
+        page_count = len(self._page_refs) - first_page
+        self.entries.append({'title': title, 'first_page': first_page, 'page_count': page_count})
+        return page_count
+
+    def close(self):
+        """Écrire l'arbre des pages, les signets, le catalogue et la table xref"""
+        self._write_object(self._pages_root, {
+            PdfName('Type'): PdfName('Pages'),
+            PdfName('Kids'): [_OutputRef(num) for num in self._page_refs],
+            PdfName('Count'): len(self._page_refs),
+        })
+
+        # Signets : une entrée par document source
+        outline_root = self._reserve()
+        entries = [entry for entry in self.entries if entry['title'] and entry['page_count']]
+        items = [self._reserve() for entry in entries]
+        for index, (num, entry) in enumerate(zip(items, entries)):
+            item = {
+                PdfName('Title'): _text_string(entry['title']),
+                PdfName('Parent'): _OutputRef(outline_root),
+                PdfName('Dest'): [_OutputRef(self._page_refs[entry['first_page']]), PdfName('Fit')],
+            }
+            if index > 0:
+                item[PdfName('Prev')] = _OutputRef(items[index - 1])
+            if index < len(items) - 1:
+                item[PdfName('Next')] = _OutputRef(items[index + 1])
+            self._write_object(num, item)
+
+        outline = {PdfName('Type'): PdfName('Outlines'), PdfName('Count'): len(items)}
+        if items:
+            outline[PdfName('First')] = _OutputRef(items[0])
+            outline[PdfName('Last')] = _OutputRef(items[-1])
+        self._write_object(outline_root, outline)
+
+        catalog = self._reserve()
+        self._write_object(catalog, {
+            PdfName('Type'): PdfName('Catalog'),
+            PdfName('Pages'): _OutputRef(self._pages_root),
+            PdfName('Outlines'): _OutputRef(outline_root),
+            PdfName('PageMode'): PdfName('UseOutlines'),
+        })
+
+        # Table xref et trailer
+        xref_offset = self._file.tell()
+        self._write(b'xref\n0 %d\n' % len(self._offsets))
+        self._write(b'0000000000 65535 f \n')
+        for offset in self._offsets[1:]:
+            if offset is None:
+                self._write(b'0000000000 65535 f \n')
+            else:
+                self._write(b'%010d 00000 n \n' % offset)
+        self._write(b'trailer\n<</Size %d /Root %d 0 R>>\nstartxref\n%d\n%%%%EOF\n'
+                    % (len(self._offsets), catalog, xref_offset))
+        self._file.close()
+        return self.entries
+
+    def abort(self):
+        self._file.close()
+
+
+def concatenate_pdfs(parts, dest_path):
+    """
+    Concaténer les PDF partiels [(chemin, titre), ...] dans dest_path.
+    Retourne la liste des entrées de signets avec leurs décalages de pages.
+    """
+    writer = PdfConcatenator(dest_path)
+    try:
+        for pdf_path, title in parts:
+            writer.append(pdf_path, title)
+    except Exception:
+        writer.abort()
+        raise
+    return writer.close()
@@ -0,0 +1,150 @@
+"""
+DocxFilesMerger - Application de traitement et fusion de documents.
+Développé par MOA Digital Agency LLC (https://myoneart.com)
+Email: moa@myoneart.com
+Copyright © 2025 MOA Digital Agency LLC. Tous droits réservés.
+
+Pipeline de traitement en flux : extraction -> conversion -> fusion.
+Un thread producteur extrait les documents un par un, un pool de workers
+les convertit dès leur extraction et le thread appelant les fusionne dans
+l'ordre d'origine dès qu'ils sont prêts. Les files bornées entre les étapes
+assurent la contre-pression : l'extraction s'arrête quand la conversion ou
+la fusion prend du retard, si bien que la durée d'un traitement se
+rapproche de celle de l'étape la plus lente plutôt que de leur somme.
+"""
+
+import os
+import queue
+import contextvars
+import threading
+import traceback
+
+from cancellation import JobCancelled, check_cancelled, is_cancelled
+
+# Nombre de workers de conversion et taille des files entre les étapes
+PIPELINE_WORKERS = int(os.environ.get('PIPELINE_WORKERS', min(4, os.cpu_count() or 1)))
+PIPELINE_QUEUE_SIZE = int(os.environ.get('PIPELINE_QUEUE_SIZE', '8'))
+
+# Fin de flux
+_DONE = object()
+
+
+class PipelineError(Exception):
+    """Erreur levée par l'étape de production ou de fusion"""
+
+
+def run_pipeline(source, convert, consume, workers=None, queue_size=None):
+    """
+    Faire passer chaque élément produit par source à travers convert puis
+    consume, les trois étapes se chevauchant.
+
+    source  : itérable (exécuté dans un thread producteur) des éléments à
+              traiter, dans l'ordre de fusion.
+    convert : fonction élément -> résultat, exécutée par les workers ; une
+              exception donne un résultat None.
+    consume : fonction (index, élément, résultat) appelée dans le thread
+              appelant, strictement dans l'ordre de source.
+
+    Les threads héritent du contexte de l'appelant : une annulation du
+    traitement en cours arrête l'extraction et la conversion, et lève
+    JobCancelled dans le thread appelant.
+
+    Retourne le nombre d'éléments traités.
+    """
+    workers = max(1, workers or PIPELINE_WORKERS)
+    queue_size = max(1, queue_size or PIPELINE_QUEUE_SIZE)
+
+    produced = queue.Queue(maxsize=queue_size)
+    converted = queue.Queue()
+    # Nombre maximal d'éléments extraits mais pas encore fusionnés : borne
+    # aussi le tampon de réordonnancement de l'étape de fusion
+    in_flight = threading.BoundedSemaphore(queue_size + workers)
+    stop = threading.Event()
+    errors = []
+
+    def produce():
+        count = 0
+        try:
+            for item in source:
+                # Attendre une place libre sans bloquer un arrêt anticipé
+                while not in_flight.acquire(timeout=0.1):
+                    if stop.is_set() or is_cancelled():
+                        return
+                if stop.is_set() or is_cancelled():
+                    in_flight.release()
+                    return
+                produced.put((count, item))
+                count += 1
+        except Exception as e:
+            errors.append(e)
+            print(f"Erreur lors de l'extraction des fichiers: {str(e)}")
+        finally:
+            # Fermer un générateur interrompu (et l'archive qu'il a ouverte)
+            close = getattr(source, 'close', None)
+            if close:
+                close()
+            # Un marqueur de fin par worker, suivi du nombre total d'éléments
+            for _ in range(workers):
+                produced.put(_DONE)
+            converted.put((_DONE, count))
+
+    def work():
+        while True:
+            entry = produced.get()
+            if entry is _DONE:
+                return
+            index, item = entry
+            result = None
+            if not stop.is_set() and not is_cancelled():
+                try:
+                    result = convert(item)
+                except JobCancelled:
+                    pass
+                except Exception as e:
+                    print(f"Erreur lors de la conversion de {item}: {str(e)}")
+                    print(traceback.format_exc())
+            converted.put((index, (item, result)))
+
+    threads = [threading.Thread(target=contextvars.copy_context().run, args=(produce,),
+                                name='pipeline-extract')]
+    threads += [threading.Thread(target=contextvars.copy_context().run, args=(work,),
+                                 name=f'pipeline-convert-{index}')
+                for index in range(workers)]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    pending = {}
+    next_index = 0
+    total = None
+
+    try:
+        # Fusionner dans l'ordre d'origine dès que l'élément suivant est prêt
+        while total is None or next_index < total:
+            index, value = converted.get()
+            check_cancelled()
+            if index is _DONE:
+                total = value
+                continue
+            pending[index] = value
+
+            while next_index in pending:
+                item, result = pending.pop(next_index)
+                consume(next_index, item, result)
+                next_index += 1
+                in_flight.release()
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        for thread in threads:
+            thread.join()
+
+    # Annulation arrivée pendant l'extraction : le producteur s'est arrêté
+    check_cancelled()
+    if errors:
+        if isinstance(errors[0], MemoryError):
+            # Limite de mémoire du job atteinte : signalée telle quelle
+            raise errors[0]
+        raise PipelineError(str(errors[0])) from errors[0]
+    return total
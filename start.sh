@@ -1,4 +1,4 @@
 #!/bin/bash
 # Run the documentation server
 cd "$(dirname "$0")"
-gunicorn --bind 0.0.0.0:5000 --reuse-port --reload cli_app:app
+gunicorn --bind 0.0.0.0:5000 --worker-class gthread --threads 8 --reuse-port --reload cli_app:app
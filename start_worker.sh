@@ -0,0 +1,14 @@
+#!/bin/bash
+# Script pour exécuter le service de traitement DocxFilesMerger
+# L'application web lui confie les traitements quand WORKER_ADDRESS est défini
+
+echo "Démarrage du service de traitement DocxFilesMerger..."
+cd "$(dirname "$0")"
+
+if [ -z "$WORKER_AUTHKEY" ]; then
+    echo "Erreur: WORKER_AUTHKEY doit être défini (clé secrète partagée avec l'application web)"
+    exit 1
+fi
+
+export WORKER_ADDRESS="${WORKER_ADDRESS:-127.0.0.1:6001}"
+python worker.py "$@"
@@ -29,7 +29,7 @@ function setupKeyboardShortcuts() {
         // Ctrl+D : Télécharger DOCX (si disponible)
         if (e.ctrlKey && e.key === 'd') {
             e.preventDefault();
-            const docxLink = document.querySelector('a[href="/download/docx"]');
+            const docxLink = document.querySelector('a[href^="/download/"][href$="/docx"]');
             if (docxLink && !docxLink.hasAttribute('disabled')) {
                 docxLink.click();
             }
@@ -38,7 +38,7 @@ function setupKeyboardShortcuts() {
         // Ctrl+P : Télécharger PDF (si disponible)
         if (e.ctrlKey && e.key === 'p') {
             e.preventDefault();
-            const pdfLink = document.querySelector('a[href="/download/pdf"]');
+            const pdfLink = document.querySelector('a[href^="/download/"][href$="/pdf"]');
             if (pdfLink && !pdfLink.hasAttribute('disabled')) {
                 pdfLink.click();
             } else {
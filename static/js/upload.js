@@ -7,6 +7,8 @@
 // Global variables
 let uploadStatus = 'idle'; // idle, uploading, processing, complete, error
 let statusCheckInterval = null;
+let statusStream = null;
+let currentJobId = null;
 
 // DOM elements
 const dropZone = document.getElementById('drop-zone');
@@ -29,6 +31,13 @@ document.addEventListener('DOMContentLoaded', function() {
     setupForm();
 });
 
+// Cancel the job on the server if the page is left while it is still processing
+window.addEventListener('pagehide', function() {
+    if (uploadStatus === 'processing' && currentJobId) {
+        navigator.sendBeacon(`/cancel/${encodeURIComponent(currentJobId)}`);
+    }
+});
+
 // Set up the drag and drop functionality
 function setupDropZone() {
     // Prevent default drag behaviors
@@ -205,6 +214,8 @@ function startProcessing(zipPath, fileCount) {
         return response.json();
     })
     .then(data => {
+        currentJobId = data.job_id;
+        
         // Start checking status
         startStatusCheck(fileCount);
     })
@@ -212,24 +223,46 @@ function startProcessing(zipPath, fileCount) {
         uploadStatus = 'error';
         updateProgressUI(0, '', 'error');
         showAlert(`Erreur : ${error.message}`, 'danger');
-        clearInterval(statusCheckInterval);
+        stopStatusStream();
     });
 }
 
 function startStatusCheck(fileCount) {
-    // Clear any existing interval
+    // Close any existing stream
+    stopStatusStream();
+    
+    if (!window.EventSource) {
+        // Browsers without Server-Sent Events: poll the status instead
+        statusCheckInterval = setInterval(() => {
+            checkProcessingStatus(fileCount);
+        }, 2000); // Check every 2 seconds
+        return;
+    }
+    
+    // The server pushes every status update of the job as soon as it is written;
+    // the browser reconnects by itself if the stream is interrupted
+    statusStream = new EventSource(`/status/${encodeURIComponent(currentJobId)}/stream`);
+    statusStream.onmessage = event => {
+        handleStatus(JSON.parse(event.data), fileCount);
+    };
+    statusStream.onerror = () => {
+        console.error('Flux de statut interrompu, reconnexion...');
+    };
+}
+
+function stopStatusStream() {
+    if (statusStream) {
+        statusStream.close();
+        statusStream = null;
+    }
     if (statusCheckInterval) {
         clearInterval(statusCheckInterval);
+        statusCheckInterval = null;
     }
-    
-    // Set up status checking
-    statusCheckInterval = setInterval(() => {
-        checkProcessingStatus(fileCount);
-    }, 2000); // Check every 2 seconds
 }
 
 function checkProcessingStatus(fileCount) {
-    fetch('/status')
+    fetch(`/status/${encodeURIComponent(currentJobId)}`)
         .then(response => {
             if (!response.ok) {
                 if (response.status === 404) {
@@ -244,55 +277,7 @@ function checkProcessingStatus(fileCount) {
         })
         .then(data => {
             if (!data) return; // Status file not ready yet
-            
-            // Update the UI based on status
-            switch (data.status) {
-                case 'starting':
-                case 'extracting':
-                    updateProgressUI(30, 'Extraction des fichiers de l\'archive ZIP...', 'process');
-                    break;
-                    
-                case 'converting':
-                    const convertProgress = data.progress_percent || 35;
-                    updateProgressUI(convertProgress, `Conversion des fichiers (${data.converted || 0}/${data.total_files || fileCount})...`, 'process');
-                    break;
-                    
-                case 'processing':
-                    const processedPercent = data.progress_percent || 
-                                            (data.processed && data.total ? Math.round((data.processed / data.total) * 40) + 40 : 50);
-                    updateProgressUI(processedPercent, `Fusion des documents (${data.processed || 0}/${data.total || fileCount})...`, 'process');
-                    break;
-                    
-                case 'merging_complete':
-                    updateProgressUI(80, 'Fusion des fichiers terminée. Conversion en PDF...', 'process');
-                    break;
-                    
-                case 'converting_to_pdf':
-                    updateProgressUI(85, 'Conversion du document fusionné en PDF...', 'process');
-                    break;
-                    
-                case 'pdf_conversion_complete':
-                    updateProgressUI(95, 'Conversion PDF terminée. Finalisation...', 'process');
-                    break;
-                    
-                case 'complete':
-                    uploadStatus = 'complete';
-                    updateProgressUI(100, 'Traitement terminé !', 'complete');
-                    clearInterval(statusCheckInterval);
-                    showResults(data);
-                    break;
-                    
-                case 'error':
-                    uploadStatus = 'error';
-                    updateProgressUI(0, '', 'error');
-                    showAlert(`Erreur : ${data.error || 'Une erreur inconnue est survenue'}`, 'danger');
-                    clearInterval(statusCheckInterval);
-                    break;
-                    
-                default:
-                    // Unknown status
-                    console.log('Statut inconnu :', data.status);
-            }
+            handleStatus(data, fileCount);
         })
         .catch(error => {
             console.error('Erreur lors de la vérification du statut :', error);
@@ -300,6 +285,57 @@ function checkProcessingStatus(fileCount) {
         });
 }
 
+function handleStatus(data, fileCount) {
+    // Processing takes the progress bar from 30% (upload done) to 100%
+    const percent = Math.round(30 + (data.percent || 0) * 0.7);
+    
+    // Update the UI based on the current step
+    switch (data.current_step) {
+        case 'queued':
+        case 'extract':
+        case 'merge':
+        case 'pdf':
+            updateProgressUI(percent, (data.status_text || `Traitement des fichiers (${fileCount || '?'})...`) + formatEta(data.eta_seconds), 'process');
+            break;
+            
+        case 'complete':
+            uploadStatus = 'complete';
+            updateProgressUI(100, 'Traitement terminé !', 'complete');
+            stopStatusStream();
+            showResults(data);
+            break;
+            
+        case 'error':
+            uploadStatus = 'error';
+            updateProgressUI(0, '', 'error');
+            showAlert(`Erreur : ${data.error || 'Une erreur inconnue est survenue'}`, 'danger');
+            stopStatusStream();
+            break;
+            
+        case 'cancelled':
+            uploadStatus = 'error';
+            updateProgressUI(0, '', 'error');
+            showAlert('Le traitement a été annulé.', 'warning');
+            stopStatusStream();
+            break;
+            
+        default:
+            // Unknown status
+            console.log('Statut inconnu :', data.current_step);
+    }
+}
+
+function formatEta(seconds) {
+    // Estimated time remaining, appended to the status text
+    if (seconds === undefined || seconds === null) {
+        return '';
+    }
+    if (seconds < 60) {
+        return ` (environ ${Math.max(1, seconds)} s restantes)`;
+    }
+    return ` (environ ${Math.round(seconds / 60)} min restantes)`;
+}
+
 function updateProgressUI(percent, statusText, step) {
     // Update progress bar
     progressBar.style.width = `${percent}%`;
@@ -398,7 +434,7 @@ function showResults(data) {
                                 <i class="fas fa-file-word fa-3x text-primary mb-3"></i>
                                 <h5 class="card-title">DOCX Fusionné</h5>
                                 <p class="card-text">Téléchargez le document Word fusionné</p>
-                                <a href="/download/docx" class="btn btn-primary download-button">
+                                <a href="/download/${encodeURIComponent(currentJobId)}/docx" class="btn btn-primary download-button">
                                     <i class="fas fa-download me-2"></i>Télécharger DOCX
                                 </a>
                             </div>
@@ -410,7 +446,7 @@ function showResults(data) {
                                 <i class="fas fa-file-pdf fa-3x text-danger mb-3"></i>
                                 <h5 class="card-title">PDF Fusionné</h5>
                                 <p class="card-text">Téléchargez le document PDF converti</p>
-                                <a href="/download/pdf" class="btn btn-danger download-button" ${!data.pdf_conversion_success ? 'disabled' : ''}>
+                                <a href="/download/${encodeURIComponent(currentJobId)}/pdf" class="btn btn-danger download-button" ${!data.pdf_conversion_success ? 'disabled' : ''}>
                                     <i class="fas fa-download me-2"></i>Télécharger PDF
                                 </a>
                                 ${!data.pdf_conversion_success ? '<p class="text-muted mt-2 small">La conversion PDF n\'était pas disponible</p>' : ''}
@@ -458,11 +494,8 @@ function resetApplication() {
     // Reset status
     uploadStatus = 'idle';
     
-    // Clear any intervals
-    if (statusCheckInterval) {
-        clearInterval(statusCheckInterval);
-        statusCheckInterval = null;
-    }
+    // Close the status stream
+    stopStatusStream();
     
     // Disable upload button
     document.getElementById('upload-button').disabled = true;
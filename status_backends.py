@@ -0,0 +1,415 @@
+"""
+DocxFilesMerger - Application de traitement et fusion de documents.
+Développé par MOA Digital Agency LLC (https://myoneart.com)
+Email: moa@myoneart.com
+Copyright © 2025 MOA Digital Agency LLC. Tous droits réservés.
+
+Stockage partagé des statuts des jobs (STATUS_BACKEND).
+Le bus d'événements et les fichiers status.json sont locaux à un processus
+et à une machine : avec plusieurs workers gunicorn, ou plusieurs machines,
+la requête /status d'un client peut arriver sur un worker qui n'exécute pas
+son job. Chaque statut publié est donc aussi écrit dans un stockage partagé,
+où les routes /status lisent le dernier statut d'un job :
+- file : fichiers status.json du dossier de statut (un seul worker, ou un
+  dossier partagé) ; le bus local réveille les flux du worker qui exécute
+  le job, les autres relisent le fichier quand il change
+- sqlite : table d'une base SQLite en mode WAL, partagée par les workers
+  d'une même machine, dont la version est relue périodiquement
+- postgres : table PostgreSQL et notification LISTEN/NOTIFY à chaque
+  statut, pour des workers répartis sur plusieurs machines
+
+Les connexions des stockages en base sont partagées par les threads du
+processus (requêtes, jobs, publications différées) : chaque opération en
+emprunte une au pool et la rend ensuite. Au plus STATUS_BACKEND_POOL_SIZE
+connexions restent ouvertes ; celles ouvertes en plus lors d'un pic sont
+fermées après usage.
+"""
+
+import os
+import json
+import time
+import queue
+import select
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from status_events import get_event_bus
+
+# Stockage des statuts : file, sqlite ou postgres
+STATUS_BACKEND = os.environ.get('STATUS_BACKEND', 'file')
+# Chemin de la base SQLite ou DSN PostgreSQL (défaut : status.db, DATABASE_URL)
+STATUS_BACKEND_URL = os.environ.get('STATUS_BACKEND_URL', '')
+
+# Intervalle de relecture de la version d'un statut (secondes)
+SQLITE_POLL_INTERVAL = float(os.environ.get('STATUS_SQLITE_POLL_INTERVAL', '0.25'))
+# Avec PostgreSQL, les notifications réveillent les flux : relecture de secours seulement
+POSTGRES_POLL_INTERVAL = 5.0
+
+# Durée de conservation des statuts (heures)
+STATUS_RETENTION_HOURS = 24
+# Nombre de publications entre deux purges des statuts expirés
+PURGE_EVERY = 500
+# Connexions inactives gardées ouvertes par processus
+STATUS_BACKEND_POOL_SIZE = int(os.environ.get('STATUS_BACKEND_POOL_SIZE', '4'))
+
+
+def read_status_file(status_file):
+    """Contenu d'un fichier status.json, ou None s'il est absent ou illisible"""
+    try:
+        with open(status_file, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+class FileStatusBackend:
+    """Statuts lus dans les fichiers status.json (écrits par status_publisher)"""
+
+    name = 'file'
+
+    def __init__(self, bus=None):
+        self.bus = bus or get_event_bus()
+
+    def publish(self, job_id, status_data):
+        # Le fichier de statut est déjà écrit par le publicateur
+        pass
+
+    def latest(self, job_id, status_file):
+        """Dernier statut d'un job, ou None"""
+        event = self.bus.latest(job_id)
+        if event:
+            return event[1]
+        return read_status_file(status_file)
+
+    def cursor(self, job_id, status_file):
+        return FileStatusCursor(self.bus, job_id, status_file)
+
+
+class FileStatusCursor:
+    """Suivi des statuts d'un job : bus local, sinon date de modification du fichier"""
+
+    def __init__(self, bus, job_id, status_file):
+        self.bus = bus
+        self.job_id = job_id
+        self.status_file = status_file
+        self.sequence = None
+        self.mtime = None
+        self.first = True
+
+    def next(self, timeout):
+        """Statut plus récent que le précédent, ou None après timeout secondes"""
+        # Premier appel : retourner tout de suite le statut courant
+        event = self.bus.wait(self.job_id, self.sequence, timeout=0 if self.first else timeout)
+        self.first = False
+        if event:
+            self.sequence, status_data = event
+            return status_data
+
+        # Job exécuté dans un autre processus : relire son fichier s'il a changé
+        try:
+            mtime = os.path.getmtime(self.status_file)
+        except OSError:
+            mtime = None
+        if mtime != self.mtime:
+            self.mtime = mtime
+            return read_status_file(self.status_file)
+        return None
+
+
+class _DatabaseStatusBackend:
+    """
+    Statuts stockés en base avec un numéro de version par job. Les
+    sous-classes fournissent _open() et _close(conn) pour le pool de
+    connexions, _write(job_id, data) et _read(job_id) -> (version, data) ou None.
+    """
+
+    poll_interval = 1.0
+
+    def __init__(self, bus=None, pool_size=STATUS_BACKEND_POOL_SIZE):
+        self.bus = bus or get_event_bus()
+        self._published = 0
+        self._pool = queue.LifoQueue(maxsize=max(1, pool_size))
+
+    def _is_usable(self, conn):
+        return True
+
+    @contextmanager
+    def _connection(self):
+        """Connexion empruntée au pool, rendue après usage (fermée après une erreur ou si le pool est plein)"""
+        conn = None
+        while conn is None:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                conn = self._open()
+                break
+            if not self._is_usable(conn):
+                conn = None
+
+        try:
+            yield conn
+        except BaseException:
+            # État de la connexion inconnu après une erreur
+            self._close(conn)
+            raise
+
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            self._close(conn)
+
+    def publish(self, job_id, status_data):
+        self._write(job_id, json.dumps(status_data))
+        self._published += 1
+        if self._published % PURGE_EVERY == 0:
+            self._purge(time.time() - STATUS_RETENTION_HOURS * 3600)
+
+    def latest(self, job_id, status_file):
+        row = self._read(job_id)
+        if row is None:
+            # Job antérieur au stockage partagé
+            return read_status_file(status_file)
+        return json.loads(row[1])
+
+    def cursor(self, job_id, status_file):
+        return DatabaseStatusCursor(self, job_id, status_file)
+
+
+class DatabaseStatusCursor:
+    """
+    Suivi des statuts d'un job stocké en base : la version est relue à
+    chaque réveil du bus local (statut publié ou relayé dans ce processus)
+    et au moins toutes les poll_interval secondes
+    """
+
+    def __init__(self, backend, job_id, status_file):
+        self.backend = backend
+        self.job_id = job_id
+        self.status_file = status_file
+        self.version = None
+        self.sequence = None
+        self.mtime = None
+        self.first = True
+
+    def next(self, timeout):
+        """Statut plus récent que le précédent, ou None après timeout secondes"""
+        if self.first:
+            # Premier appel : retourner tout de suite le statut courant
+            self.first = False
+            event = self.backend.bus.latest(self.job_id)
+            self.sequence = event[0] if event else None
+            return self._changed()
+
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            event = self.backend.bus.wait(self.job_id, self.sequence,
+                                          timeout=max(0.0, min(self.backend.poll_interval, remaining)))
+            if event:
+                self.sequence = event[0]
+            status_data = self._changed()
+            if status_data is not None or remaining <= 0:
+                return status_data
+
+    def _changed(self):
+        row = self.backend._read(self.job_id)
+        if row is not None:
+            if row[0] == self.version:
+                return None
+            self.version = row[0]
+            return json.loads(row[1])
+
+        # Job sans statut en base (antérieur au stockage partagé) : son fichier
+        try:
+            mtime = os.path.getmtime(self.status_file)
+        except OSError:
+            mtime = None
+        if mtime == self.mtime:
+            return None
+        self.mtime = mtime
+        return read_status_file(self.status_file)
+
+
+class SQLiteStatusBackend(_DatabaseStatusBackend):
+    """Statuts partagés par les workers d'une machine (SQLite en mode WAL)"""
+
+    name = 'sqlite'
+    poll_interval = SQLITE_POLL_INTERVAL
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS statuses (
+        job_id TEXT PRIMARY KEY,
+        version INTEGER NOT NULL,
+        data TEXT NOT NULL,
+        updated_at REAL NOT NULL
+    );
+    """
+
+    def __init__(self, path, bus=None):
+        super().__init__(bus)
+        self.path = path
+        with self._connection() as conn:
+            conn.executescript(self.SCHEMA)
+
+    def _open(self):
+        # Connexion utilisée par un thread à la fois, mais pas toujours le même ; WAL pour lire pendant les écritures
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def _write(self, job_id, data):
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO statuses (job_id, version, data, updated_at) VALUES (?, 1, ?, ?)"
+                " ON CONFLICT (job_id) DO UPDATE SET version = version + 1,"
+                " data = excluded.data, updated_at = excluded.updated_at",
+                (job_id, data, time.time())
+            )
+
+    def _read(self, job_id):
+        with self._connection() as conn:
+            return conn.execute(
+                "SELECT version, data FROM statuses WHERE job_id = ?", (job_id,)).fetchone()
+
+    def _purge(self, before):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM statuses WHERE updated_at < ?", (before,))
+
+
+class PostgresStatusBackend(_DatabaseStatusBackend):
+    """
+    Statuts partagés par plusieurs machines (PostgreSQL). Chaque publication
+    envoie une notification ; un thread par processus écoute le canal et
+    republie les statuts reçus sur le bus local, ce qui réveille les flux.
+    """
+
+    name = 'postgres'
+    poll_interval = POSTGRES_POLL_INTERVAL
+    CHANNEL = 'job_status'
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS job_statuses (
+        job_id VARCHAR(100) PRIMARY KEY,
+        version BIGINT NOT NULL,
+        data TEXT NOT NULL,
+        updated_at DOUBLE PRECISION NOT NULL
+    );
+    """
+
+    def __init__(self, dsn, bus=None):
+        super().__init__(bus)
+        import psycopg2
+        self._psycopg2 = psycopg2
+        self.dsn = dsn
+        self._listener = None
+        self._listener_lock = threading.Lock()
+        self._execute(self.SCHEMA)
+
+    def _open(self):
+        conn = self._psycopg2.connect(self.dsn)
+        conn.autocommit = True
+        return conn
+
+    def _close(self, conn):
+        try:
+            conn.close()
+        except self._psycopg2.Error:
+            pass
+
+    def _is_usable(self, conn):
+        return not conn.closed
+
+    def _execute(self, query, params=(), fetch=False):
+        try:
+            with self._connection() as conn, conn.cursor() as cur:
+                cur.execute(query, params)
+                return cur.fetchone() if fetch else None
+        except self._psycopg2.OperationalError:
+            # Connexion perdue (redémarrage du serveur), fermée par le pool : une seconde tentative
+            with self._connection() as conn, conn.cursor() as cur:
+                cur.execute(query, params)
+                return cur.fetchone() if fetch else None
+
+    def _write(self, job_id, data):
+        # La notification ne porte que le job_id (charge utile limitée à 8000 octets)
+        self._execute(
+            "INSERT INTO job_statuses (job_id, version, data, updated_at) VALUES (%s, 1, %s, %s)"
+            " ON CONFLICT (job_id) DO UPDATE SET version = job_statuses.version + 1,"
+            " data = EXCLUDED.data, updated_at = EXCLUDED.updated_at;"
+            " SELECT pg_notify(%s, %s)",
+            (job_id, data, time.time(), self.CHANNEL, job_id)
+        )
+
+    def _read(self, job_id):
+        return self._execute("SELECT version, data FROM job_statuses WHERE job_id = %s",
+                             (job_id,), fetch=True)
+
+    def _purge(self, before):
+        self._execute("DELETE FROM job_statuses WHERE updated_at < %s", (before,))
+
+    def cursor(self, job_id, status_file):
+        self._start_listener()
+        return super().cursor(job_id, status_file)
+
+    def _start_listener(self):
+        with self._listener_lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name='status-listener')
+                self._listener.daemon = True
+                self._listener.start()
+
+    def _listen(self):
+        # Connexion dédiée à l'écoute du canal, rétablie en cas d'erreur
+        while True:
+            try:
+                conn = self._psycopg2.connect(self.dsn)
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(f"LISTEN {self.CHANNEL}")
+                while True:
+                    if select.select([conn], [], [], POSTGRES_POLL_INTERVAL) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        job_id = conn.notifies.pop(0).payload
+                        row = self._read(job_id)
+                        if row is not None:
+                            self.bus.publish(job_id, json.loads(row[1]))
+            except Exception as e:
+                print(f"Erreur d'écoute des statuts PostgreSQL: {str(e)}")
+                time.sleep(POSTGRES_POLL_INTERVAL)
+
+
+def create_status_backend(name=STATUS_BACKEND, url=STATUS_BACKEND_URL):
+    """Créer le stockage des statuts configuré. Lève ValueError pour un nom inconnu."""
+    if name == 'file':
+        return FileStatusBackend()
+    if name == 'sqlite':
+        return SQLiteStatusBackend(url or os.path.join(os.getcwd(), 'status.db'))
+    if name == 'postgres':
+        return PostgresStatusBackend(url or os.environ.get('DATABASE_URL'))
+    raise ValueError(f"Stockage des statuts inconnu: {name} (valeurs possibles: file, sqlite, postgres)")
+
+
+# Stockage partagé par le processus, créé au premier usage
+_status_backend = None
+_status_backend_lock = threading.Lock()
+
+
+def get_status_backend():
+    global _status_backend
+    if _status_backend is None:
+        with _status_backend_lock:
+            if _status_backend is None:
+                _status_backend = create_status_backend()
+    return _status_backend
@@ -0,0 +1,138 @@
+"""
+DocxFilesMerger - Application de traitement et fusion de documents.
+Développé par MOA Digital Agency LLC (https://myoneart.com)
+Email: moa@myoneart.com
+Copyright © 2025 MOA Digital Agency LLC. Tous droits réservés.
+
+Bus d'événements d'avancement des jobs, interne au processus.
+Chaque écriture de statut (utils.save_status) est publiée sur le bus ; le
+flux SSE /status/<job_id>/stream attend les événements du job au lieu de
+relire son fichier de statut. Seul le dernier statut de chaque job est
+conservé : un client lent saute les états intermédiaires sans retenir de
+mémoire. Un job exécuté dans un processus enfant (job_limits) transmet ses
+statuts au processus parent par un tube, qui les republie sur son bus.
+"""
+
+import os
+import json
+import threading
+from collections import OrderedDict
+
+# Nombre de jobs dont le dernier statut est conservé
+EVENT_BUS_MAX_JOBS = int(os.environ.get('EVENT_BUS_MAX_JOBS', '1000'))
+
+
+def is_final_status(status_data):
+    """Vrai pour un statut qui termine le job (terminé, en erreur ou annulé)"""
+    return bool(status_data.get('complete')) or status_data.get('current_step') in ('error', 'cancelled')
+
+
+class EventBus:
+    """Dernier statut publié de chaque job, avec attente des nouveaux statuts"""
+
+    def __init__(self, max_jobs=EVENT_BUS_MAX_JOBS):
+        self.max_jobs = max_jobs
+        self._latest = OrderedDict()
+        self._sequence = 0
+        self._condition = threading.Condition()
+        self._forward = None
+        self._send = None
+
+    def publish(self, job_id, status_data):
+        """Publier le statut d'un job et réveiller les clients qui l'attendent"""
+        if not job_id:
+            return
+        with self._condition:
+            self._sequence += 1
+            self._latest[job_id] = (self._sequence, status_data)
+            self._latest.move_to_end(job_id)
+            while len(self._latest) > self.max_jobs:
+                self._latest.popitem(last=False)
+            self._condition.notify_all()
+        if self._forward is not None:
+            self._forward(job_id, status_data)
+
+    def latest(self, job_id):
+        """Dernier (numéro, statut) publié pour job_id, ou None"""
+        with self._condition:
+            return self._latest.get(job_id)
+
+    def wait(self, job_id, after=None, timeout=None):
+        """
+        Attendre un statut de job_id plus récent que le numéro after (None :
+        le dernier publié). Retourne (numéro, statut), ou None à l'expiration
+        du délai.
+        """
+        def newer():
+            event = self._latest.get(job_id)
+            if event and (after is None or event[0] > after):
+                return event
+            return None
+
+        with self._condition:
+            return self._condition.wait_for(newer, timeout)
+
+    def forward_to(self, fd):
+        """Transmettre aussi chaque statut publié, en JSON, sur le descripteur fd (processus enfant)"""
+        stream = os.fdopen(fd, 'w', buffering=1, encoding='utf-8')
+        lock = threading.Lock()
+
+        def forward(job_id, status_data):
+            self._send_to(stream, lock, {'job_id': job_id, 'status': status_data})
+
+        def send(message):
+            self._send_to(stream, lock, message)
+
+        self._forward = forward
+        self._send = send
+
+    @staticmethod
+    def _send_to(stream, lock, message):
+        try:
+            with lock:
+                stream.write(json.dumps(message) + '\n')
+        except (OSError, ValueError):
+            # Processus parent arrêté : le fichier de statut reste à jour
+            pass
+
+    def send(self, message):
+        """
+        Transmettre au processus parent un message autre qu'un statut (dict
+        JSON sans clé job_id), reçu par son on_message (relay_from)
+        """
+        if self._send is not None:
+            self._send(message)
+
+    def relay_from(self, fd, on_message=None):
+        """
+        Republier les statuts transmis par un processus enfant sur le
+        descripteur fd, jusqu'à sa fermeture ; les autres messages (send)
+        sont passés à on_message. Retourne le thread de lecture.
+        """
+        def relay():
+            with os.fdopen(fd, 'r', encoding='utf-8') as stream:
+                for line in stream:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue
+                    if 'job_id' in event:
+                        self.publish(event['job_id'], event['status'])
+                    elif on_message is not None:
+                        try:
+                            on_message(event)
+                        except Exception as e:
+                            print(f"Erreur lors du traitement d'un message du processus enfant: {str(e)}")
+
+        thread = threading.Thread(target=relay, name='status-relay')
+        thread.daemon = True
+        thread.start()
+        return thread
+
+
+# Bus partagé par le processus
+_event_bus = EventBus()
+
+
+def get_event_bus():
+    return _event_bus
@@ -0,0 +1,197 @@
+"""
+DocxFilesMerger - Application de traitement et fusion de documents.
+Développé par MOA Digital Agency LLC (https://myoneart.com)
+Email: moa@myoneart.com
+Copyright © 2025 MOA Digital Agency LLC. Tous droits réservés.
+
+Publication des statuts des jobs (fichier status.json, stockage partagé des
+statuts et bus d'événements).
+Les mises à jour d'un même job sont regroupées : au plus une écriture par
+intervalle STATUS_WRITE_INTERVAL, la dernière mise à jour reçue étant
+écrite à la fin de l'intervalle. Les statuts finaux (terminé, erreur,
+annulé) sont écrits immédiatement. Chaque écriture passe par un fichier
+temporaire renommé : un lecteur ne voit jamais un fichier à moitié écrit.
+
+Le verrou du publicateur ne protège que le choix des statuts à écrire :
+les écritures (fichier, stockage partagé, bus) ont lieu après sa libération,
+sous un verrou propre au job, si bien qu'une écriture lente ne retarde pas
+les autres jobs. Chaque statut à écrire reçoit un numéro d'ordre : un
+statut dépassé par un statut plus récent du même job n'est pas écrit.
+"""
+
+import os
+import json
+import time
+import atexit
+import tempfile
+import threading
+
+from status_events import get_event_bus, is_final_status
+from status_backends import get_status_backend
+
+# Intervalle minimal entre deux écritures du statut d'un job (secondes, 0 : pas de regroupement)
+STATUS_WRITE_INTERVAL = float(os.environ.get('STATUS_WRITE_INTERVAL', '0.5'))
+
+STATUS_FILENAME = 'status.json'
+
+
+def write_status_file(status_dir, status_data):
+    """Écrire status.json de façon atomique (fichier temporaire puis renommage)"""
+    try:
+        fd, temp_path = tempfile.mkstemp(prefix='.status-', suffix='.tmp', dir=status_dir)
+    except FileNotFoundError:
+        # Premier statut du job, ou dossier supprimé entre-temps
+        os.makedirs(status_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix='.status-', suffix='.tmp', dir=status_dir)
+
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(status_data, f)
+        os.replace(temp_path, os.path.join(status_dir, STATUS_FILENAME))
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+
+class _JobWrites:
+    """Écritures d'un job : verrou, dernier numéro écrit et écritures en cours"""
+
+    __slots__ = ('lock', 'written', 'users')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.written = 0
+        self.users = 0
+
+
+class StatusPublisher:
+    """Écriture regroupée et atomique des statuts, par dossier de statut"""
+
+    # Nombre de jobs suivis au-delà duquel les jobs inactifs sont oubliés
+    MAX_TRACKED = 1000
+
+    def __init__(self, interval=STATUS_WRITE_INTERVAL, bus=None):
+        self.interval = interval
+        self.bus = bus or get_event_bus()
+        self._lock = threading.Lock()
+        self._last_write = {}
+        self._pending = {}
+        self._timers = {}
+        self._jobs = {}
+        self._sequence = 0
+
+    def publish(self, status_dir, status_data):
+        """Publier le statut d'un job, tout de suite ou à la fin de l'intervalle en cours"""
+        if not status_dir:
+            return
+
+        claim = None
+        with self._lock:
+            now = time.monotonic()
+            wait = self._last_write.get(status_dir, now - self.interval) + self.interval - now
+            if is_final_status(status_data):
+                # Statut final : écrit immédiatement, plus rien à regrouper pour ce job
+                self._discard_pending(status_dir)
+                self._last_write.pop(status_dir, None)
+                claim = self._claim(status_dir)
+            elif wait <= 0:
+                self._discard_pending(status_dir)
+                self._last_write[status_dir] = now
+                claim = self._claim(status_dir)
+                if len(self._last_write) > self.MAX_TRACKED:
+                    self._forget_idle(now)
+            else:
+                # Remplace une mise à jour en attente : seule la dernière est écrite
+                self._pending[status_dir] = status_data
+                if status_dir not in self._timers:
+                    timer = threading.Timer(wait, self._flush)
+                    timer.args = (status_dir, timer)
+                    timer.daemon = True
+                    self._timers[status_dir] = timer
+                    timer.start()
+
+        if claim is not None:
+            self._write_in_order(status_dir, status_data, *claim)
+
+    def _claim(self, status_dir):
+        # Sous self._lock : numéro d'ordre du statut à écrire
+        self._sequence += 1
+        job = self._jobs.get(status_dir)
+        if job is None:
+            job = self._jobs[status_dir] = _JobWrites()
+        job.users += 1
+        return job, self._sequence
+
+    def _write_in_order(self, status_dir, status_data, job, sequence):
+        try:
+            with job.lock:
+                # Un statut plus récent du job a déjà été écrit par un autre thread
+                if sequence > job.written:
+                    job.written = sequence
+                    self._write(status_dir, status_data)
+        finally:
+            with self._lock:
+                job.users -= 1
+                if (not job.users and status_dir not in self._last_write
+                        and status_dir not in self._pending and self._jobs.get(status_dir) is job):
+                    del self._jobs[status_dir]
+
+    def _forget_idle(self, now):
+        # Jobs sans écriture récente (terminés ailleurs, dans un processus enfant...)
+        self._last_write = {status_dir: written for status_dir, written in self._last_write.items()
+                            if now - written < self.interval or status_dir in self._pending}
+        self._jobs = {status_dir: job for status_dir, job in self._jobs.items()
+                      if job.users or status_dir in self._last_write or status_dir in self._pending}
+
+    def _discard_pending(self, status_dir):
+        self._pending.pop(status_dir, None)
+        timer = self._timers.pop(status_dir, None)
+        if timer is not None:
+            timer.cancel()
+
+    def _flush(self, status_dir, timer=None):
+        with self._lock:
+            if timer is not None and self._timers.get(status_dir) is not timer:
+                # Minuterie annulée pendant son déclenchement
+                return
+            self._timers.pop(status_dir, None)
+            status_data = self._pending.pop(status_dir, None)
+            if status_data is None:
+                return
+            self._last_write[status_dir] = time.monotonic()
+            claim = self._claim(status_dir)
+        self._write_in_order(status_dir, status_data, *claim)
+
+    def flush_all(self):
+        """Écrire toutes les mises à jour en attente (arrêt du processus)"""
+        with self._lock:
+            status_dirs = list(self._timers)
+        for status_dir in status_dirs:
+            self._flush(status_dir)
+
+    def _write(self, status_dir, status_data):
+        try:
+            write_status_file(status_dir, status_data)
+        except Exception as e:
+            print(f"Erreur lors de la sauvegarde du statut: {str(e)}")
+
+        # Le dossier de statut porte le nom du job
+        job_id = os.path.basename(os.path.normpath(status_dir))
+
+        # Stockage partagé avant le bus : un flux réveillé par le bus y lit déjà ce statut
+        try:
+            get_status_backend().publish(job_id, status_data)
+        except Exception as e:
+            print(f"Erreur lors de la publication du statut: {str(e)}")
+
+        self.bus.publish(job_id, status_data)
+
+
+# Publicateur partagé par le processus
+_status_publisher = StatusPublisher()
+atexit.register(_status_publisher.flush_all)
+
+
+def get_status_publisher():
+    return _status_publisher
@@ -0,0 +1,92 @@
+"""
+Tests de la rétention des jobs en base (job_retention.py)
+
+Développé par MOA Digital Agency LLC (https://myoneart.com)
+Email: moa@myoneart.com
+Copyright © 2025 MOA Digital Agency LLC. Tous droits réservés.
+"""
+
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from database import db_session
+from models import db, ProcessingJob, StageTiming, JobStatusCount, UsageRollup
+from job_retention import purge_old_jobs
+
+
+def add_jobs(statuses, age_days):
+    """Créer un job par état, créé il y a age_days jours, avec une mesure d'étape"""
+    created_at = datetime.utcnow() - timedelta(days=age_days)
+    job_ids = []
+    with db_session() as session:
+        for index, status in enumerate(statuses):
+            job_id = f"{status}-{age_days}-{index}"
+            session.add(ProcessingJob(job_id=job_id, status=status, file_count=2, created_at=created_at))
+            session.add(StageTiming(job_id=job_id, stage='total', seconds=1.0))
+            job_ids.append(job_id)
+        session.commit()
+    return job_ids
+
+
+def remaining_jobs():
+    with db_session():
+        return {job.job_id for job in ProcessingJob.query.all()}
+
+
+def status_counts_match():
+    """Vrai si JobStatusCount décrit exactement le contenu de processing_jobs"""
+    with db_session() as session:
+        real = dict(session.query(ProcessingJob.status, db.func.count(ProcessingJob.id))
+                    .group_by(ProcessingJob.status).all())
+        counted = {row.status: row.count for row in JobStatusCount.query.all() if row.count}
+    return real == counted
+
+
+def test_purge_old_finished_jobs_in_batches(database, tmp_path):
+    old = add_jobs(['completed', 'error', 'cancelled', 'uploaded', 'processing'] * 3, age_days=40)
+    recent = add_jobs(['completed', 'error'], age_days=1)
+    with db_session() as session:
+        session.add(UsageRollup(hour=datetime.now().replace(minute=0, second=0, microsecond=0) - timedelta(days=60),
+                                total_jobs=1, total_files_processed=1, total_processing_time=1.0))
+        session.commit()
+    archive_path = tmp_path / 'archive.jsonl'
+
+    deleted = purge_old_jobs(retention_days=30, batch_size=4, archive_path=str(archive_path))
+
+    assert deleted == 12
+    kept_old = {job_id for job_id in old if job_id.startswith('processing-')}
+    assert remaining_jobs() == kept_old | set(recent)
+    assert status_counts_match()
+    with db_session():
+        assert {timing.job_id for timing in StageTiming.query.all()} == kept_old | set(recent)
+        assert UsageRollup.query.count() == 0
+
+    archived = [json.loads(line) for line in archive_path.read_text(encoding='utf-8').splitlines()]
+    assert sorted(record['job_id'] for record in archived) == sorted(set(old) - kept_old)
+    assert all('archived_at' in record for record in archived)
+
+
+def test_failed_commit_archives_nothing(database, tmp_path, monkeypatch):
+    old = add_jobs(['completed', 'error'], age_days=40)
+    archive_path = tmp_path / 'archive.jsonl'
+
+    def failing_commit(self):
+        raise RuntimeError("base indisponible")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(Session, 'commit', failing_commit)
+        assert purge_old_jobs(retention_days=30, archive_path=str(archive_path)) == 0
+    assert remaining_jobs() == set(old)
+    assert not archive_path.exists() or archive_path.read_text() == ''
+
+    # Passe suivante : chaque job archivé une seule fois
+    assert purge_old_jobs(retention_days=30, archive_path=str(archive_path)) == 2
+    assert len(archive_path.read_text(encoding='utf-8').splitlines()) == 2
+
+
+def test_no_retention_limit_keeps_everything(database):
+    old = add_jobs(['completed'], age_days=400)
+    assert purge_old_jobs(retention_days=0) == 0
+    assert remaining_jobs() == set(old)
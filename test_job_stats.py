@@ -0,0 +1,50 @@
+"""
+Tests des totaux du tableau de bord (job_stats.py, écouteurs de models.py)
+
+Développé par MOA Digital Agency LLC (https://myoneart.com)
+Email: moa@myoneart.com
+Copyright © 2025 MOA Digital Agency LLC. Tous droits réservés.
+"""
+
+from sqlalchemy import event
+
+from database import db_session
+from models import db, ProcessingJob
+from job_stats import dashboard_stats
+
+
+def test_job_stats_count_only_finished_jobs(database):
+    stats_updates = []
+
+    def count_stats_updates(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('UPDATE job_stats'):
+            stats_updates.append(statement)
+
+    with db_session() as session:
+        event.listen(db.engine, 'before_cursor_execute', count_stats_updates)
+        try:
+            job = ProcessingJob(job_id='en-cours', status='uploaded')
+            session.add(job)
+            session.commit()
+            job.status = 'processing'
+            job.file_count = 4
+            session.commit()
+            # Écritures d'un job en cours : la ligne des totaux n'est pas touchée
+            assert stats_updates == []
+            assert dashboard_stats()['total_jobs'] == 0
+
+            job.status = 'completed'
+            job.processing_time = 6
+            session.commit()
+            assert len(stats_updates) == 1
+            assert dashboard_stats() == {'total_jobs': 1, 'total_files': 4, 'avg_time': 6}
+
+            session.add(ProcessingJob(job_id='en-erreur', status='error', file_count=2))
+            session.commit()
+            assert dashboard_stats() == {'total_jobs': 2, 'total_files': 6, 'avg_time': 6}
+
+            session.delete(job)
+            session.commit()
+            assert dashboard_stats() == {'total_jobs': 1, 'total_files': 2, 'avg_time': 0}
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', count_stats_updates)
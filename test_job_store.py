@@ -0,0 +1,108 @@
+"""
+Tests de la file d'attente durable des traitements (job_store.py)
+
+Développé par MOA Digital Agency LLC (https://myoneart.com)
+Email: moa@myoneart.com
+Copyright © 2025 MOA Digital Agency LLC. Tous droits réservés.
+"""
+
+import time
+import socket
+import subprocess
+import sys
+
+from job_store import (JobStore, STALE_AFTER, STATE_QUEUED, STATE_RUNNING, STATE_COMPLETED,
+                       STATE_FAILED, STATE_CANCELLED)
+
+
+def dead_owner():
+    """Propriétaire désignant un processus de cet hôte déjà terminé"""
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return f"{socket.gethostname()}:{process.pid}"
+
+
+def test_job_lifecycle_and_checkpoints(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.db'))
+    store.enqueue('job-1', 'process', args=('archive.zip', 'out'), kwargs={'outputs': ['docx']})
+
+    job = store.get('job-1')
+    assert job.state == STATE_QUEUED
+    assert job.owner == store.owner
+    assert job.args == ('archive.zip', 'out')
+    assert job.kwargs == {'outputs': ['docx']}
+
+    store.start('job-1')
+    store.checkpoint('job-1', 'extract', {'files': ['a.docx']})
+    store.checkpoint('job-1', 'merge', {'docx': 'merged.docx'})
+    assert store.get('job-1').state == STATE_RUNNING
+    assert store.get('job-1').attempts == 1
+    assert store.checkpoints('job-1') == {'extract': {'files': ['a.docx']}, 'merge': {'docx': 'merged.docx'}}
+
+    store.finish('job-1', success=False)
+    assert store.get('job-1').state == STATE_FAILED
+
+    # Nouvelle soumission : les points de reprise précédents sont effacés
+    store.enqueue('job-1', 'process')
+    assert store.checkpoints('job-1') == {}
+
+
+def test_cancelled_job_stays_cancelled(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.db'))
+    store.enqueue('job-1', 'process')
+    store.cancel('job-1')
+    store.start('job-1')
+    store.finish('job-1')
+    job = store.get('job-1')
+    assert job.state == STATE_CANCELLED
+    assert job.attempts == 0
+
+
+def test_claim_orphans_of_dead_process(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    previous = JobStore(path)
+    previous.owner = dead_owner()
+    previous.enqueue('orphan', 'process')
+    previous.start('orphan')
+
+    store = JobStore(path)
+    claimed = store.claim_orphans()
+    assert [job.job_id for job in claimed] == ['orphan']
+    assert claimed[0].owner == store.owner
+    assert claimed[0].state == STATE_QUEUED
+    # Déjà réclamé : ni ce processus ni un autre ne le reprend une seconde fois
+    assert store.claim_orphans() == []
+    assert JobStore(path).claim_orphans() == []
+
+
+def test_claim_orphans_waits_for_stale_heartbeat(tmp_path):
+    path = str(tmp_path / 'jobs.db')
+    remote = JobStore(path)
+    remote.owner = 'autre-hote:1234'
+    remote.enqueue('remote', 'process')
+
+    store = JobStore(path)
+    # Propriétaire sur un autre hôte, signal de vie récent : job laissé à son propriétaire
+    assert store.claim_orphans() == []
+
+    store._connect().execute("UPDATE jobs SET heartbeat_at = ? WHERE job_id = 'remote'",
+                             (time.time() - STALE_AFTER - 1,))
+    assert [job.job_id for job in store.claim_orphans()] == ['remote']
+
+
+def test_purge_removes_old_finished_jobs(tmp_path):
+    store = JobStore(str(tmp_path / 'jobs.db'))
+    for job_id in ('old-done', 'old-running', 'recent-done'):
+        store.enqueue(job_id, 'process')
+        store.checkpoint(job_id, 'extract')
+    store.finish('old-done')
+    store.start('old-running')
+    store.finish('recent-done')
+    store._connect().execute("UPDATE jobs SET updated_at = ? WHERE job_id LIKE 'old-%'",
+                             (time.time() - 48 * 3600,))
+
+    store.purge(max_age_hours=24)
+    assert store.get('old-done') is None
+    assert store.checkpoints('old-done') == {}
+    assert store.get('old-running').state == STATE_RUNNING
+    assert store.get('recent-done').state == STATE_COMPLETED
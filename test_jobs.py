@@ -0,0 +1,111 @@
+"""
+Tests de l'ordonnanceur des traitements (jobs.py)
+
+Développé par MOA Digital Agency LLC (https://myoneart.com)
+Email: moa@myoneart.com
+Copyright © 2025 MOA Digital Agency LLC. Tous droits réservés.
+"""
+
+import time
+import threading
+
+import pytest
+
+from cancellation import check_cancelled
+from jobs import JobScheduler, QueueFullError, job_work, BYTES_PER_WORK_UNIT
+
+
+def start_blocking_job(scheduler, job_id, release, size=None):
+    """Soumettre un job qui occupe un worker jusqu'à release.set()"""
+    started = threading.Event()
+    scheduler.submit(job_id, release.wait, on_start=lambda _: started.set(), size=size)
+    assert started.wait(5)
+
+
+def test_job_work():
+    assert job_work(None) is None
+    assert job_work((10, 0)) == 10
+    assert job_work((10, 2 * BYTES_PER_WORK_UNIT)) == 12
+    # Part des étapes exécutées
+    assert job_work((10, 0, 0.5)) == 5
+    # Au moins une unité, même pour une archive vide
+    assert job_work((0, 0)) == 1
+
+
+def test_queue_full_raises_with_position_and_retry_delay():
+    scheduler = JobScheduler(workers=1, max_queue=1)
+    release = threading.Event()
+    try:
+        start_blocking_job(scheduler, 'running', release)
+        assert scheduler.submit('queued', lambda: None) == 1
+
+        with pytest.raises(QueueFullError) as error:
+            scheduler.submit('rejected', lambda: None)
+        assert error.value.position == 2
+        assert error.value.retry_after >= 1
+        assert scheduler.position('rejected') is None
+    finally:
+        release.set()
+
+
+def test_shortest_job_runs_first():
+    scheduler = JobScheduler(workers=1, max_queue=5, aging=0)
+    release = threading.Event()
+    order = []
+    try:
+        start_blocking_job(scheduler, 'running', release)
+        scheduler.submit('large', order.append, args=('large',), size=(1000, 0))
+        scheduler.submit('small', order.append, args=('small',), size=(1, 0))
+        assert scheduler.position('small') == 1
+        assert scheduler.position('large') == 2
+    finally:
+        release.set()
+
+    deadline = time.time() + 5
+    while len(order) < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    assert order == ['small', 'large']
+
+
+def test_large_jobs_leave_a_worker_for_small_jobs():
+    scheduler = JobScheduler(workers=2, max_queue=5, large_job_seconds=10)
+    release = threading.Event()
+    try:
+        start_blocking_job(scheduler, 'large-1', release, size=(1000, 0))
+        scheduler.submit('large-2', release.wait, size=(1000, 0))
+        # Un worker est libre, mais il reste réservé aux petits jobs
+        assert scheduler.position('large-2') == 1
+
+        start_blocking_job(scheduler, 'small', release, size=(1, 0))
+        stats = scheduler.stats()
+        assert stats['running'] == 2
+        assert stats['running_large'] == 1
+        assert stats['queued_large'] == 1
+    finally:
+        release.set()
+
+
+def test_cancel_queued_and_running_jobs():
+    scheduler = JobScheduler(workers=1, max_queue=5)
+    started = threading.Event()
+    stopped = threading.Event()
+
+    def cancellable():
+        started.set()
+        try:
+            while True:
+                check_cancelled()
+                time.sleep(0.01)
+        finally:
+            stopped.set()
+
+    scheduler.submit('running', cancellable)
+    assert started.wait(5)
+    scheduler.submit('queued', lambda: None)
+
+    assert scheduler.cancel('queued') == 'dequeued'
+    assert scheduler.cancel('running') == 'running'
+    # Place rendue au pool sans attendre la fin de l'annulation
+    assert scheduler.stats()['running'] == 0
+    assert stopped.wait(5)
+    assert scheduler.cancel('running') is None
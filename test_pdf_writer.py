@@ -0,0 +1,64 @@
+"""
+Tests de la concaténation native de PDF (pdf_writer.py)
+
+Développé par MOA Digital Agency LLC (https://myoneart.com)
+Email: moa@myoneart.com
+Copyright © 2025 MOA Digital Agency LLC. Tous droits réservés.
+"""
+
+import pytest
+
+pytest.importorskip('reportlab')
+from reportlab.pdfgen import canvas
+
+from pdf_writer import PdfReader, PdfError, PdfName, concatenate_pdfs
+
+
+def create_test_pdf(path, pages):
+    """Crée un PDF de pages pages (reportlab)"""
+    pdf = canvas.Canvas(str(path))
+    for page in range(pages):
+        pdf.drawString(100, 750, f"{path.stem} - page {page + 1}")
+        pdf.showPage()
+    pdf.save()
+    return str(path)
+
+
+def test_concatenate_pages_and_outline(tmp_path):
+    first = create_test_pdf(tmp_path / 'premier.pdf', 1)
+    second = create_test_pdf(tmp_path / 'second.pdf', 2)
+    output = str(tmp_path / 'merged.pdf')
+
+    entries = concatenate_pdfs([(first, 'Premier'), (second, 'Second')], output)
+    assert entries == [
+        {'title': 'Premier', 'first_page': 0, 'page_count': 1},
+        {'title': 'Second', 'first_page': 1, 'page_count': 2},
+    ]
+
+    reader = PdfReader(output)
+    assert len(reader.pages()) == 3
+    catalog = reader.resolve(reader.trailer['Root'])
+    outline = reader.resolve(catalog['Outlines'])
+    assert int(outline['Count']) == 2
+    assert catalog['PageMode'] == PdfName('UseOutlines')
+
+
+def test_part_without_title_has_no_outline_entry(tmp_path):
+    first = create_test_pdf(tmp_path / 'premier.pdf', 1)
+    second = create_test_pdf(tmp_path / 'second.pdf', 1)
+    output = str(tmp_path / 'merged.pdf')
+
+    concatenate_pdfs([(first, None), (second, 'Second')], output)
+    reader = PdfReader(output)
+    assert len(reader.pages()) == 2
+    outline = reader.resolve(reader.resolve(reader.trailer['Root'])['Outlines'])
+    assert int(outline['Count']) == 1
+
+
+def test_invalid_part_raises_pdf_error(tmp_path):
+    first = create_test_pdf(tmp_path / 'premier.pdf', 1)
+    invalid = tmp_path / 'invalide.pdf'
+    invalid.write_bytes(b'ceci n\'est pas un PDF')
+
+    with pytest.raises(PdfError):
+        concatenate_pdfs([(first, 'Premier'), (str(invalid), 'Invalide')], str(tmp_path / 'merged.pdf'))
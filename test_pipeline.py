@@ -0,0 +1,95 @@
+"""
+Tests du pipeline extraction -> conversion -> fusion (pipeline.py)
+
+Développé par MOA Digital Agency LLC (https://myoneart.com)
+Email: moa@myoneart.com
+Copyright © 2025 MOA Digital Agency LLC. Tous droits réservés.
+"""
+
+import time
+import random
+import threading
+
+import pytest
+
+from cancellation import CancelToken, JobCancelled, cancel_scope
+from pipeline import run_pipeline, PipelineError
+
+
+def test_results_are_consumed_in_source_order():
+    consumed = []
+
+    def convert(item):
+        # Conversions terminées dans le désordre
+        time.sleep(random.random() * 0.01)
+        return item * 10
+
+    total = run_pipeline(range(50), convert, lambda index, item, result: consumed.append((index, item, result)),
+                         workers=4, queue_size=2)
+    assert total == 50
+    assert consumed == [(index, index, index * 10) for index in range(50)]
+
+
+def test_failed_conversion_gives_none():
+    consumed = []
+
+    def convert(item):
+        if item == 2:
+            raise ValueError("document illisible")
+        return item
+
+    run_pipeline(range(4), convert, lambda index, item, result: consumed.append(result), workers=2)
+    assert consumed == [0, 1, None, 3]
+
+
+def test_source_error_raises_pipeline_error():
+    consumed = []
+
+    def source():
+        yield 'a.docx'
+        raise OSError("archive corrompue")
+
+    with pytest.raises(PipelineError, match="archive corrompue"):
+        run_pipeline(source(), lambda item: item, lambda index, item, result: consumed.append(item))
+    assert consumed == ['a.docx']
+
+
+def test_backpressure_bounds_items_in_flight():
+    extracted = []
+    lock = threading.Lock()
+    in_flight = []
+
+    def source():
+        for index in range(40):
+            with lock:
+                extracted.append(index)
+            yield index
+
+    def consume(index, item, result):
+        # Fusion lente : l'extraction doit attendre
+        time.sleep(0.005)
+        with lock:
+            in_flight.append(len(extracted) - index)
+
+    run_pipeline(source(), lambda item: item, consume, workers=2, queue_size=3)
+    # File d'extraction + workers + élément en cours de production
+    assert max(in_flight) <= 3 + 2 + 1
+
+
+def test_cancellation_stops_the_pipeline():
+    token = CancelToken()
+    consumed = []
+
+    def source():
+        for index in range(1000):
+            yield index
+
+    def consume(index, item, result):
+        consumed.append(item)
+        if index == 5:
+            token.cancel()
+
+    with cancel_scope(token):
+        with pytest.raises(JobCancelled):
+            run_pipeline(source(), lambda item: item, consume, workers=2, queue_size=2)
+    assert len(consumed) < 1000
@@ -0,0 +1,58 @@
+"""
+Tests des statistiques d'utilisation (usage_stats.py)
+
+Développé par MOA Digital Agency LLC (https://myoneart.com)
+Email: moa@myoneart.com
+Copyright © 2025 MOA Digital Agency LLC. Tous droits réservés.
+"""
+
+from datetime import datetime
+
+from database import get_db_writer, db_session
+from models import UsageStat, UsageRollup, JobStatusCount, increment_row
+from usage_stats import UsageAggregator
+
+
+def read_counters(model, key_name):
+    with db_session():
+        return {getattr(row, key_name): (row.total_jobs, row.total_files_processed, row.total_processing_time)
+                for row in model.query.all()}
+
+
+def test_aggregated_counters_are_added_to_existing_rows(database):
+    aggregator = UsageAggregator(interval=3600)
+    morning = datetime(2025, 3, 14, 9, 15)
+    afternoon = datetime(2025, 3, 14, 15, 40)
+
+    aggregator.add(morning, file_count=3, processing_time=2.5)
+    aggregator.add(afternoon, file_count=5, processing_time=4.0)
+    aggregator.flush()
+    assert get_db_writer().flush(timeout=10)
+
+    assert read_counters(UsageStat, 'date') == {morning.date(): (2, 8, 6.5)}
+    assert read_counters(UsageRollup, 'hour') == {
+        datetime(2025, 3, 14, 9): (1, 3, 2.5),
+        datetime(2025, 3, 14, 15): (1, 5, 4.0),
+    }
+
+    # Second passage : incrément des lignes existantes, sans doublon
+    aggregator.add(morning, file_count=1, processing_time=1.0)
+    aggregator.flush()
+    assert get_db_writer().flush(timeout=10)
+    assert read_counters(UsageStat, 'date') == {morning.date(): (3, 9, 7.5)}
+    assert read_counters(UsageRollup, 'hour')[datetime(2025, 3, 14, 9)] == (2, 4, 3.5)
+
+
+def test_flush_without_counters_writes_nothing(database):
+    UsageAggregator(interval=3600).flush()
+    assert get_db_writer().flush(timeout=10)
+    assert read_counters(UsageStat, 'date') == {}
+
+
+def test_increment_row_creates_then_increments(database):
+    with db_session() as session:
+        table = JobStatusCount.__table__
+        increment_row(session, table, 'status', 'archived', {'count': 2})
+        increment_row(session, table, 'status', 'archived', {'count': 3})
+        session.commit()
+        assert session.get(JobStatusCount, 'archived').count == 5
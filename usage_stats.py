@@ -0,0 +1,95 @@
+"""
+DocxFilesMerger - Application de traitement et fusion de documents.
+Développé par MOA Digital Agency LLC (https://myoneart.com)
+Email: moa@myoneart.com
+Copyright © 2025 MOA Digital Agency LLC. Tous droits réservés.
+
+Statistiques d'utilisation (UsageStat par jour, UsageRollup par heure).
+Les compteurs des jobs terminés sont cumulés en mémoire puis écrits toutes
+les USAGE_FLUSH_INTERVAL secondes, par la file d'écriture différée, avec
+un seul INSERT ... ON CONFLICT DO UPDATE par jour et par heure : l'ajout
+est fait par la base elle-même, sans lecture préalable, si bien que des
+jobs terminés en même temps dans plusieurs processus ne perdent aucun
+incrément.
+"""
+
+import os
+import atexit
+import threading
+
+from database import get_db_writer, ensure_indexes
+from models import UsageStat, UsageRollup, increment_row
+
+# Intervalle d'écriture des compteurs cumulés (secondes)
+USAGE_FLUSH_INTERVAL = float(os.environ.get('USAGE_FLUSH_INTERVAL', '10'))
+
+COUNTERS = ('total_jobs', 'total_files_processed', 'total_processing_time')
+
+# Index uniques requis par ON CONFLICT, ajoutés aux tables créées avant eux
+UNIQUE_INDEXES = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_usage_stats_date ON usage_stats (date)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_usage_rollups_hour ON usage_rollups (hour)",
+)
+
+
+def ensure_usage_indexes(session):
+    """Créer les index uniques des statistiques sur une base existante"""
+    ensure_indexes(session, UNIQUE_INDEXES)
+
+
+def increment(session, model, key_name, key, counts):
+    """Ajouter counts (dans l'ordre de COUNTERS) à la ligne key de model, créée au besoin"""
+    increment_row(session, model.__table__, key_name, key, dict(zip(COUNTERS, counts)))
+
+
+class UsageAggregator:
+    """Compteurs d'utilisation cumulés en mémoire, par jour et par heure"""
+
+    def __init__(self, interval=USAGE_FLUSH_INTERVAL):
+        self.interval = interval
+        self._daily = {}
+        self._hourly = {}
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def add(self, when, file_count, processing_time, jobs=1):
+        """Compter un job terminé à when (datetime)"""
+        counts = (jobs, file_count, processing_time)
+        day = when.date()
+        hour = when.replace(minute=0, second=0, microsecond=0)
+        with self._lock:
+            for pending, key in ((self._daily, day), (self._hourly, hour)):
+                previous = pending.get(key, (0, 0, 0))
+                pending[key] = tuple(total + count for total, count in zip(previous, counts))
+            if self._timer is None:
+                self._timer = threading.Timer(self.interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Écrire les compteurs cumulés (écriture différée)"""
+        with self._lock:
+            daily, hourly = self._daily, self._hourly
+            self._daily, self._hourly = {}, {}
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not daily and not hourly:
+            return
+
+        def write(session):
+            for day, counts in daily.items():
+                increment(session, UsageStat, 'date', day, counts)
+            for hour, counts in hourly.items():
+                increment(session, UsageRollup, 'hour', hour, counts)
+
+        get_db_writer().submit(write)
+
+
+# Compteurs du processus, écrits avant l'arrêt (avant la file d'écriture)
+_usage_aggregator = UsageAggregator()
+atexit.register(lambda: get_usage_aggregator().flush())
+
+
+def get_usage_aggregator():
+    return _usage_aggregator
@@ -1,16 +1,28 @@
 import os
 import shutil
 import zipfile
-import json
 import time
 import threading
 import traceback
+from contextlib import nullcontext
 from datetime import datetime, timedelta
 from pathlib import Path
-import subprocess
 import sys
 import tempfile
 
+from converters import convert, render_pdf_parallel, without_exploration, TASK_DOC_TO_DOCX, TASK_DOCX_TO_PDF
+from pipeline import run_pipeline, PIPELINE_WORKERS, PIPELINE_QUEUE_SIZE
+from job_store import get_job_store
+from cancellation import CancelToken, JobCancelled, cancel_scope, current_cancel_token
+from job_outputs import (OUTPUT_DOCX, INTERMEDIATES_KEEP, STAGE_EXTRACT, STAGE_CONVERT,
+                         STAGE_MERGE, STAGE_PDF, StageProgress, parse_outputs, parse_intermediates,
+                         planned_stages, stage_share, should_delete_intermediates)
+from deadline import Deadline
+from eta import EtaTracker, load_throughput_model
+from database import update_job, record_completed_job
+from status_publisher import get_status_publisher
+from config_cache import get_setting
+
 # Import des bibliothèques de traitement de documents
 try:
     import docx
@@ -19,113 +31,148 @@ except ImportError:
     print("Bibliothèque python-docx non installée. Certaines fonctionnalités peuvent ne pas fonctionner correctement.")
 
 def save_status(status_dir, status_data):
-    """Save processing status to a JSON file"""
-    if not status_dir:
-        return
+    """
+    Save processing status to a JSON file, and publish it on the event bus
+    of the process. Updates are coalesced to one write per
+    STATUS_WRITE_INTERVAL; final states are written at once (see
+    status_publisher).
+    """
+    get_status_publisher().publish(status_dir, status_data)
 
-    os.makedirs(status_dir, exist_ok=True)
-    status_file = os.path.join(status_dir, 'status.json')
-    
+def _is_doc_entry(file_info):
+    # Ignorer les dossiers, garder les fichiers .doc et .docx
+    return (not file_info.filename.endswith('/')
+            and file_info.filename.lower().endswith(('.doc', '.docx')))
+
+def list_doc_entries(zip_path):
+    """List the .doc and .docx entries of a zip file, in archive order"""
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        return [file_info.filename for file_info in zip_ref.infolist() if _is_doc_entry(file_info)]
+
+def list_doc_entry_sizes(zip_path):
+    """List the .doc and .docx entries of a zip file with their uncompressed size, in archive order"""
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        return [(file_info.filename, file_info.file_size) for file_info in zip_ref.infolist()
+                if _is_doc_entry(file_info)]
+
+def stage_workload(stages, entry_sizes):
+    """
+    Volume handled by each of stages, as (documents, uncompressed bytes),
+    for the ETA: every document goes through extraction, merge and PDF
+    rendering, only the .doc ones through conversion
+    """
+    total = (len(entry_sizes), sum(size for _, size in entry_sizes))
+    doc_sizes = [size for entry, size in entry_sizes if entry.lower().endswith('.doc')]
+    volumes = {
+        STAGE_EXTRACT: total,
+        STAGE_CONVERT: (len(doc_sizes), sum(doc_sizes)),
+        STAGE_MERGE: total,
+        STAGE_PDF: total
+    }
+    return {stage: volumes[stage] for stage in stages}
+
+def files_size(paths):
+    """Total size in bytes of the existing files among paths"""
+    return sum(os.path.getsize(path) for path in paths if path and os.path.exists(path))
+
+def archive_size(zip_path):
+    """
+    Pre-scan a zip file without extracting it: return (number of .doc/.docx
+    entries, total uncompressed bytes of those entries), or None if the
+    archive cannot be read
+    """
     try:
-        with open(status_file, 'w') as f:
-            json.dump(status_data, f)
-    except Exception as e:
-        print(f"Erreur lors de la sauvegarde du statut: {str(e)}")
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+            entries = [file_info for file_info in zip_ref.infolist() if _is_doc_entry(file_info)]
+    except (OSError, zipfile.BadZipFile) as e:
+        print(f"Erreur lors de l'analyse de l'archive {zip_path}: {str(e)}")
+        return None
+    return len(entries), sum(file_info.file_size for file_info in entries)
 
-def extract_doc_files(zip_path, extract_dir):
-    """Extract all .doc and .docx files from a zip file"""
+def stored_job_size(stored_job):
+    """
+    Size of a job of the durable job store for the scheduler, or None:
+    (documents, uncompressed bytes, share of a full job run by its stages)
+    """
+    if stored_job is None or stored_job.func != 'run_processing' or not stored_job.args:
+        return None
+    size = archive_size(stored_job.args[0])
+    if size is None:
+        return None
+    try:
+        stages = planned_stages(parse_outputs(stored_job.kwargs.get('outputs')),
+                                stored_job.kwargs.get('pdf_on_demand', False))
+    except ValueError:
+        return size
+    return size + (stage_share(stages),)
+
+def iter_doc_files(zip_path, extract_dir, entries=None):
+    """
+    Extract the .doc and .docx files of a zip file one by one, yielding the
+    path of each file as soon as it is written
+    
+    Files are flattened into extract_dir. Two entries with the same name
+    (ignoring the extension, since a .doc becomes a .docx once converted)
+    get distinct names so that no file overwrites another.
+    """
     # Créer le dossier d'extraction s'il n'existe pas
     os.makedirs(extract_dir, exist_ok=True)
     
-    # Liste pour stocker les chemins vers les fichiers extraits
-    extracted_files = []
-    
     # Ouvrir le fichier ZIP
     with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-        # Parcourir tous les fichiers dans le ZIP
-        for file_info in zip_ref.infolist():
-            # Ignorer les dossiers
-            if file_info.filename.endswith('/'):
-                continue
-            
-            # Vérifier si le fichier est un .doc ou .docx
-            if file_info.filename.lower().endswith(('.doc', '.docx')):
-                # Extraire uniquement le nom du fichier sans les dossiers
-                filename = os.path.basename(file_info.filename)
-                # Créer un chemin de destination
-                dest_path = os.path.join(extract_dir, filename)
-                
-                # Extraire le fichier
-                with zip_ref.open(file_info) as source, open(dest_path, 'wb') as dest:
-                    shutil.copyfileobj(source, dest)
-                
-                # Ajouter le chemin à la liste
-                extracted_files.append(dest_path)
-    
-    return extracted_files
+        if entries is None:
+            entries = [file_info.filename for file_info in zip_ref.infolist() if _is_doc_entry(file_info)]
+        
+        used_names = set()
+        for entry in entries:
+            # Extraire uniquement le nom du fichier sans les dossiers
+            name, ext = os.path.splitext(os.path.basename(entry))
+            unique_name = name
+            suffix = 2
+            while unique_name.lower() in used_names:
+                unique_name = f"{name} ({suffix})"
+                suffix += 1
+            used_names.add(unique_name.lower())
+            
+            # Extraire le fichier
+            dest_path = os.path.join(extract_dir, unique_name + ext)
+            with zip_ref.open(entry) as source, open(dest_path, 'wb') as dest:
+                shutil.copyfileobj(source, dest)
+            
+            yield dest_path
+
+def extract_doc_files(zip_path, extract_dir):
+    """Extract all .doc and .docx files from a zip file"""
+    return list(iter_doc_files(zip_path, extract_dir))
 
 def convert_doc_to_docx(doc_path, output_dir):
     """
     Convert a .doc file to .docx format
     
-    This function attempts to use LibreOffice for conversion if available,
-    falling back to a basic document creation method if not
+    This function uses the converters detected at startup (python-docx, then
+    LibreOffice), falling back to a basic document creation method if not
     """
+    filename = os.path.basename(doc_path)
+    name_without_ext = os.path.splitext(filename)[0]
+    docx_path = os.path.join(output_dir, f"{name_without_ext}.docx")
+    
+    # Utiliser directement les convertisseurs détectés au démarrage
+    result, _ = convert(TASK_DOC_TO_DOCX, doc_path, docx_path)
+    if result:
+        return result
+    
     try:
-        # Créer une instance de Document pour vérifier le chargement
-        document = Document(doc_path)
+        # Si tout échoue, créer un document vierge avec un message
+        doc = Document()
+        doc.add_paragraph(f"Le fichier {filename} n'a pas pu être converti automatiquement.")
+        doc.add_paragraph("Veuillez consulter le fichier original.")
+        doc.save(docx_path)
         
-        # Si ça fonctionne, simplement sauvegarder en .docx
-        filename = os.path.basename(doc_path)
-        name_without_ext = os.path.splitext(filename)[0]
-        docx_path = os.path.join(output_dir, f"{name_without_ext}.docx")
-        
-        document.save(docx_path)
         return docx_path
         
-    except Exception as e:
-        print(f"Échec de la conversion directe de {doc_path}: {str(e)}")
-        
-        try:
-            # Essayer de convertir avec LibreOffice si disponible
-            # LibreOffice doit être installé sur le système
-            filename = os.path.basename(doc_path)
-            name_without_ext = os.path.splitext(filename)[0]
-            docx_path = os.path.join(output_dir, f"{name_without_ext}.docx")
-            
-            cmd = ['libreoffice', '--headless', '--convert-to', 'docx', 
-                   '--outdir', output_dir, doc_path]
-            
-            subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            
-            # Vérifier si le fichier a bien été créé
-            if os.path.exists(docx_path):
-                return docx_path
-            
-        except (subprocess.SubprocessError, FileNotFoundError) as e:
-            print(f"Échec de la conversion via LibreOffice: {str(e)}")
-            
-            try:
-                # Si tout échoue, créer un nouveau document avec le contenu
-                import docx2pdf
-                print("Tentative de conversion avec docx2pdf...")
-                
-                # Obtenir le chemin de sortie
-                filename = os.path.basename(doc_path)
-                name_without_ext = os.path.splitext(filename)[0]
-                docx_path = os.path.join(output_dir, f"{name_without_ext}.docx")
-                
-                # Créer un document vierge avec un message
-                doc = Document()
-                doc.add_paragraph(f"Le fichier {filename} n'a pas pu être converti automatiquement.")
-                doc.add_paragraph("Veuillez consulter le fichier original.")
-                doc.save(docx_path)
-                
-                return docx_path
-                
-            except Exception as inner_e:
-                print(f"Échec de la création d'un document de remplacement: {str(inner_e)}")
-                return None
+    except Exception as inner_e:
+        print(f"Échec de la création d'un document de remplacement: {str(inner_e)}")
+        return None
 
 def merge_docx_files(docx_files, output_path, status_dir):
     """
@@ -162,34 +209,45 @@ def merge_docx_files(docx_files, output_path, status_dir):
             'file_count': total_files
         })
         
-        try:
-            # Obtenir le nom du fichier
-            filename = os.path.basename(file_path)
-            
-            # Ajouter un saut de page si ce n'est pas le premier document
-            if index > 0:
-                merged_doc.add_page_break()
-            
-            # Ajouter une section d'en-tête avec le nom du fichier
-            merged_doc.add_heading(f'Document: {filename}', level=1)
-            
-            # Ouvrir le document source
-            src_doc = Document(file_path)
-            
-            # Copier tous les paragraphes
-            for paragraph in src_doc.paragraphs:
-                p = merged_doc.add_paragraph()
-                for run in paragraph.runs:
-                    p.add_run(run.text, run.style)
-            
-            # Pour les éléments plus complexes, un traitement spécifique serait nécessaire
-            # (tableaux, images, etc.)
-            
-        except Exception as e:
-            print(f"Erreur lors de la fusion du fichier {file_path}: {str(e)}")
-            # Ajouter un paragraphe d'erreur
-            merged_doc.add_paragraph(f"Erreur lors de la fusion du fichier {filename}: {str(e)}")
+        append_docx_file(merged_doc, file_path, index)
+    
+    return save_merged_docx(merged_doc, output_path, status_dir)
+
+def append_docx_file(merged_doc, file_path, index):
+    """
+    Append the content of a .docx file to merged_doc, preceded by a page
+    break (except for the first document) and a heading with the filename
+    """
+    # Obtenir le nom du fichier
+    filename = os.path.basename(file_path)
     
+    try:
+        # Ajouter un saut de page si ce n'est pas le premier document
+        if index > 0:
+            merged_doc.add_page_break()
+        
+        # Ajouter une section d'en-tête avec le nom du fichier
+        merged_doc.add_heading(f'Document: {filename}', level=1)
+        
+        # Ouvrir le document source
+        src_doc = Document(file_path)
+        
+        # Copier tous les paragraphes
+        for paragraph in src_doc.paragraphs:
+            p = merged_doc.add_paragraph()
+            for run in paragraph.runs:
+                p.add_run(run.text, run.style)
+        
+        # Pour les éléments plus complexes, un traitement spécifique serait nécessaire
+        # (tableaux, images, etc.)
+        
+    except Exception as e:
+        print(f"Erreur lors de la fusion du fichier {file_path}: {str(e)}")
+        # Ajouter un paragraphe d'erreur
+        merged_doc.add_paragraph(f"Erreur lors de la fusion du fichier {filename}: {str(e)}")
+
+def save_merged_docx(merged_doc, output_path, status_dir):
+    """Save the merged document, reporting a failure in the status file"""
     # Sauvegarder le document fusionné
     try:
         merged_doc.save(output_path)
@@ -205,15 +263,48 @@ def merge_docx_files(docx_files, output_path, status_dir):
         })
         return None
 
-def convert_docx_to_pdf(docx_path, pdf_path, status_dir):
+def render_pdf_atomically(pdf_path, render):
+    """
+    Run render(temp_path) into a temporary file next to pdf_path, then move
+    the PDF into place, so that readers never see a partially written file.
+    Returns pdf_path, another path produced by render (text fallback) or None.
+    """
+    fd, temp_path = tempfile.mkstemp(prefix='.rendering_', suffix='.pdf',
+                                     dir=os.path.dirname(os.path.abspath(pdf_path)))
+    os.close(fd)
+    try:
+        result = render(temp_path)
+        if result != temp_path:
+            return result
+        if not os.path.exists(temp_path) or os.path.getsize(temp_path) == 0:
+            return None
+        os.replace(temp_path, pdf_path)
+        return pdf_path
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def convert_docx_to_pdf(docx_path, pdf_path, status_dir, source_files=None, fidelity_floor=None, placeholder=True):
     """
     Convert a .docx file to .pdf format
     
     This function attempts multiple methods to convert the document:
-    1. libreoffice (if available)
-    2. docx2pdf library (if installed)
-    3. Basic fallback message if conversion is not possible
+    1. parallel rendering of the source files, concatenated with one
+       bookmark per document (when source_files holds several documents)
+    2. the converters detected at startup (libreoffice, docx2pdf, reportlab)
+    3. Basic fallback message if conversion is not possible (skipped when
+       placeholder is False: None is returned instead)
+    
+    docx_path may be None when only the PDF is requested: the source files
+    are then rendered without building a merged document, unless they have
+    to be merged for methods 2 and 3.
+    
+    fidelity_floor overrides the converters' fidelity floor for methods 1
+    and 2 (0 picks the fastest converter, see deadline.FAST_PDF_FIDELITY).
     """
+    if not docx_path:
+        return _convert_sources_to_pdf(source_files or [], pdf_path, status_dir, fidelity_floor)
+    
     if not os.path.exists(docx_path):
         save_status(status_dir, {
             'percent': 0,
@@ -224,47 +315,19 @@ def convert_docx_to_pdf(docx_path, pdf_path, status_dir):
         })
         return None
     
-    save_status(status_dir, {
-        'percent': 70,
-        'status_text': 'Conversion en PDF...',
-        'current_step': 'pdf',
-        'complete': False
-    })
-    
-    # Méthode 1: Essayer avec LibreOffice
-    try:
-        cmd = ['libreoffice', '--headless', '--convert-to', 'pdf', 
-               '--outdir', os.path.dirname(pdf_path), docx_path]
-        
-        subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        
-        # LibreOffice génère le PDF avec le même nom de base que l'entrée
-        generated_pdf = os.path.splitext(docx_path)[0] + '.pdf'
-        
-        # Si le chemin de sortie est différent, renommer le fichier
-        if generated_pdf != pdf_path and os.path.exists(generated_pdf):
-            shutil.move(generated_pdf, pdf_path)
-        
-        if os.path.exists(pdf_path):
+    # Méthode 1: rendu parallèle des documents sources puis concaténation native
+    if source_files and len(source_files) > 1:
+        if render_pdf_parallel(source_files, pdf_path, fidelity_floor=fidelity_floor):
             return pdf_path
-        
-    except (subprocess.SubprocessError, FileNotFoundError) as e:
-        print(f"Échec de la conversion PDF via LibreOffice: {str(e)}")
     
-    # Méthode 2: Essayer avec docx2pdf
-    try:
-        import docx2pdf
-        docx2pdf.convert(docx_path, pdf_path)
-        
-        if os.path.exists(pdf_path):
-            return pdf_path
-            
-    except ImportError:
-        print("Bibliothèque docx2pdf non installée.")
-    except Exception as e:
-        print(f"Échec de la conversion PDF via docx2pdf: {str(e)}")
+    # Méthode 2: convertisseurs détectés au démarrage (LibreOffice, docx2pdf, reportlab)
+    result, _ = convert(TASK_DOCX_TO_PDF, docx_path, pdf_path, fidelity_floor)
+    if result:
+        return result
+    if not placeholder:
+        return None
     
-    # Méthode 3: Créer un PDF basique avec reportlab
+    # Méthode 3: Créer un PDF d'information avec reportlab
     try:
         from reportlab.lib.pagesizes import letter
         from reportlab.pdfgen import canvas
@@ -324,41 +387,127 @@ def convert_docx_to_pdf(docx_path, pdf_path, status_dir):
     
     return None
 
-def process_zip_file(zip_path, output_dir, status_dir=None, job_id=None):
+def _convert_sources_to_pdf(source_files, pdf_path, status_dir, fidelity_floor=None):
+    """Render source_files to a single PDF without keeping a merged .docx"""
+    if not source_files:
+        return None
+    if len(source_files) > 1 and render_pdf_parallel(source_files, pdf_path, fidelity_floor=fidelity_floor):
+        return pdf_path
+    if len(source_files) == 1:
+        return convert_docx_to_pdf(source_files[0], pdf_path, status_dir, fidelity_floor=fidelity_floor)
+    
+    # Rendu parallèle impossible : fusionner dans un fichier temporaire
+    fd, temp_docx = tempfile.mkstemp(suffix='.docx', dir=os.path.dirname(os.path.abspath(pdf_path)))
+    os.close(fd)
+    try:
+        if not merge_docx_files(source_files, temp_docx, None):
+            return None
+        return convert_docx_to_pdf(temp_docx, pdf_path, status_dir, fidelity_floor=fidelity_floor)
+    finally:
+        os.remove(temp_docx)
+
+# Fichier marqueur (dans le dossier de statut) qui demande l'annulation d'un job
+CANCEL_MARKER = 'cancel'
+
+def run_processing(zip_path, output_dir, status_dir=None, job_id=None, pdf_on_demand=False, resumable=False,
+                   outputs=None, intermediates=INTERMEDIATES_KEEP, deadline=None):
     """
-    Process a zip file containing .doc/.docx files:
+    Process a zip file containing .doc/.docx files, in the calling thread:
     1. Extract all .doc and .docx files
     2. Convert .doc to .docx if needed
     3. Merge all into a single .docx
-    4. Convert the merged file to PDF
+       (steps 1 to 3 overlap: each document is converted as soon as it is
+       extracted and merged as soon as it is ready, see pipeline.run_pipeline)
+    4. Convert the merged file to PDF (skipped if pdf_on_demand is set:
+       the PDF is then generated by ensure_pdf on first download)
+    
+    outputs lists the files to produce ('docx', 'pdf', default both): step 3
+    only runs if the .docx is requested, step 4 only if the PDF is. The
+    intermediate files (extracted and converted documents) are then kept or
+    deleted according to intermediates ('keep', 'delete' or 'on_error').
+    
+    deadline is an optional timestamp (time.time()) by which the job should
+    be done: step 4 then switches to the fastest converter, or is skipped
+    altogether (the .docx is delivered alone), when the remaining time runs
+    short. The degradations applied are listed in the final status.
     
-    This function operates asynchronously and updates a status file.
-    If job_id is provided, it will update the database with processing status.
+    Updates a status file, and the database if job_id is provided.
+    With resumable, each completed stage is recorded as a checkpoint in the
+    job store, and stages completed by a previous, interrupted run are
+    skipped. Returns True if the job completed, False otherwise.
+    
+    The job stops between documents once cancelled, either through the
+    cancel token of the worker pool or through a cancel marker written in
+    status_dir; its partial outputs are then deleted.
     """
-    # Function to be run in a separate thread
-    def process_thread():
-        start_time = int(time.time())
-        
+    # Jeton d'annulation du pool de workers, complété par le fichier marqueur
+    # (job annulé depuis un autre processus)
+    token = current_cancel_token() or CancelToken()
+    if status_dir and not token.marker_path:
+        token.marker_path = os.path.join(status_dir, CANCEL_MARKER)
+    
+    outputs = parse_outputs(outputs)
+    intermediates = parse_intermediates(intermediates)
+    
+    # Job soumis à une échéance : toujours le convertisseur le moins coûteux
+    with cancel_scope(token), (without_exploration() if deadline else nullcontext()):
         try:
-            # Créer les dossiers de sortie
-            os.makedirs(output_dir, exist_ok=True)
-            if status_dir:
-                os.makedirs(status_dir, exist_ok=True)
-            
-            # Étape 1: Extraction des fichiers
+            success = _run_processing(zip_path, output_dir, status_dir, job_id, pdf_on_demand, resumable, outputs,
+                                      Deadline(deadline) if deadline else None)
+        except JobCancelled:
+            print(f"Traitement annulé: {job_id or zip_path}")
+            finish_cancelled_job(output_dir, status_dir, job_id)
+            return False
+    
+    # Fichiers extraits et convertis, inutiles une fois les sorties produites
+    if should_delete_intermediates(intermediates, success):
+        shutil.rmtree(os.path.join(output_dir, 'extracted'), ignore_errors=True)
+    return success
+
+def _run_processing(zip_path, output_dir, status_dir, job_id, pdf_on_demand, resumable, outputs, deadline):
+    start_time = int(time.time())
+    
+    # Étapes nécessaires aux sorties demandées : les autres ne sont pas exécutées
+    pdf_on_demand = bool(pdf_on_demand) and OUTPUT_DOCX in outputs
+    stages = planned_stages(outputs, pdf_on_demand)
+    progress = StageProgress(stages)
+    build_docx = STAGE_MERGE in stages
+    last_pipeline_stage = STAGE_MERGE if build_docx else STAGE_CONVERT
+    # Durées prédites et mesurées des étapes (temps restant estimé)
+    timing = None
+    
+    try:
+        # Créer les dossiers de sortie
+        os.makedirs(output_dir, exist_ok=True)
+        if status_dir:
+            os.makedirs(status_dir, exist_ok=True)
+        
+        # Points de reprise d'une exécution précédente interrompue
+        store = get_job_store() if resumable and job_id else None
+        checkpoints = store.checkpoints(job_id) if store else {}
+        
+        merge_checkpoint = checkpoints.get('merge')
+        if merge_checkpoint and all(os.path.exists(path) for path in
+                                    [merge_checkpoint['merged_docx']] + merge_checkpoint['docx_files'] if path):
+            # Fusion déjà terminée : reprendre à l'étape PDF
+            merged_docx_path = merge_checkpoint['merged_docx']
+            docx_files = merge_checkpoint['docx_files']
+            merge_result = bool(docx_files)
+        else:
+            # Étapes 1 à 3: extraction, conversion et fusion en flux
             save_status(status_dir, {
-                'percent': 10,
+                'percent': progress.percent(STAGE_EXTRACT),
                 'status_text': 'Extraction des fichiers...',
                 'current_step': 'extract',
                 'complete': False,
                 'start_time': start_time
             })
             
-            # Extraire les fichiers .doc et .docx
-            extract_folder = os.path.join(output_dir, 'extracted')
-            extracted_files = extract_doc_files(zip_path, extract_folder)
+            # Lister les fichiers .doc et .docx de l'archive
+            entry_sizes = list_doc_entry_sizes(zip_path)
+            entries = [entry for entry, _ in entry_sizes]
             
-            if not extracted_files:
+            if not entries:
                 save_status(status_dir, {
                     'percent': 0,
                     'status_text': 'Aucun fichier DOC/DOCX trouvé dans l\'archive ZIP.',
@@ -369,223 +518,341 @@ def process_zip_file(zip_path, output_dir, status_dir=None, job_id=None):
                     'end_time': int(time.time())
                 })
                 
-                # Mettre à jour le statut dans la base de données
+                # Mettre à jour le statut dans la base de données (écriture différée)
                 if job_id:
-                    try:
-                        import sys
-                        sys.path.append(os.getcwd())
-                        from flask import Flask
-                        from models import db, ProcessingJob
-                        
-                        app = Flask(__name__)
-                        app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL')
-                        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-                        db.init_app(app)
-                        
-                        with app.app_context():
-                            job = ProcessingJob.query.filter_by(job_id=job_id).first()
-                            if job:
-                                job.status = 'error'
-                                job.completed_at = datetime.now()
-                                db.session.commit()
-                    except Exception as db_err:
-                        print(f"Erreur lors de la mise à jour du statut dans la base de données: {str(db_err)}")
+                    update_job(job_id, 'error', completed=True)
                 
-                return
+                return False
             
-            # Étape 2: Conversion des fichiers .doc en .docx
-            save_status(status_dir, {
-                'percent': 30,
-                'status_text': 'Conversion des fichiers DOC en DOCX...',
-                'current_step': 'convert',
-                'complete': False,
-                'start_time': start_time
-            })
+            # Parallélisme du job, modifiable depuis l'administration
+            workers = get_setting('pipeline_workers', PIPELINE_WORKERS)
+            queue_size = get_setting('pipeline_queue_size', PIPELINE_QUEUE_SIZE)
             
-            # Liste pour les fichiers DOCX (convertis ou originaux)
-            docx_files = []
+            # Durée de chaque étape prédite pour le volume de l'archive : elle
+            # donne aussi le poids de chaque étape dans le pourcentage d'avancement
+            timing = EtaTracker(load_throughput_model(), stage_workload(stages, entry_sizes), workers)
+            progress = StageProgress(stages, timing.weights())
             
-            for file_path in extracted_files:
-                if file_path.lower().endswith('.doc'):
-                    # Convertir en DOCX
-                    docx_path = convert_doc_to_docx(file_path, extract_folder)
-                    if docx_path:
-                        docx_files.append(docx_path)
-                elif file_path.lower().endswith('.docx'):
-                    # Déjà au format DOCX
-                    docx_files.append(file_path)
+            extract_folder = os.path.join(output_dir, 'extracted')
+            merged_docx_path = os.path.join(output_dir, 'merged.docx') if build_docx else None
+            merged_doc = Document() if build_docx else None
+            total_files = len(entries)
             
-            # Étape 3: Fusion des fichiers DOCX
-            save_status(status_dir, {
-                'percent': 50,
-                'status_text': 'Fusion des documents...',
-                'current_step': 'merge',
-                'complete': False,
-                'file_count': len(docx_files),
-                'start_time': start_time
-            })
+            # Liste pour les fichiers DOCX (convertis ou originaux), dans l'ordre de fusion
+            docx_files = []
             
-            # Fusionner les fichiers DOCX
-            merged_docx_path = os.path.join(output_dir, 'merged.docx')
-            merge_result = merge_docx_files(docx_files, merged_docx_path, status_dir)
+            def convert_file(file_path):
+                if not file_path.lower().endswith('.doc'):
+                    # Déjà au format DOCX
+                    return file_path
+                
+                # Conversion déjà faite lors d'une exécution précédente
+                stage = f'convert:{os.path.basename(file_path)}'
+                previous = checkpoints.get(stage)
+                if previous and os.path.exists(previous['docx_path']):
+                    return previous['docx_path']
+                
+                # Convertir en DOCX
+                with timing.timed(STAGE_CONVERT, size=os.path.getsize(file_path)):
+                    docx_path = convert_doc_to_docx(file_path, extract_folder)
+                if docx_path and store:
+                    store.checkpoint(job_id, stage, {'docx_path': docx_path})
+                return docx_path
             
-            if not merge_result:
+            def merge_file(index, file_path, docx_path):
+                if not docx_path:
+                    return
+                if build_docx:
+                    with timing.timed(STAGE_MERGE, size=os.path.getsize(docx_path)):
+                        append_docx_file(merged_doc, docx_path, len(docx_files))
+                docx_files.append(docx_path)
+                
                 save_status(status_dir, {
-                    'percent': 0,
-                    'status_text': 'Échec de la fusion des documents.',
-                    'current_step': 'error',
+                    'percent': progress.span(STAGE_CONVERT, last_pipeline_stage, (index + 1) / total_files),
+                    'status_text': f'Traitement du document {index+1}/{total_files}...',
+                    'current_step': 'merge',
                     'complete': False,
-                    'error': 'Erreur lors de la fusion des fichiers DOCX',
-                    'start_time': start_time,
-                    'end_time': int(time.time())
+                    'file_count': total_files,
+                    'eta_seconds': timing.eta(last_pipeline_stage, (index + 1) / total_files),
+                    'start_time': start_time
                 })
-                
-                # Mettre à jour le statut dans la base de données
-                if job_id:
-                    try:
-                        import sys
-                        sys.path.append(os.getcwd())
-                        from flask import Flask
-                        from models import db, ProcessingJob
-                        
-                        app = Flask(__name__)
-                        app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL')
-                        app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-                        db.init_app(app)
-                        
-                        with app.app_context():
-                            job = ProcessingJob.query.filter_by(job_id=job_id).first()
-                            if job:
-                                job.status = 'error'
-                                job.completed_at = datetime.now()
-                                db.session.commit()
-                    except Exception as db_err:
-                        print(f"Erreur lors de la mise à jour du statut dans la base de données: {str(db_err)}")
-                    
-                return
             
-            # Étape 4: Conversion en PDF
-            save_status(status_dir, {
-                'percent': 70,
-                'status_text': 'Conversion en PDF...',
-                'current_step': 'pdf',
-                'complete': False,
-                'start_time': start_time
-            })
-            
-            # Convertir en PDF
-            pdf_path = os.path.join(output_dir, 'merged.pdf')
-            pdf_result = convert_docx_to_pdf(merged_docx_path, pdf_path, status_dir)
-            
-            # Terminer
-            end_time = int(time.time())
-            processing_time = end_time - start_time
+            def extracted_files():
+                # Durée d'extraction de chaque document, hors attente de la conversion
+                files = iter_doc_files(zip_path, extract_folder, entries)
+                while True:
+                    started = time.time()
+                    file_path = next(files, None)
+                    if file_path is None:
+                        return
+                    timing.record(STAGE_EXTRACT, time.time() - started, 1, os.path.getsize(file_path))
+                    yield file_path
+            
+            # Chaque document est converti dès son extraction, puis fusionné dès qu'il est prêt
+            run_pipeline(extracted_files(), convert_file, merge_file, workers=workers, queue_size=queue_size)
+            
+            # Sauvegarder le document fusionné (s'il est demandé)
+            merge_result = None
+            if docx_files:
+                if build_docx:
+                    with timing.timed(STAGE_MERGE, documents=0):
+                        merge_result = save_merged_docx(merged_doc, merged_docx_path, status_dir)
+                else:
+                    merge_result = True
             
+            if merge_result and store:
+                store.checkpoint(job_id, 'merge', {'merged_docx': merged_docx_path, 'docx_files': docx_files})
+        
+        if not merge_result:
             save_status(status_dir, {
-                'percent': 100,
-                'status_text': 'Traitement terminé avec succès.',
-                'current_step': 'complete',
-                'complete': True,
-                'file_count': len(docx_files),
-                'output_docx': os.path.basename(merged_docx_path),
-                'output_pdf': os.path.basename(pdf_result) if pdf_result else None,
+                'percent': 0,
+                'status_text': 'Échec de la fusion des documents.',
+                'current_step': 'error',
+                'complete': False,
+                'error': 'Erreur lors de la fusion des fichiers DOCX',
                 'start_time': start_time,
-                'end_time': end_time,
-                'processing_time': processing_time
+                'end_time': int(time.time())
             })
             
-            # Mettre à jour le statut dans la base de données
+            # Mettre à jour le statut dans la base de données (écriture différée)
             if job_id:
-                try:
-                    import sys
-                    sys.path.append(os.getcwd())
-                    from flask import Flask
-                    from models import db, ProcessingJob, UsageStat
-                    
-                    app = Flask(__name__)
-                    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL')
-                    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-                    db.init_app(app)
-                    
-                    with app.app_context():
-                        # Mettre à jour le job
-                        job = ProcessingJob.query.filter_by(job_id=job_id).first()
-                        if job:
-                            job.status = 'completed'
-                            job.completed_at = datetime.now()
-                            job.file_count = len(docx_files)
-                            job.processing_time = processing_time
-                            db.session.commit()
-                        
-                        # Mettre à jour les statistiques d'utilisation
-                        today = datetime.now().date()
-                        usage_stat = UsageStat.query.filter_by(date=today).first()
-                        
-                        if usage_stat:
-                            usage_stat.total_jobs += 1
-                            usage_stat.total_files_processed += len(docx_files)
-                            usage_stat.total_processing_time += processing_time
-                        else:
-                            usage_stat = UsageStat(
-                                date=today,
-                                total_jobs=1,
-                                total_files_processed=len(docx_files),
-                                total_processing_time=processing_time
-                            )
-                            db.session.add(usage_stat)
-                        
-                        db.session.commit()
-                except Exception as db_err:
-                    print(f"Erreur lors de la mise à jour du statut dans la base de données: {str(db_err)}")
-            
-        except Exception as e:
-            error_message = str(e)
-            error_traceback = traceback.format_exc()
-            print(f"Error processing ZIP file: {error_message}")
-            print(error_traceback)
-            
-            error_time = int(time.time())
-            
+                update_job(job_id, 'error', completed=True)
+                
+            return False
+        
+        # Étape 4: Conversion en PDF (si elle est demandée et n'est pas
+        # différée au premier téléchargement)
+        if timing is None:
+            # Reprise après la fusion : seule la durée du PDF reste à prédire
+            timing = EtaTracker(load_throughput_model(),
+                                {STAGE_PDF: (len(docx_files), files_size(docx_files))} if STAGE_PDF in stages else {})
+        
+        pdf_result = None
+        if STAGE_PDF in stages:
+            timing.start_phase()
             save_status(status_dir, {
-                'percent': 0,
-                'status_text': 'Une erreur s\'est produite.',
-                'current_step': 'error',
+                'percent': progress.percent(STAGE_PDF),
+                'status_text': 'Conversion en PDF...',
+                'current_step': 'pdf',
                 'complete': False,
-                'error': error_message,
-                'traceback': error_traceback,
-                'start_time': start_time,
-                'end_time': error_time
+                'eta_seconds': timing.eta(STAGE_PDF),
+                'start_time': start_time
             })
             
-            # Mettre à jour le job dans la base de données en cas d'erreur
-            if job_id:
-                try:
-                    import sys
-                    sys.path.append(os.getcwd())
-                    from flask import Flask
-                    from models import db, ProcessingJob
-                    
-                    app = Flask(__name__)
-                    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL')
-                    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-                    db.init_app(app)
-                    
-                    with app.app_context():
-                        job = ProcessingJob.query.filter_by(job_id=job_id).first()
-                        if job:
-                            job.status = 'error'
-                            job.completed_at = datetime.now()
-                            db.session.commit()
-                except Exception as db_err:
-                    print(f"Erreur lors de la mise à jour du statut d'erreur dans la base de données: {str(db_err)}")
-    
-    # Start processing in a thread
-    thread = threading.Thread(target=process_thread)
+            # Convertir en PDF, sauf si une exécution précédente l'a déjà fait.
+            # Rendu dans un fichier temporaire : merged.pdf n'existe qu'une fois complet
+            pdf_path = os.path.join(output_dir, 'merged.pdf')
+            pdf_checkpoint = checkpoints.get('pdf')
+            if pdf_checkpoint and os.path.exists(pdf_checkpoint['pdf_path']):
+                pdf_result = pdf_checkpoint['pdf_path']
+            else:
+                pdf_started = time.time()
+                
+                def render_job_pdf(fidelity_floor=None):
+                    return render_pdf_atomically(pdf_path, lambda temp_path: convert_docx_to_pdf(
+                        merged_docx_path, temp_path, status_dir, docx_files, fidelity_floor))
+                
+                if deadline:
+                    # Au mieux avant l'échéance : rendu rapide, ou DOCX livré seul
+                    pdf_result = deadline.render_pdf(render_job_pdf, docx_files, pdf_path,
+                                                     required=not build_docx)
+                else:
+                    pdf_result = render_job_pdf()
+                if pdf_result and not (deadline and deadline.degradations):
+                    # Rendu dégradé (convertisseur rapide) : non représentatif du débit du PDF
+                    timing.record(STAGE_PDF, time.time() - pdf_started, len(docx_files), files_size(docx_files))
+                if pdf_result and store:
+                    store.checkpoint(job_id, 'pdf', {'pdf_path': pdf_result})
+            
+            if not pdf_result and not build_docx:
+                # Seul le PDF était demandé : le job n'a rien produit
+                fail_job(job_id, status_dir, 'Échec de la conversion en PDF.',
+                         'Aucun convertisseur n\'a pu produire le PDF')
+                return False
+        
+        # Terminer
+        end_time = int(time.time())
+        processing_time = end_time - start_time
+        
+        degraded = bool(deadline and deadline.degradations)
+        save_status(status_dir, {
+            'percent': 100,
+            'status_text': ('Traitement terminé en mode dégradé pour respecter le délai.' if degraded
+                            else 'Traitement terminé avec succès.'),
+            'current_step': 'complete',
+            'complete': True,
+            'file_count': len(docx_files),
+            'output_docx': os.path.basename(merged_docx_path) if merged_docx_path else None,
+            'output_pdf': os.path.basename(pdf_result) if pdf_result else None,
+            'outputs': outputs,
+            'pdf_on_demand': pdf_on_demand,
+            'start_time': start_time,
+            'end_time': end_time,
+            'processing_time': processing_time,
+            'eta_seconds': 0,
+            'predicted_seconds': round(timing.predicted_total, 1),
+            'prediction_error': timing.prediction_error(),
+            **(deadline.to_dict() if deadline else {})
+        })
+        
+        # Enregistrer le job terminé et ses statistiques (écriture différée)
+        if job_id:
+            record_completed_job(job_id, len(docx_files), processing_time, timing.samples())
+        
+        return True
+        
+    except (JobCancelled, MemoryError):
+        # Limite de mémoire atteinte : signalée par le processus du job (job_limits)
+        raise
+    
+    except Exception as e:
+        error_message = str(e)
+        error_traceback = traceback.format_exc()
+        print(f"Error processing ZIP file: {error_message}")
+        print(error_traceback)
+        
+        error_time = int(time.time())
+        
+        save_status(status_dir, {
+            'percent': 0,
+            'status_text': 'Une erreur s\'est produite.',
+            'current_step': 'error',
+            'complete': False,
+            'error': error_message,
+            'traceback': error_traceback,
+            'start_time': start_time,
+            'end_time': error_time
+        })
+        
+        # Mettre à jour le statut dans la base de données (écriture différée)
+        if job_id:
+            update_job(job_id, 'error', completed=True)
+        
+        return False
+
+def finish_cancelled_job(output_dir, status_dir, job_id=None):
+    """Delete the partial outputs of a cancelled job and record it as cancelled"""
+    shutil.rmtree(output_dir, ignore_errors=True)
+    
+    save_status(status_dir, {
+        'percent': 0,
+        'status_text': 'Traitement annulé.',
+        'current_step': 'cancelled',
+        'complete': False,
+        'cancelled': True,
+        'end_time': int(time.time())
+    })
+    
+    # Mettre à jour le statut dans la base de données (écriture différée)
+    if job_id:
+        update_job(job_id, 'cancelled', completed=True)
+
+def run_stored_job(job_id):
+    """
+    Run a job recorded in the durable job store, resuming from its last
+    checkpoint if a previous run was interrupted
+    """
+    store = get_job_store()
+    stored_job = store.get(job_id)
+    if not stored_job:
+        print(f"Job {job_id} introuvable dans la file durable")
+        return False
+    if stored_job.state == 'cancelled':
+        return False
+    
+    store.start(job_id)
+    success = False
+    try:
+        kwargs = dict(stored_job.kwargs, job_id=job_id, resumable=True)
+        success = run_processing(*stored_job.args, **kwargs)
+        return success
+    finally:
+        store.finish(job_id, success=bool(success))
+
+def abandon_stored_job(stored_job):
+    """Report as failed a job that interrupted its worker too many times"""
+    fail_job(stored_job.job_id, stored_job.kwargs.get('status_dir'),
+             'Le traitement a été interrompu à plusieurs reprises et a été abandonné.',
+             f'Abandon après {stored_job.attempts} tentatives')
+
+def fail_job(job_id, status_dir, status_text, error):
+    """Record as failed a job that could not report its own error"""
+    save_status(status_dir, {
+        'percent': 0,
+        'status_text': status_text,
+        'current_step': 'error',
+        'complete': False,
+        'error': error,
+        'end_time': int(time.time())
+    })
+    
+    # Mettre à jour le statut dans la base de données (écriture différée)
+    update_job(job_id, 'error', completed=True)
+
+def process_zip_file(zip_path, output_dir, status_dir=None, job_id=None, pdf_on_demand=False):
+    """
+    Run run_processing in a separate daemon thread and return the thread.
+    
+    The web application submits jobs to its bounded JobScheduler instead;
+    this helper is kept for scripts that process a single archive.
+    """
+    thread = threading.Thread(
+        target=run_processing,
+        args=(zip_path, output_dir),
+        kwargs={'status_dir': status_dir, 'job_id': job_id, 'pdf_on_demand': pdf_on_demand}
+    )
     thread.daemon = True
     thread.start()
     
     return thread
 
+# Rendus PDF à la demande en cours, par dossier de sortie
+_pdf_renders = {}
+_pdf_renders_lock = threading.Lock()
+
+def ensure_pdf(output_dir):
+    """
+    Return the path of merged.pdf for a finished job, generating it from
+    merged.docx the first time it is requested. Concurrent requests for the
+    same job wait on the same in-flight render instead of starting their
+    own; the rendered PDF is cached next to merged.docx. A failed conversion
+    returns None and is retried on the next request (the placeholder PDF is
+    never cached).
+    """
+    docx_path = os.path.join(output_dir, 'merged.docx')
+    pdf_path = os.path.join(output_dir, 'merged.pdf')
+    
+    if os.path.exists(pdf_path):
+        return pdf_path
+    if not os.path.exists(docx_path):
+        return None
+    
+    with _pdf_renders_lock:
+        render_done = _pdf_renders.get(output_dir)
+        owner = render_done is None
+        if owner:
+            render_done = threading.Event()
+            _pdf_renders[output_dir] = render_done
+    
+    # Un rendu est déjà en cours pour ce job : attendre son résultat
+    if not owner:
+        render_done.wait()
+        return pdf_path if os.path.exists(pdf_path) else None
+    
+    try:
+        if not os.path.exists(pdf_path):
+            # Rendre dans un fichier temporaire puis renommer, pour ne jamais
+            # servir un PDF partiellement écrit
+            render_pdf_atomically(pdf_path, lambda temp_path: convert_docx_to_pdf(
+                docx_path, temp_path, None, placeholder=False))
+        
+        return pdf_path if os.path.exists(pdf_path) else None
+    
+    finally:
+        with _pdf_renders_lock:
+            del _pdf_renders[output_dir]
+        render_done.set()
+
 def cleanup_old_files(directory, max_age_hours=24):
     """Delete files older than max_age_hours from the directory"""
     current_time = datetime.now()
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+DocxFilesMerger - Application de traitement et fusion de documents.
+Développé par MOA Digital Agency LLC (https://myoneart.com)
+Email: moa@myoneart.com
+Copyright © 2025 MOA Digital Agency LLC. Tous droits réservés.
+
+Service de traitement hors des workers web.
+Le service écoute sur un canal IPC local (multiprocessing.connection) et
+exécute chaque traitement dans un processus enfant soumis à des limites de
+mémoire, de temps CPU et d'espace disque (voir job_limits) : le travail XML
+de python-docx ne dispute plus le GIL aux requêtes servies par gunicorn, et
+un document pathologique ne fait échouer que son propre job.
+Quand WORKER_ADDRESS est défini, l'application web se contente de soumettre
+les jobs via WorkerClient et de lire les fichiers de statut.
+
+Les messages échangés sont désérialisés (pickle) : seuls les clients qui
+connaissent WORKER_AUTHKEY peuvent se connecter, et le service refuse de
+démarrer sans cette clé. Une socket Unix est créée avec le mode 0600.
+
+Lancement :
+    WORKER_AUTHKEY=<clé secrète> WORKER_ADDRESS=127.0.0.1:6001 python worker.py --processes 4
+"""
+
+import os
+import sys
+import argparse
+import threading
+import traceback
+from multiprocessing.connection import Listener, Client
+
+from jobs import JobScheduler, QueueFullError
+from job_store import get_job_store
+from job_limits import run_job_with_limits
+from database import update_job
+
+# Adresse du service : "hôte:port" ou chemin d'une socket Unix
+WORKER_ADDRESS = os.environ.get('WORKER_ADDRESS', '')
+# Clé d'authentification du canal IPC, obligatoire : pas de valeur par défaut,
+# un client qui la connaît peut faire exécuter du code au service
+WORKER_AUTHKEY = os.environ.get('WORKER_AUTHKEY', '')
+
+
+class WorkerUnavailableError(Exception):
+    """Le service de traitement ne répond pas"""
+
+
+def parse_address(address):
+    """Convertir "hôte:port" en tuple, sinon garder le chemin de socket Unix"""
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit() and '/' not in address:
+        return (host or '127.0.0.1', int(port))
+    return address
+
+
+class WorkerClient:
+    """
+    Client du service de traitement, utilisable à la place de JobScheduler :
+    submit() a la même signature et lève QueueFullError de la même façon.
+    """
+
+    def __init__(self, address=WORKER_ADDRESS, authkey=WORKER_AUTHKEY, timeout=10):
+        if not authkey:
+            raise ValueError("WORKER_AUTHKEY doit être défini pour utiliser le service de traitement")
+        self.address = parse_address(address)
+        self.authkey = authkey.encode('utf-8')
+        self.timeout = timeout
+
+    def _request(self, message):
+        try:
+            connection = Client(self.address, authkey=self.authkey)
+        except (OSError, EOFError) as e:
+            raise WorkerUnavailableError(f"Service de traitement injoignable: {str(e)}")
+
+        try:
+            connection.send(message)
+            if not connection.poll(self.timeout):
+                raise WorkerUnavailableError("Le service de traitement ne répond pas")
+            reply = connection.recv()
+        except (OSError, EOFError) as e:
+            raise WorkerUnavailableError(f"Service de traitement injoignable: {str(e)}")
+        finally:
+            connection.close()
+
+        if reply.get('error') == 'queue_full':
+            raise QueueFullError(reply['position'], reply['retry_after'])
+        if 'error' in reply:
+            raise RuntimeError(reply['error'])
+        return reply
+
+    def submit(self, job_id, func, args=(), kwargs=None, on_start=None, size=None):
+        """
+        Soumettre un job au service. Seul le nom de la fonction est transmis ;
+        le service marque lui-même le job comme démarré (on_start est ignoré).
+        """
+        reply = self._request({
+            'op': 'submit',
+            'job_id': job_id,
+            'func': func.__name__,
+            'args': tuple(args),
+            'kwargs': kwargs or {},
+            'size': tuple(size) if size else None
+        })
+        return reply['position']
+
+    def cancel(self, job_id):
+        """Annuler un job du service (voir JobScheduler.cancel)"""
+        return self._request({'op': 'cancel', 'job_id': job_id})['outcome']
+
+    def position(self, job_id):
+        return self._request({'op': 'position', 'job_id': job_id})['position']
+
+    def stats(self):
+        return self._request({'op': 'stats'})['stats']
+
+
+class WorkerService:
+    """Service de traitement : file d'attente bornée, un processus limité par job"""
+
+    # Fonctions que le service accepte d'exécuter
+    ALLOWED_FUNCTIONS = {'run_processing', 'run_stored_job'}
+
+    def __init__(self, address, authkey, processes=2, max_queue=20):
+        if not authkey:
+            raise ValueError("WORKER_AUTHKEY doit être défini pour démarrer le service de traitement")
+        self.address = parse_address(address)
+        self.authkey = authkey.encode('utf-8')
+        self.processes = max(1, processes)
+        self.scheduler = JobScheduler(workers=self.processes, max_queue=max_queue)
+
+    def _set_job_status(self, job_id, status):
+        """Mettre à jour l'état du job dans la base de données (écriture différée)"""
+        update_job(job_id, status, completed=(status == 'error'))
+
+    def _run_job(self, job_id, func_name, args, kwargs):
+        # Un dépassement de limite ou un arrêt brutal est enregistré comme
+        # une erreur du job par run_job_with_limits
+        run_job_with_limits(job_id, func_name, args, kwargs)
+
+    def _submit(self, job_id, func_name, args, kwargs, size=None):
+        return self.scheduler.submit(
+            job_id,
+            self._run_job,
+            args=(job_id, func_name, args, kwargs),
+            on_start=lambda job_id: self._set_job_status(job_id, 'processing'),
+            size=size
+        )
+
+    def _handle(self, message):
+        op = message.get('op')
+
+        if op == 'submit':
+            if message.get('func') not in self.ALLOWED_FUNCTIONS:
+                return {'error': f"Fonction non autorisée: {message.get('func')}"}
+            try:
+                position = self._submit(message['job_id'], message['func'],
+                                        message['args'], message['kwargs'],
+                                        size=message.get('size'))
+            except QueueFullError as e:
+                return {'error': 'queue_full', 'position': e.position, 'retry_after': e.retry_after}
+            if message['func'] == 'run_stored_job':
+                # Le service devient responsable du job dans la file durable
+                get_job_store().claim(message['job_id'])
+            return {'position': position}
+
+        if op == 'cancel':
+            # Le processus qui exécute le job est tué par le jeton d'annulation
+            return {'outcome': self.scheduler.cancel(message.get('job_id'))}
+        if op == 'position':
+            return {'position': self.scheduler.position(message.get('job_id'))}
+        if op == 'stats':
+            return {'stats': self.scheduler.stats()}
+        return {'error': f"Opération inconnue: {op}"}
+
+    def _serve_connection(self, connection):
+        try:
+            while True:
+                try:
+                    message = connection.recv()
+                except EOFError:
+                    break
+                try:
+                    reply = self._handle(message)
+                except Exception as e:
+                    print(traceback.format_exc())
+                    reply = {'error': str(e)}
+                connection.send(reply)
+        except OSError as e:
+            print(f"Erreur de connexion avec un client: {str(e)}")
+        finally:
+            connection.close()
+
+    def serve_forever(self):
+        # Socket Unix laissée par un arrêt précédent
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.remove(self.address)
+
+        # Reprendre les jobs interrompus par l'arrêt d'un service précédent
+        from utils import abandon_stored_job, stored_job_size
+        get_job_store().start_monitor(
+            lambda job: self._submit(job.job_id, 'run_stored_job', (job.job_id,), {},
+                                     size=stored_job_size(job)),
+            give_up=abandon_stored_job
+        )
+
+        # Socket Unix accessible au seul utilisateur du service
+        old_umask = os.umask(0o177) if isinstance(self.address, str) else None
+        try:
+            listener = Listener(self.address, authkey=self.authkey)
+        finally:
+            if old_umask is not None:
+                os.umask(old_umask)
+
+        with listener:
+            print(f"Service de traitement à l'écoute sur {listener.address} "
+                  f"({self.processes} processus)")
+            while True:
+                try:
+                    connection = listener.accept()
+                except Exception as e:
+                    # Client refusé (clé d'authentification invalide...)
+                    print(f"Connexion refusée: {str(e)}")
+                    continue
+                thread = threading.Thread(target=self._serve_connection, args=(connection,))
+                thread.daemon = True
+                thread.start()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Service de traitement DocxFilesMerger")
+    parser.add_argument('--address', default=WORKER_ADDRESS or '127.0.0.1:6001',
+                        help="Adresse d'écoute, hôte:port ou socket Unix (défaut: WORKER_ADDRESS)")
+    parser.add_argument('--processes', type=int,
+                        default=int(os.environ.get('MAX_CONCURRENT_JOBS', 2)),
+                        help="Nombre de traitements simultanés (défaut: MAX_CONCURRENT_JOBS)")
+    parser.add_argument('--max-queue', type=int,
+                        default=int(os.environ.get('MAX_QUEUED_JOBS', 20)),
+                        help="Taille de la file d'attente (défaut: MAX_QUEUED_JOBS)")
+    args = parser.parse_args()
+
+    if not WORKER_AUTHKEY:
+        print("Erreur: WORKER_AUTHKEY doit être défini (clé secrète partagée avec l'application web)")
+        return 1
+
+    service = WorkerService(args.address, WORKER_AUTHKEY,
+                            processes=args.processes, max_queue=args.max_queue)
+    try:
+        service.serve_forever()
+    except KeyboardInterrupt:
+        print("\nArrêt du service de traitement.")
+        return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())